@@ -0,0 +1,16 @@
+import re
+import hashlib
+
+# Account helpers without UI dependencies, so worker processes (provisioning) can use them
+# without importing Streamlit; common re-exports them for the pages
+
+
+# Function to hash passwords
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+# Function to validate email
+def is_valid_email(email):
+    pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
+    return re.match(pattern, email) is not None
@@ -0,0 +1,249 @@
+import os
+import sys
+import time
+import random
+import threading
+from collections import OrderedDict, deque
+
+# Limits are per worker process; with several workers, divide the global rate and the
+# in-flight cap between them. The mempool watermarks are read from the database and so
+# are shared by every worker.
+USER_RATE = float(os.environ.get("ADMIT_USER_RATE", "1"))           # Transfers/second per user
+USER_BURST = float(os.environ.get("ADMIT_USER_BURST", "5"))
+GLOBAL_RATE = float(os.environ.get("ADMIT_GLOBAL_RATE", "50"))      # Transfers/second for the process
+GLOBAL_BURST = float(os.environ.get("ADMIT_GLOBAL_BURST", "100"))
+MAX_IN_FLIGHT = int(os.environ.get("ADMIT_MAX_IN_FLIGHT", "8"))     # Concurrent transfer writes
+IN_FLIGHT_WAIT = float(os.environ.get("ADMIT_IN_FLIGHT_WAIT", "0.25"))  # Seconds to queue for a write slot
+MEMPOOL_SOFT = int(os.environ.get("ADMIT_MEMPOOL_SOFT", "500"))     # Pending depth where shedding starts
+MEMPOOL_HARD = int(os.environ.get("ADMIT_MEMPOOL_HARD", "2000"))    # Pending depth where everything is shed
+
+LOCK_WAIT_TIMEOUT = 5     # innodb_lock_wait_timeout (seconds) for admitted writes
+MEMPOOL_REFRESH = 1.0     # Seconds a mempool depth reading is reused
+MEMPOOL_RETRY = 30.0      # Suggested delay (seconds) when the mempool is at the hard watermark
+MAX_USERS = 10000         # Per-user buckets kept (least recently used are dropped)
+LATENCY_SAMPLES = 5000
+
+MEMPOOL_QUERY = "SELECT COUNT(*) AS pending FROM Transactions WHERE block_id IS NULL AND status = 'pending'"
+
+# Shed reason -> what the user is told
+SHED_MESSAGES = {
+    "mempool": "too many transactions are waiting to be mined",
+    "user_rate": "you are sending transfers too quickly",
+    "global_rate": "too many transfers are being sent right now",
+    "in_flight": "too many transfers are being processed right now",
+}
+
+
+class TokenBucket:
+    # `rate` tokens per second up to `burst`; take() spends one or says how long until one is due
+    def __init__(self, rate, burst, now=None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now=None):
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def give_back(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class AdmissionController:
+    # Decides, before any database write, whether a transfer is accepted now or shed with a
+    # suggested retry delay. Checks run cheapest first: mempool depth, the user's bucket, the
+    # global bucket, then a bounded wait for one of max_in_flight write slots. Shed requests
+    # cost no database work, so accepted transfers keep a bounded latency under overload.
+    def __init__(self, user_rate=USER_RATE, user_burst=USER_BURST, global_rate=GLOBAL_RATE,
+                 global_burst=GLOBAL_BURST, max_in_flight=MAX_IN_FLIGHT, in_flight_wait=IN_FLIGHT_WAIT,
+                 mempool_soft=MEMPOOL_SOFT, mempool_hard=MEMPOOL_HARD):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.user_buckets = OrderedDict()
+        self.max_in_flight = max_in_flight
+        self.in_flight_wait = in_flight_wait
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.mempool_soft = mempool_soft
+        self.mempool_hard = mempool_hard
+        self.lock = threading.Lock()
+
+        self.mempool_depth = 0
+        self.mempool_read = 0.0
+        self.accepted_since_read = 0
+        self.in_flight = 0
+        self.accepted = 0
+        self.shed = dict.fromkeys(SHED_MESSAGES, 0)
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    # Pending transactions, re-read at most every MEMPOOL_REFRESH seconds; transfers this
+    # process accepted since the last read are added so a burst cannot overshoot it
+    def _mempool(self, cursor, now):
+        if cursor is None:
+            return 0
+        if now - self.mempool_read >= MEMPOOL_REFRESH:
+            cursor.execute(MEMPOOL_QUERY)
+            row = cursor.fetchone()
+            with self.lock:
+                self.mempool_depth = row['pending'] if isinstance(row, dict) else row[0]
+                self.mempool_read = now
+                self.accepted_since_read = 0
+        return self.mempool_depth + self.accepted_since_read
+
+    # Between the watermarks a growing share of transfers is shed (so load eases off
+    # gradually rather than all at once); the suggested delay grows with the depth
+    def _mempool_retry(self, depth):
+        if depth < self.mempool_soft:
+            return 0.0
+        excess = min(1.0, (depth - self.mempool_soft) / max(1, self.mempool_hard - self.mempool_soft))
+        if depth < self.mempool_hard and random.random() >= excess:
+            return 0.0
+        return MEMPOOL_RETRY * max(excess, 0.1) * random.uniform(0.5, 1.5)
+
+    def _user_bucket(self, user_id, now):
+        bucket = self.user_buckets.get(user_id)
+        if bucket is None:
+            bucket = self.user_buckets[user_id] = TokenBucket(self.user_rate, self.user_burst, now)
+            while len(self.user_buckets) > MAX_USERS:
+                self.user_buckets.popitem(last=False)
+        self.user_buckets.move_to_end(user_id)
+        return bucket
+
+    def _shed(self, reason, retry_after):
+        with self.lock:
+            self.shed[reason] += 1
+        return {"accepted": False, "reason": reason, "retry_after": max(1.0, retry_after)}
+
+    # Admit one transfer for user_id. Returns a decision dict: accepted ones carry a write
+    # slot that must be handed back with release(); shed ones have the reason and a
+    # retry_after in seconds. `cursor` is used for the mempool depth (None skips that check).
+    def admit(self, user_id, cursor=None):
+        now = time.monotonic()
+        retry_after = self._mempool_retry(self._mempool(cursor, now))
+        if retry_after:
+            return self._shed("mempool", retry_after)
+
+        with self.lock:
+            user_bucket = self._user_bucket(user_id, now)
+            retry_after = user_bucket.take(now)
+            if retry_after:
+                reason = "user_rate"
+            else:
+                retry_after = self.global_bucket.take(now)
+                reason = "global_rate"
+                if retry_after:
+                    user_bucket.give_back()
+        if retry_after:
+            return self._shed(reason, retry_after)
+
+        if not self.slots.acquire(timeout=self.in_flight_wait):
+            with self.lock:
+                user_bucket.give_back()
+                self.global_bucket.give_back()
+            return self._shed("in_flight", self._recent_latency())
+
+        with self.lock:
+            self.in_flight += 1
+            self.accepted += 1
+            self.accepted_since_read += 1
+        return {"accepted": True, "reason": None, "retry_after": 0.0, "started": now}
+
+    def release(self, decision):
+        if not decision.get("accepted") or decision.get("released"):
+            return
+        decision["released"] = True
+        with self.lock:
+            self.in_flight -= 1
+            self.latencies.append(time.monotonic() - decision["started"])
+        self.slots.release()
+
+    def _recent_latency(self):
+        with self.lock:
+            values = sorted(self.latencies)
+        return values[len(values) // 2] if values else self.in_flight_wait
+
+    def stats(self):
+        with self.lock:
+            values = sorted(self.latencies)
+            result = {"accepted": self.accepted, "shed": dict(self.shed), "in_flight": self.in_flight,
+                      "max_in_flight": self.max_in_flight, "mempool_depth": self.mempool_depth}
+        if values:
+            result.update({
+                "p50_s": values[len(values) // 2],
+                "p99_s": values[min(len(values) - 1, int(len(values) * 0.99))],
+            })
+        return result
+
+
+# Cap how long an admitted write waits on row locks (Wallets rows held by other transfers),
+# so one slow holder cannot stretch every queued transfer's latency
+def bound_lock_wait(cursor, seconds=LOCK_WAIT_TIMEOUT):
+    cursor.execute("SET SESSION innodb_lock_wait_timeout = %s", (int(seconds),))
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+# Process-wide controller shared by every session of this worker
+def get_controller():
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+        return _controller
+
+
+# Overload simulation without a database: `users` clients submit as fast as they can against
+# a write path that serializes on a shared lock (like the Wallets row locks), with and
+# without admission control. python admission.py [seconds] [users]
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    service_time = 0.005
+
+    def simulate(controller):
+        row_lock = threading.Lock()
+        latencies, shed = [], [0]
+        stop = time.monotonic() + duration
+
+        def client(user_id):
+            while time.monotonic() < stop:
+                start = time.monotonic()
+                decision = controller.admit(user_id) if controller else {"accepted": True}
+                if not decision["accepted"]:
+                    shed[0] += 1
+                    time.sleep(min(decision["retry_after"], 0.05))
+                    continue
+                try:
+                    with row_lock:
+                        time.sleep(service_time)
+                finally:
+                    if controller:
+                        controller.release(decision)
+                latencies.append(time.monotonic() - start)
+
+        threads = [threading.Thread(target=client, args=(u,)) for u in range(users)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+        return len(latencies), shed[0], p99
+
+    for label, controller in [("no admission control", None),
+                              ("admission control", AdmissionController(user_rate=5, user_burst=5,
+                                                                        global_rate=150, global_burst=20,
+                                                                        max_in_flight=4))]:
+        accepted, shed, p99 = simulate(controller)
+        print(f"{label:>22}: {accepted:6d} accepted, {shed:6d} shed, accepted p99 {p99 * 1000:7.1f}ms")
@@ -0,0 +1,229 @@
+import database
+import partitions
+
+GENESIS_HASH = '0' * 64
+
+
+# Targets are compared against the leading 64 bits of a block hash (16 hex digits)
+TARGET_BITS = 64
+
+
+# Expected number of hash attempts to find a block at `target`; matches Blocks.work
+def block_work(target):
+    return 2 ** TARGET_BITS // (int(target) + 1)
+
+
+# Proof of work: the hash, read as a number, must not exceed the block's target
+def hash_meets_target(block_hash, target):
+    return int(block_hash[:TARGET_BITS // 4], 16) <= int(target)
+
+
+# Function to read the single-row chain-tip record (height, tip hash and timestamp,
+# target and reward for the next block) instead of aggregating over Blocks
+def get_chain_tip(cursor):
+    cursor.execute("""
+        SELECT tip_block_id, height, tip_hash, tip_timestamp, cumulative_work,
+               current_target, current_reward
+        FROM ChainState
+        WHERE id = 1
+    """)
+    return cursor.fetchone()
+
+
+class ChainStore:
+    # Fork-aware view over Blocks: every block records its height and the cumulative
+    # work of the branch ending at it, ChainTips holds the leaf of every branch and
+    # ChainState points at the active (heaviest) one.
+    def __init__(self, conn=None):
+        self.conn = conn or database.get_db_connection()
+        self.cursor = self.conn.cursor(dictionary=True)
+
+    # Active tip is a single-row primary key lookup on the chain-tip record
+    def get_active_tip(self):
+        self.cursor.execute("""
+            SELECT tip_block_id AS block_id, tip_hash AS block_hash, height, cumulative_work,
+                   tip_timestamp AS timestamp
+            FROM ChainState
+            WHERE id = 1 AND tip_block_id IS NOT NULL
+        """)
+        return self.cursor.fetchone()
+
+    # Heaviest known tip, read from the top of the cumulative_work index
+    def get_best_tip(self):
+        self.cursor.execute("""
+            SELECT block_id, height, cumulative_work
+            FROM ChainTips
+            ORDER BY cumulative_work DESC, block_id ASC
+            LIMIT 1
+        """)
+        return self.cursor.fetchone()
+
+    def get_tips(self):
+        self.cursor.execute("""
+            SELECT t.block_id, t.height, t.cumulative_work, b.block_hash, b.is_active
+            FROM ChainTips t
+            JOIN Blocks b ON b.block_id = t.block_id
+            ORDER BY t.cumulative_work DESC
+        """)
+        return self.cursor.fetchall()
+
+    def _get_block(self, block_id):
+        self.cursor.execute("""
+            SELECT block_id, previous_block_id, height, cumulative_work, is_active,
+                   first_tx_timestamp, last_tx_timestamp
+            FROM Blocks
+            WHERE block_id = %s
+        """, (block_id,))
+        return self.cursor.fetchone()
+
+    # Store a block received from elsewhere. `deltas` maps wallet_id -> balance change the
+    # block carries (e.g. its mining reward); they are only applied while the block is active.
+    # `hash_attempts` and `mining_ms` are the miner's measurements, used for retargeting.
+    def add_block(self, block_hash, previous_block_id, nonce, target, timestamp=None, deltas=None,
+                  hash_attempts=None, mining_ms=None):
+        if not hash_meets_target(block_hash, target):
+            raise ValueError(f"Block hash {block_hash[:16]} does not meet target {int(target):016x}")
+        try:
+            parent = None
+            if previous_block_id is not None:
+                parent = self._get_block(previous_block_id)
+                if not parent:
+                    raise ValueError(f"Unknown parent block #{previous_block_id}")
+
+            height = parent['height'] + 1 if parent else 0
+            work = block_work(target)
+            cumulative_work = (parent['cumulative_work'] if parent else 0) + work
+
+            self.cursor.execute("""
+                INSERT INTO Blocks (block_hash, previous_block_id, timestamp, nonce, target, work,
+                                    hash_attempts, mining_ms, height, cumulative_work, is_active)
+                VALUES (%s, %s, COALESCE(%s, NOW()), %s, %s, %s, %s, %s, %s, %s, FALSE)
+            """, (block_hash, previous_block_id, timestamp, nonce, target, work,
+                  hash_attempts, mining_ms, height, cumulative_work))
+            block_id = self.cursor.lastrowid
+
+            if deltas:
+                self.cursor.executemany("""
+                    INSERT INTO BlockDeltas (block_id, wallet_id, delta) VALUES (%s, %s, %s)
+                """, [(block_id, wallet_id, delta) for wallet_id, delta in deltas.items()])
+
+            # The new block replaces its parent as the tip of that branch
+            if previous_block_id is not None:
+                self.cursor.execute("DELETE FROM ChainTips WHERE block_id = %s", (previous_block_id,))
+            self.cursor.execute("""
+                INSERT INTO ChainTips (block_id, height, cumulative_work) VALUES (%s, %s, %s)
+            """, (block_id, height, cumulative_work))
+
+            active = self.get_active_tip()
+            if active is None:
+                self._switch_tip(None, block_id)
+            elif cumulative_work > active['cumulative_work']:
+                self._switch_tip(active['block_id'], block_id)
+
+            self.conn.commit()
+            return block_id
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    # Make the heaviest tip active; a no-op when it already is
+    def select_best_chain(self):
+        try:
+            best = self.get_best_tip()
+            active = self.get_active_tip()
+            if best and (active is None or best['block_id'] != active['block_id']):
+                self._switch_tip(active['block_id'] if active else None, best['block_id'])
+            self.conn.commit()
+            return best
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    # Walk both branches back to their common ancestor, one parent lookup per block,
+    # so the cost is proportional to the depth of the fork rather than the chain length
+    def find_fork(self, old_tip_id, new_tip_id):
+        reverted, applied = [], []
+        old = self._get_block(old_tip_id) if old_tip_id is not None else None
+        new = self._get_block(new_tip_id)
+
+        while new and (old is None or new['height'] > old['height']):
+            applied.append(new['block_id'])
+            new = self._get_block(new['previous_block_id']) if new['previous_block_id'] else None
+        while old and (new is None or old['height'] > new['height']):
+            reverted.append(old['block_id'])
+            old = self._get_block(old['previous_block_id']) if old['previous_block_id'] else None
+        while old and new and old['block_id'] != new['block_id']:
+            reverted.append(old['block_id'])
+            applied.append(new['block_id'])
+            old = self._get_block(old['previous_block_id']) if old['previous_block_id'] else None
+            new = self._get_block(new['previous_block_id']) if new['previous_block_id'] else None
+
+        fork_point = old['block_id'] if old else None
+        # Blocks are applied from the fork point upwards
+        applied.reverse()
+        return fork_point, reverted, applied
+
+    def _switch_tip(self, old_tip_id, new_tip_id):
+        fork_point, reverted, applied = self.find_fork(old_tip_id, new_tip_id)
+
+        for block_id in reverted:
+            self._apply_deltas(block_id, -1)
+            self.cursor.execute("UPDATE Blocks SET is_active = FALSE WHERE block_id = %s", (block_id,))
+            # User transactions confirmed in an orphaned block go back to the mempool;
+            # their balance effect was taken at submission and stays in place
+            in_block, params = partitions.block_filter(self._get_block(block_id), alias=None)
+            self.cursor.execute(f"""
+                UPDATE Transactions
+                SET block_id = NULL, status = 'pending'
+                WHERE {in_block} AND sender_wallet_id IS NOT NULL
+            """, params)
+
+        for block_id in applied:
+            self._apply_deltas(block_id, 1)
+            self.cursor.execute("UPDATE Blocks SET is_active = TRUE WHERE block_id = %s", (block_id,))
+
+        # Height, hash, timestamp, next target and reward of the new tip, in the same transaction
+        self.cursor.callproc("update_chain_tip", (new_tip_id,))
+        return fork_point, reverted, applied
+
+    def _apply_deltas(self, block_id, sign):
+        self.cursor.execute("""
+            UPDATE Wallets w
+            JOIN BlockDeltas d ON d.wallet_id = w.wallet_id
+            SET w.balance = w.balance + %s * d.delta
+            WHERE d.block_id = %s
+        """, (sign, block_id))
+
+    # Follow previous_block_id links from the active tip down to genesis and check that
+    # every parent exists, heights step by one, every hash meets its target and
+    # cumulative work adds up
+    def verify_active_chain(self):
+        self.cursor.execute("""
+            SELECT block_id, block_hash, previous_block_id, target, work, height, cumulative_work
+            FROM Blocks
+            WHERE is_active = TRUE
+        """)
+        blocks = {b['block_id']: b for b in self.cursor.fetchall()}
+        for block in blocks.values():
+            if block['work'] != block_work(block['target']) or not hash_meets_target(block['block_hash'], block['target']):
+                return False
+        tip = self.get_active_tip()
+        if tip is None:
+            return not blocks
+
+        seen = 0
+        block = blocks.get(tip['block_id'])
+        while block:
+            seen += 1
+            parent_id = block['previous_block_id']
+            if parent_id is None:
+                return (block['height'] == 0
+                        and block['cumulative_work'] == block['work']
+                        and seen == len(blocks))
+            parent = blocks.get(parent_id)
+            if (parent is None
+                    or block['height'] != parent['height'] + 1
+                    or block['cumulative_work'] != parent['cumulative_work'] + block['work']):
+                return False
+            block = parent
+        return False
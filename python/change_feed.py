@@ -0,0 +1,237 @@
+import threading
+from collections import deque
+from itertools import islice
+
+import database
+
+POLL_INTERVAL = 2.0      # Seconds between ticks of the shared poller
+BATCH_LIMIT = 500        # Max new rows taken per table per tick
+BUFFER_SIZE = 5000       # Events kept in memory for subscribers that fall behind
+# Ids are assigned at insert but become visible at commit, so a row can appear below the
+# high-water mark after a later one was read. Ids skipped within this many of the mark are
+# re-read on every tick until they show up (or fall out of the window, e.g. rolled back).
+RESCAN_WINDOW = 2000
+
+KINDS = ('block', 'transaction', 'alert')
+
+# One round trip per tick: each branch is a primary-key range scan above its high-water mark,
+# plus point lookups of the ids still missing below it
+TAIL_QUERY = """
+    (SELECT 'block' AS kind, b.block_id AS id, b.timestamp AS ts,
+            NULL AS user_a, NULL AS user_b, b.block_hash AS text_a, NULL AS text_b, NULL AS text_c,
+            NULL AS amount, b.nonce AS number
+     FROM Blocks b
+     WHERE b.block_id > %s{block}
+     ORDER BY b.block_id LIMIT %s)
+    UNION ALL
+    (SELECT 'transaction', t.transaction_id, t.timestamp,
+            ws.user_id, wr.user_id, t.transaction_hash, s.name, r.name,
+            t.amount, t.block_id
+     FROM Transactions t
+     LEFT JOIN Wallets ws ON t.sender_wallet_id = ws.wallet_id
+     LEFT JOIN Users s ON ws.user_id = s.user_id
+     JOIN Wallets wr ON t.receiver_wallet_id = wr.wallet_id
+     JOIN Users r ON wr.user_id = r.user_id
+     WHERE t.transaction_id > %s{transaction}
+     ORDER BY t.transaction_id LIMIT %s)
+    UNION ALL
+    (SELECT 'alert', a.alert_id, a.created_at,
+            a.user_id, NULL, a.title, a.message, NULL,
+            NULL, NULL
+     FROM Alerts a
+     WHERE a.alert_id > %s{alert}
+     ORDER BY a.alert_id LIMIT %s)
+"""
+
+
+def _to_event(row):
+    kind = row['kind']
+    if kind == 'block':
+        return {'kind': kind, 'block_id': row['id'], 'short_hash': row['text_a'][:8],
+                'timestamp': row['ts'], 'nonce': row['number']}
+    if kind == 'transaction':
+        return {'kind': kind, 'transaction_id': row['id'], 'transaction_hash': row['text_a'],
+                'amount': row['amount'], 'sender': row['text_b'], 'receiver': row['text_c'],
+                'timestamp': row['ts'], 'block_id': row['number'],
+                'sender_user_id': row['user_a'], 'receiver_user_id': row['user_b']}
+    return {'kind': kind, 'alert_id': row['id'], 'user_id': row['user_a'],
+            'title': row['text_a'], 'message': row['text_b'], 'created_at': row['ts']}
+
+
+# TAIL_QUERY with each branch also matching the missing ids of its table, and its parameters
+def _tail_query(high_water, missing):
+    columns = {'block': 'b.block_id', 'transaction': 't.transaction_id', 'alert': 'a.alert_id'}
+    filters, params = {}, []
+    for kind in KINDS:
+        ids = sorted(missing[kind])
+        filters[kind] = f" OR {columns[kind]} IN ({', '.join(['%s'] * len(ids))})" if ids else ""
+        params += [high_water[kind], *ids, BATCH_LIMIT]
+    return TAIL_QUERY.format(**filters), params
+
+
+# Whether an event is visible to a given user (blocks are public)
+def visible_to(event, user_id):
+    if event['kind'] == 'block':
+        return True
+    if event['kind'] == 'transaction':
+        return user_id in (event['sender_user_id'], event['receiver_user_id'])
+    return event['user_id'] == user_id
+
+
+class ChangeFeed:
+    # Tails Blocks, Transactions and Alerts from one background poller per process and
+    # fans the new rows out to any number of subscribers through a shared event buffer.
+    def __init__(self, conn_factory=database.get_db_connection, interval=POLL_INTERVAL):
+        self.conn_factory = conn_factory
+        self.interval = interval
+        self.events = deque(maxlen=BUFFER_SIZE)
+        self.seq = 0
+        self.high_water = None
+        self.missing = {kind: set() for kind in KINDS}  # Unseen ids within RESCAN_WINDOW of the mark
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        conn = None
+        while not self.stop_event.is_set():
+            try:
+                if conn is None:
+                    conn = self.conn_factory()
+                    conn.autocommit = True
+                self.poll_once(conn)
+            except Exception:
+                # Drop the connection and retry on the next tick
+                try:
+                    if conn is not None:
+                        conn.close()
+                except Exception:
+                    pass
+                conn = None
+            self.stop_event.wait(self.interval)
+
+    # Start tailing from the current end of each table so history is not replayed; ids within
+    # the window that are not committed yet are watched like any later gap
+    def _init_high_water(self, cursor):
+        cursor.execute("""
+            SELECT (SELECT COALESCE(MAX(block_id), 0) FROM Blocks) AS block,
+                   (SELECT COALESCE(MAX(transaction_id), 0) FROM Transactions) AS `transaction`,
+                   (SELECT COALESCE(MAX(alert_id), 0) FROM Alerts) AS alert
+        """)
+        high_water = cursor.fetchone()
+        for kind, table, column in (('block', 'Blocks', 'block_id'), ('transaction', 'Transactions', 'transaction_id'),
+                                    ('alert', 'Alerts', 'alert_id')):
+            cursor.execute(f"SELECT {column} AS id FROM {table} WHERE {column} > %s",
+                           (high_water[kind] - RESCAN_WINDOW,))
+            present = {row['id'] for row in cursor.fetchall()}
+            self.missing[kind] = set(range(max(1, high_water[kind] - RESCAN_WINDOW + 1), high_water[kind] + 1)) - present
+        self.high_water = high_water
+
+    # Advance one table's high-water mark past `ids` (rows just read), remembering the ids
+    # skipped on the way and forgetting those that fell out of the window
+    def _advance(self, kind, ids):
+        missing = self.missing[kind]
+        missing -= ids
+        top = max(ids, default=0)
+        if top > self.high_water[kind]:
+            missing |= set(range(self.high_water[kind] + 1, top)) - ids
+            self.high_water[kind] = top
+        self.missing[kind] = {i for i in missing if i > self.high_water[kind] - RESCAN_WINDOW}
+
+    def poll_once(self, conn):
+        cursor = conn.cursor(dictionary=True)
+        if self.high_water is None:
+            self._init_high_water(cursor)
+            return []
+
+        cursor.execute(*_tail_query(self.high_water, self.missing))
+        rows = cursor.fetchall()
+        new_events, read = [], {kind: set() for kind in KINDS}
+        for row in sorted(rows, key=lambda r: (r['kind'], r['id'])):
+            # A row is new if it is above the mark or one of the missing ids below it
+            if row['id'] in read[row['kind']] or (row['id'] <= self.high_water[row['kind']]
+                                                  and row['id'] not in self.missing[row['kind']]):
+                continue
+            read[row['kind']].add(row['id'])
+            new_events.append(_to_event(row))
+        for kind in KINDS:
+            self._advance(kind, read[kind])
+
+        with self.lock:
+            for event in new_events:
+                self.seq += 1
+                self.events.append((self.seq, event))
+            listeners = list(self.listeners)
+        if new_events:
+            for listener in listeners:
+                listener(new_events)
+        return new_events
+
+    # Call `listener(events)` from the poller thread with each non-empty batch
+    def add_listener(self, listener):
+        with self.lock:
+            self.listeners.append(listener)
+
+    def subscribe(self, user_id=None):
+        self.start()
+        return Subscription(self, user_id)
+
+    # Events after `seq`; also returns the new position
+    def since(self, seq):
+        with self.lock:
+            latest = self.seq
+            if seq >= latest:
+                return [], latest
+            # Sequence numbers are contiguous, so skip straight to the first unseen event
+            skip = max(0, seq - self.events[0][0] + 1) if self.events else 0
+            return [event for _, event in islice(self.events, skip, None)], latest
+
+
+class Subscription:
+    # A session's cursor into the shared feed; polling it never touches the database
+    def __init__(self, feed, user_id=None):
+        self.feed = feed
+        self.user_id = user_id
+        self.position = feed.seq
+
+    def poll(self, kinds=None):
+        events, self.position = self.feed.since(self.position)
+        return [e for e in events
+                if (kinds is None or e['kind'] in kinds)
+                and (self.user_id is None or visible_to(e, self.user_id))]
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+# Process-wide feed shared by every Streamlit session
+def get_feed():
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = ChangeFeed()
+        return _feed
+
+
+# Merge new rows into a newest-first list keyed by `key`, keeping at most `limit` rows
+def merge_recent(rows, new_rows, key, limit, sort_key=None):
+    seen = {row[key] for row in rows}
+    merged = [row for row in reversed(new_rows) if row[key] not in seen] + list(rows)
+    if sort_key:
+        merged.sort(key=lambda row: row[sort_key], reverse=True)
+    return merged[:limit]
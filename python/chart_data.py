@@ -0,0 +1,133 @@
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# Time series are aggregated in SQL into day, week or month buckets (the finest that keeps
+# the selected range under MAX_BUCKETS rows), then thinned with LTTB to at most MAX_POINTS
+# before a figure is built, so the figure size no longer grows with the account's history.
+MAX_BUCKETS = 1000
+MAX_POINTS = 400
+
+# Bucket -> (approximate days per bucket, SQL expression for the bucket's first day)
+BUCKETS = {
+    "day": (1, "DATE({col})"),
+    "week": (7, "DATE_SUB(DATE({col}), INTERVAL WEEKDAY({col}) DAY)"),
+    "month": (30.44, "MAKEDATE(YEAR({col}), 1) + INTERVAL (MONTH({col}) - 1) MONTH"),
+}
+BUCKET_LABELS = {"day": "Daily", "week": "Weekly", "month": "Monthly"}
+
+# Date-range choices offered with the charts (None: the whole history)
+RANGES = {"Last 30 days": 30, "Last 90 days": 90, "Last year": 365, "All time": None}
+
+
+# Finest bucket that keeps [start, end) within max_buckets rows
+def choose_bucket(start, end, max_buckets=MAX_BUCKETS):
+    days = max(1, (end - start).days)
+    for name, (bucket_days, _) in BUCKETS.items():
+        if days / bucket_days <= max_buckets:
+            return name
+    return "month"
+
+
+# Start of the range for a RANGES choice; `first` is the earliest timestamp in the data
+def range_start(choice, end, first=None):
+    days = RANGES[choice]
+    if days is not None:
+        return end - timedelta(days=days)
+    return first if first is not None else end - timedelta(days=1)
+
+
+# Aggregate `value_expr` per bucket over [start, end). `from_where` is the FROM ... WHERE ...
+# part of the query (with its own params); the range filter on timestamp_column is appended.
+# Returns the bucket name and [(bucket first day, value), ...] in date order.
+def bucketed_series(cursor, value_expr, from_where, params, timestamp_column, start, end,
+                    max_buckets=MAX_BUCKETS):
+    bucket = choose_bucket(start, end, max_buckets)
+    bucket_expr = BUCKETS[bucket][1].format(col=timestamp_column)
+    cursor.execute(f"""
+        SELECT {bucket_expr} AS bucket, {value_expr} AS value
+        {from_where}
+          AND {timestamp_column} >= %s AND {timestamp_column} < %s
+        GROUP BY bucket
+        ORDER BY bucket
+    """, list(params) + [start, end])
+    rows = cursor.fetchall()
+    if rows and isinstance(rows[0], dict):
+        rows = [(row['bucket'], row['value']) for row in rows]
+    return bucket, rows
+
+
+# Largest-Triangle-Three-Buckets: indices of `n` points that keep the visual shape of the
+# series (first and last always kept; from each bucket between them, the point forming the
+# largest triangle with the previous pick and the next bucket's mean)
+def lttb(x, y, n):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    picked = np.empty(n, dtype=np.int64)
+    picked[0], picked[-1] = 0, size - 1
+    previous = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else size
+        mean_x = x[next_lo:next_hi].mean()
+        mean_y = y[next_lo:next_hi].mean()
+        px, py = x[previous], y[previous]
+        area = np.abs((px - mean_x) * (y[lo:hi] - py) - (px - x[lo:hi]) * (mean_y - py))
+        previous = lo + int(np.argmax(area))
+        picked[i + 1] = previous
+    return picked
+
+
+def _as_number(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).timestamp()
+    return float(value)
+
+
+# Thin [(x, y), ...] to at most max_points with LTTB; returns (xs, ys) lists
+def downsample(points, max_points=MAX_POINTS):
+    if not points:
+        return [], []
+    xs = [p[0] for p in points]
+    ys = [float(p[1] or 0) for p in points]
+    keep = lttb([_as_number(v) for v in xs], ys, max_points)
+    return [xs[i] for i in keep], [ys[i] for i in keep]
+
+
+# Figure payload with and without the data layer for a synthetic daily series:
+# python chart_data.py [years]
+if __name__ == "__main__":
+    import plotly.graph_objects as go
+
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rng = np.random.default_rng(0)
+    end = datetime(2026, 1, 1)
+    days = [end - timedelta(days=d) for d in range(years * 365, 0, -1)]
+    values = np.cumsum(rng.normal(0, 10, len(days))) + rng.normal(0, 50, len(days)) * (rng.random(len(days)) < 0.01)
+
+    def payload(xs, ys):
+        started = time.perf_counter()
+        size = len(go.Figure(go.Scatter(x=xs, y=ys, mode="lines")).to_json())
+        return size, time.perf_counter() - started
+
+    size, elapsed = payload(days, values.tolist())
+    print(f"every day:     {len(days):6d} points, {size / 1024:8.1f} KiB figure JSON, {elapsed * 1000:6.1f}ms")
+
+    bucket = choose_bucket(days[0], end)
+    started = time.perf_counter()
+    xs, ys = downsample(list(zip(days, values)))
+    thinned = time.perf_counter() - started
+    size, elapsed = payload(xs, ys)
+    print(f"LTTB to {MAX_POINTS}:    {len(xs):6d} points, {size / 1024:8.1f} KiB figure JSON, "
+          f"{(elapsed + thinned) * 1000:6.1f}ms (LTTB {thinned * 1000:.1f}ms)")
+    print(f"SQL bucket for {years} years: {bucket} "
+          f"({(end - days[0]).days / BUCKETS[bucket][0]:.0f} rows, limit {MAX_BUCKETS})")
@@ -0,0 +1,152 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+# Amounts travel as fixed-point integers with the DECIMAL(20,8) scale, so they stay exact
+# in int64 arrays (amounts up to about 92 billion)
+SCALE_DIGITS = 8
+SCALE = 10 ** SCALE_DIGITS
+
+CHUNK_SIZE = 10000
+
+# Column kind -> how the server sends it. Numbers arrive as plain integers rather than
+# Decimal / datetime objects: "int" and "fixed" decode into int64 arrays, "datetime"
+# into datetime64[s] and "str" into object arrays.
+KINDS = {
+    "int": "COALESCE({expr}, 0)",
+    "fixed": f"CAST(COALESCE({{expr}}, 0) * {SCALE} AS SIGNED)",
+    # Wall-clock seconds since 1970-01-01, matching the naive datetimes the pages display
+    "datetime": "TIMESTAMPDIFF(SECOND, '1970-01-01', {expr})",
+    "str": "{expr}",
+}
+
+
+# SELECT list for [(name, sql expression, kind), ...]
+def select_list(columns):
+    return ", ".join(f"{KINDS[kind].format(expr=expr)} AS {name}" for name, expr, kind in columns)
+
+
+# NULL datetimes travel as the int64 value NumPy reserves for NaT, so they decode as missing
+NAT_SECONDS = np.iinfo(np.int64).min
+
+
+def _decode(values, kind):
+    if kind == "datetime":
+        return np.array([NAT_SECONDS if v is None else v for v in values], dtype=np.int64).astype("datetime64[s]")
+    if kind == "str":
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    return np.fromiter(values, dtype=np.int64, count=len(values))
+
+
+# Run `SELECT <columns> <tail>` and yield each chunk of rows as {name: array}.
+# Rows are read as tuples and transposed once per chunk; no per-row dict is built.
+def iter_chunks(conn, columns, tail, params=(), chunk_size=CHUNK_SIZE):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {select_list(columns)} {tail}", tuple(params))
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            transposed = list(zip(*rows))
+            yield {name: _decode(transposed[i], kind) for i, (name, _, kind) in enumerate(columns)}
+    finally:
+        cursor.close()
+
+
+# Whole result set as {name: array}, decoded chunk by chunk
+def fetch_columns(conn, columns, tail, params=(), chunk_size=CHUNK_SIZE):
+    chunks = list(iter_chunks(conn, columns, tail, params, chunk_size))
+    if not chunks:
+        return {name: _decode((), kind) for name, _, kind in columns}
+    if len(chunks) == 1:
+        return chunks[0]
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name, _, _ in columns}
+
+
+def num_rows(columns):
+    return len(next(iter(columns.values()))) if columns else 0
+
+
+def to_decimal(fixed):
+    return Decimal(int(fixed)).scaleb(-SCALE_DIGITS)
+
+
+def to_float(fixed):
+    return np.asarray(fixed, dtype=np.int64) / SCALE
+
+
+# Exact sum of a fixed-point column, optionally where `mask` is true
+def sum_fixed(values, mask=None):
+    return to_decimal(values.sum() if mask is None else values[mask].sum())
+
+
+# Exact per-key sums of a fixed-point column: {key: Decimal}
+def group_sum(keys, values):
+    if len(keys) == 0:
+        return {}
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    sums = np.zeros(len(uniques), dtype=np.int64)
+    np.add.at(sums, inverse, values)
+    return {key: to_decimal(total) for key, total in zip(uniques.tolist(), sums)}
+
+
+# DataFrame for display; fixed-point columns become floats
+def to_frame(columns, fixed=()):
+    return pd.DataFrame({name: to_float(values) if name in fixed else values
+                         for name, values in columns.items()})
+
+
+# Compare against the dict-per-row path on synthetic rows: python columnar.py [rows]
+if __name__ == "__main__":
+    import sys
+    import time
+    import tracemalloc
+    from datetime import datetime, timedelta
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    base = datetime(2024, 1, 1)
+    names = ("transaction_id", "amount", "sender", "timestamp", "type")
+
+    def measure(label, build):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = build()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:>10}: {seconds:.2f}s, peak {peak / 1e6:.1f} MB")
+        return result
+
+    # What the connector hands back for each path
+    def dict_rows():
+        return [dict(zip(names, (i, Decimal(i % 1000) / 7, f"user{i % 50}",
+                                 base + timedelta(seconds=i), "Sent" if i % 3 else "Received")))
+                for i in range(count)]
+
+    # fetchmany() page of tuples
+    def tuple_rows(start, stop):
+        return [(i, (i % 1000) * SCALE // 7, f"user{i % 50}", 1704067200 + i, "Sent" if i % 3 else "Received")
+                for i in range(start, stop)]
+
+    def dict_path():
+        rows = dict_rows()
+        frame = pd.DataFrame(rows)
+        sent = sum([row['amount'] for row in rows if row['type'] == 'Sent'])
+        return frame, sent
+
+    def columnar_path():
+        kinds = ("int", "fixed", "str", "datetime", "str")
+        chunks = []
+        for start in range(0, count, CHUNK_SIZE):
+            transposed = list(zip(*tuple_rows(start, min(count, start + CHUNK_SIZE))))
+            chunks.append({name: _decode(transposed[i], kind) for i, (name, kind) in enumerate(zip(names, kinds))})
+        columns = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in names}
+        return to_frame(columns, fixed=("amount",)), group_sum(columns["type"], columns["amount"]).get("Sent")
+
+    print(f"{count} rows")
+    measure("dict rows", dict_path)
+    measure("columnar", columnar_path)
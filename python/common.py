@@ -0,0 +1,145 @@
+import base64
+import functools
+from datetime import datetime
+
+import streamlit as st
+
+import database
+import session_store
+from accounts import hash_password, is_valid_email
+
+# Apply custom CSS
+CSS = """
+<style>
+    .main {
+        background-color: black;
+    }
+    .block-container {
+        padding-top: 1rem;
+        padding-bottom: 1rem;
+    }
+    .stButton>button {
+        background-color: white;
+        color: black;
+        border-radius: 8px;
+        border: none;
+        padding: 0.5rem 1rem;
+        font-weight: bold;
+    }
+    .stButton>button:hover {
+        background-color: #00FFFF;
+        color : black;
+    }
+    .card {
+        background-color: #00FFFF;
+        color : black;
+        border-radius: 10px;
+        padding: 1.5rem;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        margin-bottom: 1rem;
+    }
+    .metric-value {
+        font-size: 2rem;
+        font-weight: bold;
+        color: #333;
+    }
+    .metric-label {
+        color: #666;
+        font-size: 0.9rem;
+    }
+    .hash-text {
+        font-family: monospace;
+        overflow-wrap: break-word;
+    }
+    .footer {
+        text-align: center;
+        padding: 1rem;
+        font-size: 0.8rem;
+        color: black;
+    }
+</style>
+"""
+
+SIDEBAR_STATS_TTL = 30  # Seconds between sidebar statistics refreshes
+
+
+# st.fragment whose reruns also write the shared session keys back (app.py saves them only at
+# the end of a full run). A fragment without run_every reruns on user interaction, which is
+# activity and slides the idle expiry; a timed refresh only saves what changed.
+def fragment(func=None, *, run_every=None):
+    def decorate(func):
+        @functools.wraps(func)
+        def body(*args, **kwargs):
+            if run_every is None:
+                st.session_state.last_activity = datetime.now()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                session_store.save(st.session_state, touch=run_every is None)
+        return st.fragment(body, run_every=run_every)
+    return decorate(func) if func is not None else decorate
+
+
+# Per-session primary connection, reused across reruns and fragment reruns
+def get_connection():
+    return database.get_router().primary(st.session_state)
+
+
+# Cursor for a read-only page route; served by a replica unless this session's last
+# write has not reached it yet
+def read_cursor(route):
+    return database.get_router().read_cursor(route, st.session_state)
+
+
+def read_connection(route):
+    return database.get_router().read_connection(route, st.session_state)[1]
+
+
+# Call after committing a write so this session keeps reading its own writes
+def record_write():
+    database.get_router().record_write(st.session_state)
+
+
+# Function to export transactions to CSV
+def get_download_link(df, filename, text):
+    csv = df.to_csv(index=False)
+    b64 = base64.b64encode(csv.encode()).decode()
+    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">{text}</a>'
+    return href
+
+
+# Function to get blockchain statistics (shared by every session for SIDEBAR_STATS_TTL seconds)
+@st.cache_data(ttl=SIDEBAR_STATS_TTL, show_spinner=False)
+def get_blockchain_stats():
+    cursor = read_cursor("sidebar_stats")
+    # Blocks on the active chain, from the chain-tip record
+    cursor.execute("SELECT COALESCE(height + 1, 0) as block_count FROM ChainState WHERE id = 1")
+    block_count = cursor.fetchone()['block_count']
+    
+    cursor.execute("SELECT COUNT(*) as tx_count FROM Transactions")
+    tx_count = cursor.fetchone()['tx_count']
+    
+    cursor.execute("SELECT COUNT(*) as user_count FROM Users")
+    user_count = cursor.fetchone()['user_count']
+    
+    cursor.execute("SELECT SUM(amount) as volume FROM Transactions")
+    result = cursor.fetchone()
+    volume = result['volume'] if result['volume'] else 0
+    
+    return {
+        "blocks": block_count,
+        "transactions": tx_count,
+        "users": user_count,
+        "volume": volume
+    }
+
+
+# Sidebar statistics refresh on their own timer without rerunning the page
+@fragment(run_every=SIDEBAR_STATS_TTL)
+def sidebar_stats():
+    stats = get_blockchain_stats()
+    st.markdown("### Network Statistics")
+    st.markdown(f"**Blocks:** {stats['blocks']}")
+    st.markdown(f"**Transactions:** {stats['transactions']}")
+    st.markdown(f"**Total Users:** {stats['users']}")
+    st.markdown(f"**Transaction Volume:** ${stats['volume']:,.2f}")
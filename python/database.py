@@ -1,9 +1,176 @@
+import os
+import time
+import threading
+import itertools
+from collections import defaultdict, deque
+
 import mysql.connector
 
+PRIMARY_CONFIG = {
+    "host": os.environ.get("DB_HOST", "localhost"),
+    "port": int(os.environ.get("DB_PORT", "3306")),
+    "user": os.environ.get("DB_USER", "root"),
+    "password": os.environ.get("DB_PASSWORD", ""),
+    "database": os.environ.get("DB_NAME", "project_db"),
+}
+
+# Read replicas as "host:port[/database],..."; empty means every read goes to the primary
+REPLICAS = os.environ.get("DB_REPLICAS", "")
+
+# Pages whose reads may be served by a replica
+READ_ROUTES = {"home", "block_explorer", "sidebar_stats", "dashboard_analytics"}
+
+# Without GTIDs, keep a session on the primary this long after its last write
+READ_AFTER_WRITE_WINDOW = 5.0
+LATENCY_SAMPLES = 1000
+
+
 def get_db_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="",
-        database="project_db"
-    )
+    return mysql.connector.connect(**PRIMARY_CONFIG)
+
+
+def replica_configs():
+    configs = []
+    for entry in filter(None, (e.strip() for e in REPLICAS.split(","))):
+        address, _, name = entry.partition("/")
+        host, _, port = address.partition(":")
+        configs.append(dict(PRIMARY_CONFIG, host=host, port=int(port or 3306),
+                            database=name or PRIMARY_CONFIG["database"]))
+    return configs
+
+
+class GtidTopology:
+    # Write positions are the primary's executed GTID set; a replica has caught up
+    # once that set is a subset of its own. Falls back to a time window without GTIDs.
+    def position(self, primary_conn):
+        cursor = primary_conn.cursor()
+        cursor.execute("SELECT @@GLOBAL.gtid_executed")
+        gtids = cursor.fetchone()[0]
+        return ("gtid", gtids) if gtids else ("time", time.time())
+
+    def caught_up(self, replica_conn, position):
+        kind, value = position
+        if kind == "time":
+            return time.time() - value > READ_AFTER_WRITE_WINDOW
+        cursor = replica_conn.cursor()
+        cursor.execute("SELECT GTID_SUBSET(%s, @@GLOBAL.gtid_executed)", (value,))
+        return bool(cursor.fetchone()[0])
+
+
+class RouteMetrics:
+    # Latency samples per (route, target), e.g. ("home", "replica-0")
+    def __init__(self):
+        self.samples = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+        self.counts = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, route, target, seconds):
+        with self.lock:
+            self.samples[(route, target)].append(seconds)
+            self.counts[(route, target)] += 1
+
+    def snapshot(self):
+        with self.lock:
+            items = [(key, sorted(values), self.counts[key]) for key, values in self.samples.items()]
+        result = {}
+        for (route, target), values, count in items:
+            result.setdefault(route, {})[target] = {
+                "count": count,
+                "p50_ms": values[len(values) // 2] * 1000,
+                "p99_ms": values[min(len(values) - 1, int(len(values) * 0.99))] * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+        return result
+
+
+class TimedCursor:
+    # Buffered dictionary cursor that records each statement's latency under its route
+    def __init__(self, cursor, metrics, route, target):
+        self.cursor = cursor
+        self.metrics = metrics
+        self.route = route
+        self.target = target
+
+    def execute(self, query, params=()):
+        start = time.perf_counter()
+        try:
+            return self.cursor.execute(query, params)
+        finally:
+            self.metrics.record(self.route, self.target, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+class Router:
+    # Sends writes, and reads issued right after the session's own write, to the primary;
+    # reads from READ_ROUTES go round-robin to replicas once they have that write.
+    # Connections are cached per session in the session dict (e.g. st.session_state).
+    def __init__(self, primary_factory=get_db_connection, replica_factories=None, topology=None,
+                 read_routes=READ_ROUTES):
+        self.primary_factory = primary_factory
+        if replica_factories is None:
+            replica_factories = [lambda config=config: mysql.connector.connect(**config)
+                                 for config in replica_configs()]
+        self.replica_factories = replica_factories
+        self.topology = topology or GtidTopology()
+        self.read_routes = read_routes
+        self.metrics = RouteMetrics()
+        self._next_replica = itertools.count()
+
+    def _connection(self, session, target, factory):
+        conns = session.setdefault("db_conns", {})
+        conn = conns.get(target)
+        if conn is None or not conn.is_connected():
+            conn = factory()
+            # Autocommit keeps a long-lived connection from reading a stale snapshot
+            conn.autocommit = True
+            conns[target] = conn
+        return conn
+
+    def primary(self, session):
+        return self._connection(session, "primary", self.primary_factory)
+
+    # Pick the connection for a read on `route`, returning (target name, connection)
+    def read_connection(self, route, session):
+        if route not in self.read_routes or not self.replica_factories:
+            return "primary", self.primary(session)
+
+        index = next(self._next_replica) % len(self.replica_factories)
+        target = f"replica-{index}"
+        replica = self._connection(session, target, self.replica_factories[index])
+
+        position = session.get("last_write_position")
+        if position is not None and target not in session["write_seen_by"]:
+            if not self.topology.caught_up(replica, position):
+                return "primary", self.primary(session)
+            # Each replica is checked only until it has applied the write
+            session["write_seen_by"].add(target)
+            if len(session["write_seen_by"]) == len(self.replica_factories):
+                session["last_write_position"] = None
+        return target, replica
+
+    # Remember where the primary was after this session's latest committed write
+    def record_write(self, session):
+        if self.replica_factories:
+            session["last_write_position"] = self.topology.position(self.primary(session))
+            session["write_seen_by"] = set()
+
+    # Cursor for reads on `route`; rows are fetched during execute so the recorded
+    # latency covers the full round trip
+    def read_cursor(self, route, session):
+        target, conn = self.read_connection(route, session)
+        return TimedCursor(conn.cursor(dictionary=True, buffered=True), self.metrics, route, target)
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+# Process-wide router built from DB_REPLICAS
+def get_router():
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = Router()
+        return _router
@@ -0,0 +1,93 @@
+import sys
+import time
+
+import database
+
+BATCH_SIZE = 10000   # Transactions per backfill statement and database transaction
+
+LEDGER_COLUMNS = """wallet_id, timestamp, transaction_id, direction, amount, fee,
+                    counterparty_wallet_id, counterparty_user_id"""
+
+# The legs the after_transaction_insert_ledger trigger writes, for a range of existing
+# transactions (fraud.reject_hold removes the legs of a rejected transfer). INSERT IGNORE skips legs already present, so a backfill can overlap live
+# inserts or be rerun after an interruption.
+DEBIT_LEGS = f"""
+    INSERT IGNORE INTO WalletLedger ({LEDGER_COLUMNS})
+    SELECT t.sender_wallet_id, t.timestamp, t.transaction_id, 'debit', -t.amount, COALESCE(t.fee, 0),
+           t.receiver_wallet_id, wr.user_id
+    FROM Transactions t
+    LEFT JOIN Wallets wr ON wr.wallet_id = t.receiver_wallet_id
+    WHERE t.transaction_id > %s AND t.transaction_id <= %s AND t.sender_wallet_id IS NOT NULL
+      AND t.status <> 'rejected'
+"""
+CREDIT_LEGS = f"""
+    INSERT IGNORE INTO WalletLedger ({LEDGER_COLUMNS})
+    SELECT t.receiver_wallet_id, t.timestamp, t.transaction_id, 'credit', t.amount, 0,
+           t.sender_wallet_id, ws.user_id
+    FROM Transactions t
+    LEFT JOIN Wallets ws ON ws.wallet_id = t.sender_wallet_id
+    WHERE t.transaction_id > %s AND t.transaction_id <= %s AND t.status <> 'rejected'
+"""
+
+
+# Fill WalletLedger from Transactions in transaction_id batches, one commit per batch so
+# row locks are held briefly. Returns the number of legs inserted.
+def backfill(conn, batch_size=BATCH_SIZE, progress=None):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM Transactions")
+    last_id = cursor.fetchone()[0]
+
+    inserted, start = 0, 0
+    while start < last_id:
+        end = min(start + batch_size, last_id)
+        if not conn.in_transaction:
+            conn.start_transaction()
+        try:
+            for statement in (DEBIT_LEGS, CREDIT_LEGS):
+                cursor.execute(statement, (start, end))
+                inserted += cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        start = end
+        if progress:
+            progress(end, last_id, inserted)
+    return inserted
+
+
+# Wallets whose ledger disagrees with Transactions (leg count or net amount); empty when
+# the ledger is complete
+def verify(conn):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT wallet_id, SUM(legs) AS legs, SUM(net) AS net
+        FROM (
+            SELECT sender_wallet_id AS wallet_id, COUNT(*) AS legs, -SUM(amount) AS net
+            FROM Transactions WHERE sender_wallet_id IS NOT NULL AND status <> 'rejected' GROUP BY sender_wallet_id
+            UNION ALL
+            SELECT receiver_wallet_id, COUNT(*), SUM(amount)
+            FROM Transactions WHERE status <> 'rejected' GROUP BY receiver_wallet_id
+        ) expected
+        GROUP BY wallet_id
+    """)
+    expected = {row['wallet_id']: (row['legs'], row['net']) for row in cursor.fetchall()}
+    cursor.execute("SELECT wallet_id, COUNT(*) AS legs, SUM(amount) AS net FROM WalletLedger GROUP BY wallet_id")
+    actual = {row['wallet_id']: (row['legs'], row['net']) for row in cursor.fetchall()}
+    return sorted(w for w in set(expected) | set(actual) if expected.get(w) != actual.get(w))
+
+
+# Backfill then verify: python ledger.py [batch_size]
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else BATCH_SIZE
+    conn = database.get_db_connection()
+    started = time.perf_counter()
+    total = backfill(conn, batch_size,
+                     progress=lambda done, last, n: print(f"  through transaction #{done} of #{last}: {n} legs", flush=True))
+    print(f"Inserted {total} ledger legs in {time.perf_counter() - started:.1f}s")
+    mismatched = verify(conn)
+    conn.close()
+    if mismatched:
+        print(f"{len(mismatched)} wallets disagree with Transactions, e.g. {mismatched[:10]}")
+        sys.exit(1)
+    print("Ledger matches Transactions for every wallet")
@@ -0,0 +1,202 @@
+import os
+import sys
+import time
+import logging
+import threading
+from collections import deque
+
+import database
+import partitions
+
+# Mine as soon as any one of these is reached
+MAX_PENDING_COUNT = int(os.environ.get("MINER_MAX_PENDING", "10"))             # Pending transactions
+MAX_PENDING_BYTES = int(os.environ.get("MINER_MAX_PENDING_BYTES", "16384"))    # Approximate mempool size
+MAX_PENDING_AGE = float(os.environ.get("MINER_MAX_PENDING_AGE", "60"))         # Seconds the oldest has waited
+
+# User whose wallet receives the block rewards; the daemon does not run without one
+MINER_USER_ID = os.environ.get("MINER_USER_ID")
+
+POLL_INTERVAL = 2.0       # Seconds between mempool checks
+MAX_BLOCKS_PER_TICK = 20  # Blocks mined back to back before the lock is released
+LOCK_NAME = "dtvs_miner"  # MySQL named lock held while mining, one miner across all processes
+LATENCY_SAMPLES = 5000
+
+log = logging.getLogger(__name__)
+
+# Fixed-width columns of a transaction row (ids, amount, fee, nonce, timestamps)
+TX_OVERHEAD_BYTES = 64
+
+PENDING_QUERY = f"""
+    SELECT COUNT(*) AS pending,
+           COALESCE(SUM({TX_OVERHEAD_BYTES} + LENGTH(transaction_hash)
+                        + COALESCE(LENGTH(memo), 0) + COALESCE(LENGTH(signature), 0)), 0) AS pending_bytes,
+           TIMESTAMPDIFF(SECOND, MIN(timestamp), NOW()) AS oldest_age
+    FROM Transactions
+    WHERE block_id IS NULL AND status = 'pending'
+"""
+
+
+class LatencyStats:
+    # Submit-to-confirm latency of the transactions confirmed by this miner
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+        self.confirmed = 0
+        self.blocks = {}
+        self.lock = threading.Lock()
+
+    def record_block(self, reason, latencies):
+        with self.lock:
+            self.samples.extend(latencies)
+            self.confirmed += len(latencies)
+            self.blocks[reason] = self.blocks.get(reason, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            values = sorted(self.samples)
+            result = {"blocks": dict(self.blocks), "confirmed": self.confirmed}
+        if values:
+            result.update({
+                "p50_s": values[len(values) // 2],
+                "p99_s": values[min(len(values) - 1, int(len(values) * 0.99))],
+                "max_s": values[-1],
+            })
+        return result
+
+
+# Which threshold, if any, the mempool has crossed
+def mining_reason(pending, max_count=MAX_PENDING_COUNT, max_bytes=MAX_PENDING_BYTES, max_age=MAX_PENDING_AGE):
+    if not pending or not pending['pending']:
+        return None
+    if pending['pending'] >= max_count:
+        return "count"
+    if pending['pending_bytes'] >= max_bytes:
+        return "bytes"
+    if pending['oldest_age'] is not None and pending['oldest_age'] >= max_age:
+        return "age"
+    return None
+
+
+class MiningDaemon:
+    # Watches the mempool (transactions with block_id IS NULL) and mines a block, paying the
+    # reward to miner_user_id, whenever it is deep enough or its oldest entry is too old.
+    # Safe to run in several processes: only the holder of the named lock mines.
+    def __init__(self, miner_user_id, conn_factory=database.get_db_connection, interval=POLL_INTERVAL,
+                 max_count=MAX_PENDING_COUNT, max_bytes=MAX_PENDING_BYTES, max_age=MAX_PENDING_AGE):
+        self.miner_user_id = int(miner_user_id)
+        self.conn_factory = conn_factory
+        self.interval = interval
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.latency = LatencyStats()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="mining-daemon", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        conn = None
+        while not self.stop_event.is_set():
+            try:
+                if conn is None:
+                    conn = self.conn_factory()
+                    conn.autocommit = True
+                self.tick(conn)
+            except Exception:
+                log.exception("Mining tick failed")
+                # Drop the connection (which also frees the named lock) and retry on the next tick
+                try:
+                    if conn is not None:
+                        conn.close()
+                except Exception:
+                    pass
+                conn = None
+            self.stop_event.wait(self.interval)
+
+    def pending_stats(self, cursor):
+        cursor.execute(PENDING_QUERY)
+        return cursor.fetchone()
+
+    # Check the mempool and mine until it is back under every threshold; returns the
+    # (block_id, reason) of each block mined, or None when another miner holds the lock
+    def tick(self, conn):
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (LOCK_NAME,))
+        if not cursor.fetchone()['acquired']:
+            return None
+        try:
+            mined = []
+            while len(mined) < MAX_BLOCKS_PER_TICK and not self.stop_event.is_set():
+                reason = mining_reason(self.pending_stats(cursor), self.max_count, self.max_bytes, self.max_age)
+                if reason is None:
+                    break
+                mined.append((self.mine(conn), reason))
+                self.latency.record_block(reason, self._confirm_latencies(cursor, mined[-1][0]))
+            return mined
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s) AS released", (LOCK_NAME,))
+            cursor.fetchone()
+
+    # Mine a block and pay its reward in one transaction, so a block is never committed
+    # without its reward
+    def mine(self, conn):
+        cursor = conn.cursor(dictionary=True)
+        try:
+            conn.start_transaction()
+            cursor.callproc("mine_block", (None,))
+            cursor.callproc("distribute_mining_reward", (self.miner_user_id,))
+            cursor.execute("SELECT tip_block_id FROM ChainState WHERE id = 1")
+            block_id = cursor.fetchone()['tip_block_id']
+            conn.commit()
+            return block_id
+        except Exception:
+            conn.rollback()
+            raise
+
+    # Seconds from submission to confirmation for the user transactions in a block
+    def _confirm_latencies(self, cursor, block_id):
+        in_block, params = partitions.block_filter(partitions.block_bounds(cursor, block_id), alias=None)
+        cursor.execute(f"""
+            SELECT TIMESTAMPDIFF(MICROSECOND, timestamp, NOW(6)) / 1000000 AS seconds
+            FROM Transactions
+            WHERE {in_block} AND sender_wallet_id IS NOT NULL
+        """, params)
+        return [float(row['seconds']) for row in cursor.fetchall()]
+
+
+_daemon = None
+_daemon_lock = threading.Lock()
+
+
+# Process-wide daemon for MINER_USER_ID, or None when no miner account is configured
+def get_daemon():
+    global _daemon
+    with _daemon_lock:
+        if _daemon is None and MINER_USER_ID:
+            _daemon = MiningDaemon(MINER_USER_ID)
+        return _daemon
+
+
+# Run the daemon on its own: python miner.py <miner_user_id>
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    daemon = MiningDaemon(sys.argv[1] if len(sys.argv) > 1 else MINER_USER_ID)
+    daemon.start()
+    try:
+        while True:
+            time.sleep(30)
+            print(daemon.latency.snapshot(), flush=True)
+    except KeyboardInterrupt:
+        daemon.stop()
@@ -0,0 +1,361 @@
+import os
+import sys
+import time
+import logging
+import statistics
+from datetime import date, datetime, timedelta
+
+import database
+
+# Transactions is partitioned by month of timestamp (RANGE on UNIX_TIMESTAMP(timestamp)):
+# p_initial holds everything before the first month, p_YYYYMM one month each, and p_future
+# (VALUES LESS THAN MAXVALUE) whatever lies beyond the last month created. Run
+# `python partitions.py maintain` daily (cron or a systemd timer) so upcoming months exist
+# before any row reaches p_future, keeping each split a metadata-only change.
+MONTHS_AHEAD = int(os.environ.get("TX_PARTITION_MONTHS_AHEAD", "3"))
+RETAIN_MONTHS = int(os.environ.get("TX_RETAIN_MONTHS", "0"))   # 0 keeps every month
+
+FUTURE_PARTITION = "p_future"
+ARCHIVE_PREFIX = "TransactionsArchive_"
+# Tables keyed by transaction_id whose rows go with an archived month. TransactionKeys stays,
+# so archived hashes and sender nonces can never be reused.
+CHILD_TABLES = ("WalletLedger", "TransactionLogs", "TransactionHolds")
+DELETE_BATCH = 5000
+
+# The table as it was before partitioning (one primary key on transaction_id, the hash and
+# nonce keys on the table itself), rebuilt from Transactions for `bench` to compare against.
+# Its foreign keys are left out; they do not change how these reads are planned.
+BASELINE_TABLE = "TransactionsUnpartitioned"
+BASELINE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {BASELINE_TABLE} (
+        transaction_id INT PRIMARY KEY,
+        block_id INT DEFAULT NULL,
+        amount DECIMAL(20,8) NOT NULL,
+        sender_wallet_id INT DEFAULT NULL,
+        receiver_wallet_id INT NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        transaction_hash VARCHAR(64) UNIQUE NOT NULL,
+        fee DECIMAL(20,8) DEFAULT 0,
+        memo VARCHAR(255) DEFAULT NULL,
+        status VARCHAR(20) DEFAULT 'pending',
+        nonce BIGINT DEFAULT NULL,
+        signature CHAR(128) DEFAULT NULL,
+        UNIQUE KEY uq_sender_nonce (sender_wallet_id, nonce),
+        INDEX idx_transactions_pending (block_id, status, timestamp)
+    )
+"""
+BASELINE_COLUMNS = """transaction_id, block_id, amount, sender_wallet_id, receiver_wallet_id, timestamp,
+                      transaction_hash, fee, memo, status, nonce, signature"""
+
+log = logging.getLogger(__name__)
+
+
+# WHERE condition (and params) for one block's transactions. With the block's transaction
+# timestamp range the optimizer reads only the partitions that can hold them.
+def block_filter(block, alias="t"):
+    prefix = f"{alias}." if alias else ""
+    sql, params = f"{prefix}block_id = %s", [block['block_id']]
+    if block.get('first_tx_timestamp') and block.get('last_tx_timestamp'):
+        sql += f" AND {prefix}timestamp BETWEEN %s AND %s"
+        params += [block['first_tx_timestamp'], block['last_tx_timestamp']]
+    return sql, params
+
+
+def block_bounds(cursor, block_id):
+    cursor.execute("""
+        SELECT block_id, first_tx_timestamp, last_tx_timestamp FROM Blocks WHERE block_id = %s
+    """, (block_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return {"block_id": block_id}
+    return row if isinstance(row, dict) else dict(zip(("block_id", "first_tx_timestamp", "last_tx_timestamp"), row))
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p_{month:%Y%m}"
+
+
+def _bound(month):
+    return f"UNIX_TIMESTAMP('{month:%Y-%m-%d} 00:00:00')"
+
+
+# [(name, first day after the partition or None for MAXVALUE, estimated rows), ...] in order
+def list_partitions(cursor):
+    cursor.execute("""
+        SELECT PARTITION_NAME, IF(PARTITION_DESCRIPTION = 'MAXVALUE', NULL,
+                                  FROM_UNIXTIME(PARTITION_DESCRIPTION)), TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions'
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    return [(name, upper.date() if upper else None, rows or 0) for name, upper, rows in cursor.fetchall()]
+
+
+# Split p_future so monthly partitions exist through `months_ahead` months after this one.
+# Returns the partitions created.
+def ensure_future(conn, months_ahead=MONTHS_AHEAD, today=None):
+    cursor = conn.cursor()
+    covered = max(upper for _, upper, _ in list_partitions(cursor) if upper)
+    through = _add_months(_month_start(today or date.today()), months_ahead + 1)
+
+    months = []
+    month = _month_start(covered)
+    while month < through:
+        months.append(month)
+        month = _add_months(month, 1)
+    if not months:
+        return []
+
+    cursor.execute(f"SELECT 1 FROM Transactions PARTITION ({FUTURE_PARTITION}) LIMIT 1")
+    if cursor.fetchone():
+        log.warning("%s holds rows, so this split copies them", FUTURE_PARTITION)
+    definitions = [f"PARTITION {partition_name(m)} VALUES LESS THAN ({_bound(_add_months(m, 1))})" for m in months]
+    cursor.execute(f"""
+        ALTER TABLE Transactions REORGANIZE PARTITION {FUTURE_PARTITION} INTO (
+            {', '.join(definitions)},
+            PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE
+        )
+    """)
+    return [partition_name(m) for m in months]
+
+
+# Delete the CHILD_TABLES rows of the transactions in `table`, a batch of ids at a time
+def _delete_children(conn, cursor, table):
+    last_id = 0
+    while True:
+        cursor.execute(f"""
+            SELECT transaction_id FROM {table}
+            WHERE transaction_id > %s ORDER BY transaction_id LIMIT {DELETE_BATCH}
+        """, (last_id,))
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return
+        placeholders = ", ".join(["%s"] * len(ids))
+        for table_name in CHILD_TABLES:
+            cursor.execute(f"DELETE FROM {table_name} WHERE transaction_id IN ({placeholders})", ids)
+        conn.commit()
+        last_id = ids[-1]
+
+
+# Unpartitioned table with the Transactions columns and keys, created if an earlier run has
+# not already left it
+def _archive_table(cursor, table):
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} LIKE Transactions")
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+    """, (table,))
+    if cursor.fetchone()[0]:
+        cursor.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+
+
+def _has_rows(cursor, source):
+    cursor.execute(f"SELECT 1 FROM {source} LIMIT 1")
+    return cursor.fetchone() is not None
+
+
+# Remove the months that ended `retain_months` or more months before this one began. Each
+# month is swapped (EXCHANGE PARTITION, a metadata change) into its own
+# TransactionsArchive_<partition> table, its CHILD_TABLES rows are deleted, and the then empty
+# partition is dropped; without export the archive table is dropped too, otherwise it stays
+# for mysqldump or cold storage. Every step can be rerun, so a month interrupted part-way is
+# finished by the next run. Months that still hold unmined transactions are skipped (rejected
+# transfers are never mined, so they do not count).
+# Returns [(partition, action), ...].
+def archive(conn, retain_months=RETAIN_MONTHS, export=True, today=None):
+    if retain_months < 1:
+        return []
+    cursor = conn.cursor()
+    cutoff = _add_months(_month_start(today or date.today()), -retain_months)
+    results = []
+    for name, upper, _ in list_partitions(cursor):
+        if upper is None or upper > cutoff:
+            break
+        partition = f"Transactions PARTITION ({name})"
+        cursor.execute(f"SELECT 1 FROM {partition} WHERE block_id IS NULL AND status <> 'rejected' LIMIT 1")
+        if cursor.fetchone():
+            results.append((name, "skipped: unmined transactions"))
+            continue
+
+        table = ARCHIVE_PREFIX + name[2:]
+        _archive_table(cursor, table)
+        if _has_rows(cursor, partition):
+            # A non-empty archive table is this month, exchanged by an interrupted run
+            if _has_rows(cursor, table):
+                results.append((name, f"skipped: {table} already holds rows while the partition is not empty"))
+                continue
+            cursor.execute(f"ALTER TABLE Transactions EXCHANGE PARTITION {name} WITH TABLE {table}")
+        _delete_children(conn, cursor, table)
+        cursor.execute(f"ALTER TABLE Transactions DROP PARTITION {name}")
+        if export:
+            results.append((name, f"exported to {table}"))
+        else:
+            cursor.execute(f"DROP TABLE {table}")
+            results.append((name, "dropped"))
+    return results
+
+
+# Partitions the optimizer will read for a query (from EXPLAIN)
+def explain_partitions(cursor, sql, params):
+    cursor.execute("EXPLAIN " + sql, params)
+    rows = cursor.fetchall()
+    names = set()
+    for row in rows:
+        if row.get('table') == 't' and row.get('partitions'):
+            names.update(row['partitions'].split(","))
+    return len(names)
+
+
+def _time(cursor, sql, params, runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+# Copy Transactions into BASELINE_TABLE (again, when the row counts differ), a batch of
+# ids at a time
+def build_baseline(conn, batch_size=DELETE_BATCH * 10):
+    cursor = conn.cursor()
+    cursor.execute(BASELINE_DDL)
+    cursor.execute(f"SELECT (SELECT COUNT(*) FROM Transactions), (SELECT COUNT(*) FROM {BASELINE_TABLE})")
+    source_rows, baseline_rows = cursor.fetchone()
+    if source_rows == baseline_rows:
+        return
+    cursor.execute(f"TRUNCATE TABLE {BASELINE_TABLE}")
+    cursor.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM Transactions")
+    last_id = cursor.fetchone()[0]
+    for start in range(0, last_id, batch_size):
+        cursor.execute(f"""
+            INSERT INTO {BASELINE_TABLE} ({BASELINE_COLUMNS})
+            SELECT {BASELINE_COLUMNS} FROM Transactions WHERE transaction_id > %s AND transaction_id <= %s
+        """, (start, start + batch_size))
+        conn.commit()
+    cursor.execute(f"ANALYZE TABLE {BASELINE_TABLE}")
+    cursor.fetchall()
+
+
+# Each query as the pages ran it against the unpartitioned table, and as they run it now
+def bench_queries(cursor):
+    cursor.execute("""
+        SELECT block_id, first_tx_timestamp, last_tx_timestamp FROM Blocks
+        WHERE first_tx_timestamp IS NOT NULL ORDER BY block_id LIMIT 1
+    """)
+    block = cursor.fetchone()
+    cursor.execute("SELECT wallet_id FROM WalletLedger GROUP BY wallet_id ORDER BY COUNT(*) DESC LIMIT 1")
+    wallet = cursor.fetchone()
+    cursor.execute("SELECT transaction_hash FROM TransactionKeys ORDER BY transaction_id LIMIT 1")
+    tx_hash = cursor.fetchone()
+    month_ago = datetime.now() - timedelta(days=30)
+
+    queries = []
+    if block:
+        pruned, params = block_filter(block)
+        queries.append(("Block's transactions",
+                        (f"SELECT t.* FROM {BASELINE_TABLE} t WHERE t.block_id = %s", [block['block_id']]),
+                        (f"SELECT t.* FROM Transactions t WHERE {pruned}", params)))
+    if wallet:
+        legs = """SELECT t.transaction_hash, t.amount FROM WalletLedger l
+                  JOIN {table} t ON {join}
+                  WHERE l.wallet_id = %s AND l.timestamp >= %s"""
+        queries.append(("Wallet history (30 days)",
+                        (legs.format(table=BASELINE_TABLE, join="t.transaction_id = l.transaction_id"),
+                         [wallet['wallet_id'], month_ago]),
+                        (legs.format(table="Transactions",
+                                     join="t.transaction_id = l.transaction_id AND t.timestamp = l.timestamp"),
+                         [wallet['wallet_id'], month_ago])))
+    volume = "SELECT COUNT(*), SUM(t.amount) FROM {table} t WHERE t.timestamp >= %s"
+    queries.append(("Volume (30 days)",
+                    (volume.format(table=BASELINE_TABLE), [month_ago]),
+                    (volume.format(table="Transactions"), [month_ago])))
+    if tx_hash:
+        queries.append(("Hash lookup",
+                        (f"SELECT t.block_id FROM {BASELINE_TABLE} t WHERE t.transaction_hash = %s",
+                         [tx_hash['transaction_hash']]),
+                        ("""SELECT t.block_id FROM TransactionKeys k
+                            JOIN Transactions t ON t.transaction_id = k.transaction_id AND t.timestamp = k.timestamp
+                            WHERE k.transaction_hash = %s""", [tx_hash['transaction_hash']])))
+    return queries
+
+
+# Seconds to remove the oldest month both ways: a DELETE on the unpartitioned table (rolled
+# back afterwards) and the EXCHANGE PARTITION archive() does (swapped back afterwards)
+def bench_archive(conn, name, upper):
+    cursor = conn.cursor()
+    if conn.in_transaction:
+        conn.commit()
+    conn.start_transaction()
+    started = time.perf_counter()
+    cursor.execute(f"DELETE FROM {BASELINE_TABLE} WHERE timestamp < %s", (upper,))
+    deleted = cursor.rowcount
+    delete_seconds = time.perf_counter() - started
+    conn.rollback()
+
+    scratch = ARCHIVE_PREFIX + "bench"
+    _archive_table(cursor, scratch)
+    started = time.perf_counter()
+    cursor.execute(f"ALTER TABLE Transactions EXCHANGE PARTITION {name} WITH TABLE {scratch}")
+    exchange_seconds = time.perf_counter() - started
+    cursor.execute(f"ALTER TABLE Transactions EXCHANGE PARTITION {name} WITH TABLE {scratch} WITHOUT VALIDATION")
+    cursor.execute(f"DROP TABLE {scratch}")
+    return deleted, delete_seconds, exchange_seconds
+
+
+def bench(conn, runs=5):
+    build_baseline(conn)
+    cursor = conn.cursor(dictionary=True)
+    print(f"{'query':<26} {'unpartitioned':>14} {'partitioned':>24}")
+    for label, (old_sql, old_params), (new_sql, new_params) in bench_queries(cursor):
+        old_time = _time(cursor, old_sql, old_params, runs)
+        new = explain_partitions(cursor, new_sql, new_params), _time(cursor, new_sql, new_params, runs)
+        print(f"{label:<26} {old_time * 1000:12.1f}ms {new[1] * 1000:12.1f}ms ({new[0]:3d} partitions)")
+
+    populated = [p for p in list_partitions(conn.cursor()) if p[1] is not None and p[2]]
+    if populated:
+        name, upper, _ = populated[0]
+        deleted, delete_seconds, exchange_seconds = bench_archive(conn, name, upper)
+        print(f"Removing {name} ({deleted:,} rows): DELETE {delete_seconds * 1000:.1f}ms, "
+              f"EXCHANGE PARTITION {exchange_seconds * 1000:.1f}ms")
+
+
+# python partitions.py maintain [retain_months] [drop]   pre-create months, archive old ones
+# python partitions.py list
+# python partitions.py bench [transactions] [runs]       seed a large ledger (once) and compare
+#                                                         with an unpartitioned copy of Transactions
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    command = sys.argv[1] if len(sys.argv) > 1 else "maintain"
+    conn = database.get_db_connection()
+
+    if command == "maintain":
+        retain = int(sys.argv[2]) if len(sys.argv) > 2 else RETAIN_MONTHS
+        created = ensure_future(conn)
+        print(f"Created partitions: {', '.join(created) or 'none needed'}")
+        for name, action in archive(conn, retain, export=not (len(sys.argv) > 3 and sys.argv[3] == "drop")):
+            print(f"{name}: {action}")
+    elif command == "list":
+        for name, upper, rows in list_partitions(conn.cursor()):
+            print(f"{name:<12} < {upper or 'MAXVALUE'}  ~{rows:,} rows")
+    elif command == "bench":
+        import render_bench
+
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+        ensure_future(conn)
+        # Spread over the months since the first monthly partition so every month is populated
+        first = min(upper for _, upper, _ in list_partitions(conn.cursor()) if upper)
+        render_bench.seed(conn, users=500, transactions=count, blocks=200,
+                          days=max(30, (date.today() - first).days))
+        bench(conn, int(sys.argv[3]) if len(sys.argv) > 3 else 5)
+    conn.close()
@@ -0,0 +1,180 @@
+import os
+import re
+import json
+import time
+import cProfile
+import functools
+import threading
+from contextlib import contextmanager
+
+# Profiling is opt-in: PAGE_PROFILE=1 profiles every render, or users listed in
+# PAGE_PROFILE_ADMINS get a sidebar switch that profiles their own session
+PROFILE_ENABLED = os.environ.get("PAGE_PROFILE", "") not in ("", "0")
+PROFILE_ADMINS = {int(u) for u in os.environ.get("PAGE_PROFILE_ADMINS", "").split(",") if u.strip()}
+PROFILE_DIR = os.environ.get("PAGE_PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+MAX_PROFILES_PER_PAGE = 20   # Oldest pstats snapshots beyond this are deleted
+
+# Phase -> (module, attribute path) of the entry points whose time is charged to it.
+# Time inside an entry point counts once, for the outermost phase, so pandas work done
+# inside st.dataframe is Streamlit serialization rather than DataFrame construction.
+PHASE_TARGETS = {
+    "sql": [("mysql.connector.cursor", "*"), ("mysql.connector.cursor_cext", "*")],
+    "dataframe": [("pandas", "DataFrame.__init__")],
+    "plotly": [("plotly.basedatatypes", "BaseFigure.__init__"), ("plotly.express", "*")],
+    "streamlit": [("streamlit", "*"), ("streamlit.delta_generator", "DeltaGenerator.*")],
+}
+CURSOR_METHODS = ("execute", "executemany", "callproc", "fetchone", "fetchall", "fetchmany")
+STREAMLIT_ELEMENTS = ("markdown", "dataframe", "table", "plotly_chart", "metric", "write", "code", "caption",
+                      "title", "header", "subheader", "info", "success", "warning", "error",
+                      "line_chart", "bar_chart")
+
+_local = threading.local()
+_installed = False
+_install_lock = threading.Lock()
+last_records = {}   # Page -> most recent render record in this process
+
+
+class PhaseTimer:
+    # Wall and CPU seconds per phase for one render on one thread
+    def __init__(self):
+        self.phases = {}
+        self.active = None
+
+    def run(self, phase, func, args, kwargs):
+        if self.active is not None:
+            return func(*args, **kwargs)
+        self.active = phase
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            totals = self.phases.setdefault(phase, [0.0, 0.0, 0])
+            totals[0] += time.perf_counter() - wall
+            totals[1] += time.process_time() - cpu
+            totals[2] += 1
+            self.active = None
+
+
+def _timed(phase, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timer = getattr(_local, "timer", None)
+        if timer is None:
+            return func(*args, **kwargs)
+        return timer.run(phase, func, args, kwargs)
+    wrapper._profiled = True
+    return wrapper
+
+
+def _patch(owner, name, phase):
+    func = getattr(owner, name, None)
+    if callable(func) and not getattr(func, "_profiled", False):
+        setattr(owner, name, _timed(phase, func))
+
+
+def _install_target(module_name, path, phase):
+    try:
+        module = __import__(module_name, fromlist=["_"])
+    except ImportError:
+        return
+    if module_name.startswith("mysql.connector"):
+        # Every cursor class defined in the module
+        for cls in vars(module).values():
+            if isinstance(cls, type) and cls.__module__ == module.__name__ and "Cursor" in cls.__name__:
+                for name in CURSOR_METHODS:
+                    if name in vars(cls):
+                        _patch(cls, name, phase)
+    elif module_name == "streamlit":
+        for name in STREAMLIT_ELEMENTS:
+            _patch(module, name, phase)
+    elif path == "DeltaGenerator.*":
+        for name in STREAMLIT_ELEMENTS:
+            if name in vars(module.DeltaGenerator) or hasattr(module.DeltaGenerator, name):
+                _patch(module.DeltaGenerator, name, phase)
+    elif path == "*":
+        for name, func in list(vars(module).items()):
+            if callable(func) and not isinstance(func, type) and not name.startswith("_"):
+                _patch(module, name, phase)
+    else:
+        owner_name, _, name = path.rpartition(".")
+        _patch(getattr(module, owner_name), name, phase)
+
+
+# Wrap the phase entry points once per process; wrappers cost one attribute lookup
+# while no render is being profiled
+def install():
+    global _installed
+    with _install_lock:
+        if not _installed:
+            for phase, targets in PHASE_TARGETS.items():
+                for module_name, path in targets:
+                    _install_target(module_name, path, phase)
+            _installed = True
+
+
+def enabled(state=None):
+    return PROFILE_ENABLED or bool(state is not None and state.get("profile_pages"))
+
+
+def _slug(page):
+    return re.sub(r"[^a-z0-9]+", "_", page.lower()).strip("_")
+
+
+def _save(page, record, profile):
+    page_dir = os.path.join(PROFILE_DIR, _slug(page))
+    os.makedirs(page_dir, exist_ok=True)
+    if profile is not None:
+        path = os.path.join(page_dir, time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}.pstats")
+        profile.dump_stats(path)
+        record["profile"] = path
+        snapshots = sorted(f for f in os.listdir(page_dir) if f.endswith(".pstats"))
+        for old in snapshots[:-MAX_PROFILES_PER_PAGE]:
+            os.remove(os.path.join(page_dir, old))
+    with open(os.path.join(PROFILE_DIR, "renders.jsonl"), "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+# Profile one page render: wall and CPU time per phase (sql, dataframe, plotly, streamlit,
+# and app for the rest), a cProfile snapshot under PROFILE_DIR/<page>/, and a summary line
+# in PROFILE_DIR/renders.jsonl. Does nothing unless profiling is enabled.
+@contextmanager
+def profile_page(page, state=None):
+    if not enabled(state):
+        yield None
+        return
+
+    install()
+    timer = PhaseTimer()
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler is active on this interpreter; keep the phase timings only
+        profile = None
+    _local.timer = timer
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield timer
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        _local.timer = None
+        if profile is not None:
+            profile.disable()
+
+        phases = {name: {"wall_s": w, "cpu_s": c, "calls": n} for name, (w, c, n) in timer.phases.items()}
+        phases["app"] = {
+            "wall_s": max(0.0, wall - sum(p["wall_s"] for p in phases.values())),
+            "cpu_s": max(0.0, cpu - sum(p["cpu_s"] for p in phases.values())),
+            "calls": 1,
+        }
+        record = {"page": page, "timestamp": time.time(), "wall_s": wall, "cpu_s": cpu, "phases": phases}
+        last_records[page] = record
+        _save(page, record, profile)
+
+
+# One-line summary of a render record, e.g. for a caption under the page
+def describe(record):
+    parts = [f"{name} {p['wall_s'] * 1000:.0f}ms" for name, p in
+             sorted(record["phases"].items(), key=lambda item: -item[1]["wall_s"])]
+    return (f"{record['page']}: {record['wall_s'] * 1000:.0f}ms wall, {record['cpu_s'] * 1000:.0f}ms CPU "
+            f"({', '.join(parts)})")
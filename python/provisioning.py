@@ -0,0 +1,233 @@
+import csv
+import sys
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from concurrent.futures import ProcessPoolExecutor
+
+import mysql.connector
+
+import accounts
+import database
+import signatures
+
+STARTING_BALANCE = 100.0   # Same starting balance as the Register page
+CHUNK_SIZE = 1000          # Users per multi-row INSERT and per database transaction
+MIN_PASSWORD_LENGTH = 8
+MIN_POOL_ROWS = 64         # Smaller batches are prepared in-process
+
+# Column limits from schema.sql, checked up front so one bad row cannot fail its chunk
+MAX_NAME_LENGTH = 100              # Users.name VARCHAR(100)
+MAX_EMAIL_LENGTH = 255             # Users.email VARCHAR(255)
+MAX_BALANCE = Decimal(10) ** 12    # Wallets.balance DECIMAL(20,8)
+BALANCE_PLACES = 8
+
+REPORT_FIELDS = ["row", "name", "email", "status", "user_id", "wallet_id", "error"]
+
+
+# Worker: password hash and wallet key pair for one user. Worker processes import this
+# module, so it (and what it imports) stays free of Streamlit and the page modules.
+def _prepare(password):
+    pem, public_hex = signatures.new_key_pair()
+    return accounts.hash_password(password), pem, public_hex
+
+
+# A row's optional starting balance as a Decimal (None when the column is empty), or raise
+# ValueError when Wallets.balance cannot hold it exactly
+def parse_balance(value):
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        balance = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(value)
+    if not balance.is_finite() or balance < 0 or balance >= MAX_BALANCE \
+            or balance != balance.quantize(Decimal(1).scaleb(-BALANCE_PLACES)):
+        raise ValueError(value)
+    return balance
+
+
+def validate_row(row):
+    name, email, password = (row.get(k) or "" for k in ("name", "email", "password"))
+    if not name.strip() or not email.strip() or not password:
+        return "missing_field"
+    if len(name.strip()) > MAX_NAME_LENGTH:
+        return "name_too_long"
+    if len(email.strip()) > MAX_EMAIL_LENGTH:
+        return "email_too_long"
+    if not accounts.is_valid_email(email.strip()):
+        return "invalid_email"
+    if len(password) < MIN_PASSWORD_LENGTH:
+        return "weak_password"
+    try:
+        parse_balance(row.get("balance"))
+    except ValueError:
+        return "invalid_balance"
+    return None
+
+
+def _placeholders(rows, width):
+    return ", ".join(["(" + ", ".join(["%s"] * width) + ")"] * rows)
+
+
+# IDs generated by a multi-row INSERT: LAST_INSERT_ID() plus one auto_increment_increment
+# step per row. A primary-key range read confirms them (a concurrent insert can interleave
+# under innodb_autoinc_lock_mode=2); only then are the rows looked up by their key column.
+def _generated_ids(cursor, table, id_column, key_column, first_id, step, keys):
+    last_id = first_id + (len(keys) - 1) * step
+    cursor.execute(f"SELECT {id_column}, {key_column} FROM {table} WHERE {id_column} BETWEEN %s AND %s "
+                   f"ORDER BY {id_column}", (first_id, last_id))
+    rows = cursor.fetchall()
+    if [str(row[1]).lower() for row in rows] == [str(k).lower() for k in keys]:
+        return [row[0] for row in rows]
+
+    cursor.execute(f"SELECT {id_column}, {key_column} FROM {table} WHERE {key_column} IN "
+                   f"({', '.join(['%s'] * len(keys))})", list(keys))
+    by_key = {str(row[1]).lower(): row[0] for row in cursor.fetchall()}
+    return [by_key[str(k).lower()] for k in keys]
+
+
+# Insert one chunk of prepared entries with their wallets in a single transaction.
+# Emails that already exist are marked as duplicates; returns the entries created. Private
+# keys are written just before the commit (a committed wallet always has its key) and
+# removed again if the chunk rolls back, so no key outlives its wallet row.
+def _insert_chunk(conn, cursor, entries, balance, step):
+    cursor.execute(f"SELECT email FROM Users WHERE email IN ({', '.join(['%s'] * len(entries))})",
+                   [e["email"] for e in entries])
+    existing = {row[0].lower() for row in cursor.fetchall()}
+    for entry in entries:
+        if entry["email"].lower() in existing:
+            entry["report"]["status"] = "duplicate"
+    fresh = [e for e in entries if e["email"].lower() not in existing]
+    if not fresh:
+        return []
+
+    if not conn.in_transaction:
+        conn.start_transaction()
+    stored = []
+    try:
+        cursor.execute(f"INSERT INTO Users (name, email, password) VALUES {_placeholders(len(fresh), 3)}",
+                       [v for e in fresh for v in (e["name"], e["email"], e["password_hash"])])
+        user_ids = _generated_ids(cursor, "Users", "user_id", "email", cursor.lastrowid, step,
+                                  [e["email"] for e in fresh])
+
+        cursor.execute(f"INSERT INTO Wallets (user_id, balance, public_key) VALUES {_placeholders(len(fresh), 3)}",
+                       [v for e, user_id in zip(fresh, user_ids) for v in (user_id, balance, e["public_key"])])
+        wallet_ids = _generated_ids(cursor, "Wallets", "wallet_id", "user_id", cursor.lastrowid, step, user_ids)
+
+        for entry, user_id, wallet_id in zip(fresh, user_ids, wallet_ids):
+            signatures.store_private_key(wallet_id, entry["pem"])
+            stored.append(wallet_id)
+            entry["report"].update(status="created", user_id=user_id, wallet_id=wallet_id)
+        conn.commit()
+        return fresh
+    except Exception:
+        conn.rollback()
+        for wallet_id in stored:
+            signatures.remove_private_key(wallet_id)
+        for entry in fresh:
+            entry["report"].update(status=None, user_id=None, wallet_id=None)
+        raise
+
+
+# Insert a group of entries, halving it on a database error until the rows that fail are
+# isolated, so only they are reported failed (with the database's message) and the rest of
+# the group is created. A clean group costs one attempt; k bad rows about 2k log2(n) more.
+def _insert_group(conn, cursor, group, balance, step):
+    try:
+        _insert_chunk(conn, cursor, group, balance, step)
+        return
+    except mysql.connector.IntegrityError:
+        # An email was registered concurrently; the retry re-checks and skips it
+        try:
+            _insert_chunk(conn, cursor, group, balance, step)
+            return
+        except mysql.connector.Error as e:
+            error = e
+    except mysql.connector.Error as e:
+        error = e
+    if len(group) == 1:
+        report = group[0]["report"]
+        report["status"] = report["status"] or "failed"
+        report["error"] = str(error)
+        return
+    middle = len(group) // 2
+    _insert_group(conn, cursor, group[:middle], balance, step)
+    _insert_group(conn, cursor, group[middle:], balance, step)
+
+
+# Create users and their wallets in bulk. `rows` are dicts with name, email and password
+# (and optionally balance). Returns one report dict per input row, in order, whose status is
+# created, duplicate, missing_field, name_too_long, email_too_long, invalid_email,
+# weak_password, invalid_balance or failed (with the database error).
+def provision_users(conn, rows, workers=None, chunk_size=CHUNK_SIZE, balance=STARTING_BALANCE):
+    reports, entries, seen = [], [], set()
+    for number, row in enumerate(rows, start=1):
+        email = (row.get("email") or "").strip()
+        report = {"row": number, "name": (row.get("name") or "").strip(), "email": email,
+                  "status": validate_row(row), "user_id": None, "wallet_id": None, "error": None}
+        reports.append(report)
+        if report["status"]:
+            continue
+        # Users.email is unique case-insensitively, so repeats within the batch are duplicates too
+        if email.lower() in seen:
+            report["status"] = "duplicate"
+            continue
+        seen.add(email.lower())
+        entries.append({"name": report["name"], "email": email, "password": row["password"],
+                        "balance": parse_balance(row.get("balance")), "report": report})
+
+    # Hashing and key generation are CPU-bound, so they run in a process pool
+    passwords = [e["password"] for e in entries]
+    if workers == 0 or len(entries) < MIN_POOL_ROWS:
+        prepared = [_prepare(p) for p in passwords]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            prepared = list(pool.map(_prepare, passwords, chunksize=max(1, len(passwords) // 64)))
+    for entry, (password_hash, pem, public_key) in zip(entries, prepared):
+        entry.update(password_hash=password_hash, pem=pem, public_key=public_key)
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT @@auto_increment_increment")
+    step = cursor.fetchone()[0]
+
+    for start in range(0, len(entries), chunk_size):
+        chunk = entries[start:start + chunk_size]
+        # Rows with an explicit balance go in their own statement so each chunk has one balance
+        for chunk_balance in sorted({e["balance"] for e in chunk}, key=str):
+            group = [e for e in chunk if e["balance"] == chunk_balance]
+            _insert_group(conn, cursor, group, balance if chunk_balance is None else chunk_balance, step)
+    return reports
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def write_report(path, reports):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(reports)
+
+
+# Provision from a CSV with name,email,password[,balance] columns:
+# python provisioning.py users.csv [report.csv] [workers]
+if __name__ == "__main__":
+    source = sys.argv[1]
+    report_path = sys.argv[2] if len(sys.argv) > 2 else "provisioning_report.csv"
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    rows = read_csv(source)
+    start = time.perf_counter()
+    conn = database.get_db_connection()
+    reports = provision_users(conn, rows, workers=workers)
+    conn.close()
+    elapsed = time.perf_counter() - start
+
+    write_report(report_path, reports)
+    counts = Counter(r["status"] for r in reports)
+    print(f"Processed {len(rows)} rows in {elapsed:.1f}s ({len(rows) / elapsed if elapsed else 0:,.0f} rows/sec): "
+          + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+    print(f"Per-row report written to {report_path}")
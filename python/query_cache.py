@@ -0,0 +1,114 @@
+import time
+import threading
+from collections import OrderedDict
+
+import change_feed
+
+DEFAULT_TTL = 60.0   # Seconds an entry is served when no invalidation arrives
+MAX_ENTRIES = 256    # Least recently used entries are evicted beyond this
+
+# Change-feed event kind -> cache tag it invalidates
+EVENT_TAGS = {'block': 'blocks', 'transaction': 'transactions'}
+
+
+class QueryCache:
+    # Process-wide cache for public (user-independent) query results. Each entry is tagged
+    # with the tables it reads; a new block or transaction bumps that tag's version, which
+    # retires every entry built under the old one. Only one session loads a missing entry
+    # at a time: the others wait for it, or keep serving the old copy while it refreshes.
+    # Cached values are shared between sessions and must be treated as read-only.
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()   # key -> (value, expires_at, tags, versions)
+        self.loading = {}              # key -> Event set when the in-flight load finishes
+        self.versions = {}
+        self.counts = {'hits': 0, 'misses': 0, 'stale_hits': 0, 'evictions': 0, 'invalidations': 0}
+        self.lock = threading.Lock()
+
+    def _versions(self, tags):
+        return tuple(self.versions.get(tag, 0) for tag in tags)
+
+    def _fresh(self, entry, now):
+        _, expires_at, tags, versions = entry
+        return now < expires_at and versions == self._versions(tags)
+
+    def get_or_load(self, key, loader, tags=(), ttl=None):
+        tags = tuple(tags)
+        while True:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None and self._fresh(entry, time.monotonic()):
+                    self.entries.move_to_end(key)
+                    self.counts['hits'] += 1
+                    return entry[0]
+                loading = self.loading.get(key)
+                if loading is None:
+                    # This caller loads; versions are taken first so an invalidation that
+                    # lands mid-load leaves the result already stale
+                    loading = self.loading[key] = threading.Event()
+                    versions = self._versions(tags)
+                    self.counts['misses'] += 1
+                    break
+                if entry is not None:
+                    self.counts['stale_hits'] += 1
+                    return entry[0]
+            loading.wait()
+
+        try:
+            value = loader()
+            with self.lock:
+                self.entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl), tags, versions)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.counts['evictions'] += 1
+            return value
+        finally:
+            with self.lock:
+                del self.loading[key]
+            loading.set()
+
+    def invalidate(self, *tags):
+        with self.lock:
+            for tag in tags:
+                self.versions[tag] = self.versions.get(tag, 0) + 1
+            self.counts['invalidations'] += 1
+
+    # Change-feed listener: retire entries that read a table with new rows
+    def on_events(self, events):
+        tags = {EVENT_TAGS[e['kind']] for e in events if e['kind'] in EVENT_TAGS}
+        if tags:
+            self.invalidate(*tags)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, entries=len(self.entries))
+
+
+# Cached cursor.fetchall() (or fetchone()) of a public query, keyed by its SQL and parameters
+def cached_query(cursor, sql, params=(), tags=(), fetch="all", ttl=None):
+    def load():
+        cursor.execute(sql, params)
+        return cursor.fetchall() if fetch == "all" else cursor.fetchone()
+    return get_cache().get_or_load((sql, tuple(params), fetch), load, tags, ttl)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Process-wide cache, invalidated by the shared change feed
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCache()
+            feed = change_feed.get_feed()
+            feed.add_listener(_cache.on_events)
+            feed.start()
+        return _cache
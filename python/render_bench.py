@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import time
+import bisect
+import random
+import hashlib
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+from streamlit.testing.v1 import AppTest
+
+import database
+import chain_store
+import profiler
+import provisioning
+import session_store
+
+# Headless render-time regression check: seeds a deterministic dataset, renders every page
+# through Streamlit's AppTest with the profiler on, and fails when a page's median render
+# time exceeds its budget. Point DB_NAME at a scratch database:
+#   DB_NAME=dtvs_bench python render_bench.py [--runs 5] [--budget-file budgets.json]
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+SEED_USERS = 50
+SEED_TRANSACTIONS = 5000
+SEED_BLOCKS = 20
+SEED_DAYS = 60
+BENCH_EMAIL = "bench{}@example.com"
+BENCH_PASSWORD = "bench-password"
+
+# Median render seconds allowed per page
+DEFAULT_BUDGETS = {
+    "Home": 0.5,
+    "Dashboard": 1.5,
+    "My Transactions": 1.0,
+    "Make Transaction": 0.75,
+    "My Wallets": 0.75,
+    "Block Explorer": 1.0,
+    "Profile Settings": 0.5,
+}
+
+
+def _mine(prev_hash, timestamp, target):
+    nonce = 0
+    while True:
+        block_hash = hashlib.sha256(f"{prev_hash}{nonce}{timestamp}".encode()).hexdigest()
+        if chain_store.hash_meets_target(block_hash, target):
+            return block_hash, nonce
+        nonce += 1
+
+
+# Create the bench users, a chain of blocks and transactions spread over `days`, once;
+# returns the user_id the pages are rendered for
+def seed(conn, users=SEED_USERS, transactions=SEED_TRANSACTIONS, blocks=SEED_BLOCKS, days=SEED_DAYS, seed_value=42):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT user_id FROM Users WHERE email = %s", (BENCH_EMAIL.format(0),))
+    row = cursor.fetchone()
+    if row:
+        return row['user_id']
+
+    rng = random.Random(seed_value)
+    reports = provisioning.provision_users(conn, [
+        {"name": f"bench{i}", "email": BENCH_EMAIL.format(i), "password": BENCH_PASSWORD, "balance": 1000000}
+        for i in range(users)
+    ])
+    wallets = [r["wallet_id"] for r in reports if r["status"] == "created"]
+
+    start = datetime.now().replace(microsecond=0) - timedelta(days=days)
+    step = timedelta(days=days) / blocks
+    store = chain_store.ChainStore(conn)
+    block_times = []
+    for i in range(blocks):
+        tip = chain_store.get_chain_tip(cursor)
+        timestamp = start + step * (i + 1)
+        block_hash, nonce = _mine(tip['tip_hash'], timestamp, tip['current_target'])
+        block_id = store.add_block(block_hash, tip['tip_block_id'], nonce, tip['current_target'], timestamp)
+        block_times.append((timestamp, block_id))
+
+    # Transactions after the last block stay pending
+    rows = []
+    for timestamp in sorted(start + timedelta(seconds=rng.uniform(0, days * 86400)) for _ in range(transactions)):
+        sender, receiver = rng.sample(wallets, 2)
+        position = bisect.bisect_left(block_times, (timestamp,))
+        block_id = block_times[position][1] if position < len(block_times) else None
+        rows.append((block_id, round(rng.uniform(0.01, 50), 8), sender, receiver, timestamp,
+                     "%064x" % rng.getrandbits(256), "confirmed" if block_id else "pending"))
+    insert = conn.cursor()
+    for chunk in range(0, len(rows), provisioning.CHUNK_SIZE):
+        insert.executemany("""
+            INSERT INTO Transactions (block_id, amount, sender_wallet_id, receiver_wallet_id, timestamp,
+                                      transaction_hash, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, rows[chunk:chunk + provisioning.CHUNK_SIZE])
+        conn.commit()
+
+    # Timestamp range of each block's transactions, as mine_block records it
+    insert.execute("""
+        UPDATE Blocks b
+        JOIN (SELECT block_id, MIN(timestamp) AS first_tx, MAX(timestamp) AS last_tx
+              FROM Transactions WHERE block_id IS NOT NULL GROUP BY block_id) r ON r.block_id = b.block_id
+        SET b.first_tx_timestamp = r.first_tx, b.last_tx_timestamp = r.last_tx
+    """)
+    conn.commit()
+    return reports[0]["user_id"]
+
+
+# Median render seconds per page, from the profiler's record of each render
+def render_pages(user_id, pages, runs):
+    profiler.PROFILE_ENABLED = True
+    results = {}
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    for page in [p for p in pages if p == "Home"]:
+        results[page] = _render(at, page, runs, navigate=False)
+
+    # Log the test session in through the shared session store
+    session_store.get_store().put(at.session_state.session_id, {"user_id": user_id},
+                                  time.time() + session_store.SESSION_TTL)
+    at.run()
+    for page in [p for p in pages if p != "Home"]:
+        results[page] = _render(at, page, runs)
+    return results
+
+
+def _render(at, page, runs, navigate=True):
+    times = []
+    for _ in range(runs):
+        if navigate:
+            at.sidebar.radio[0].set_value(page).run()
+        else:
+            at.run()
+        if at.exception:
+            raise RuntimeError(f"{page} raised: {at.exception[0].message}")
+        times.append(profiler.last_records[page]["wall_s"])
+    return statistics.median(times), profiler.last_records[page]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render every page and check render-time budgets")
+    parser.add_argument("--runs", type=int, default=5, help="renders per page (the median is compared)")
+    parser.add_argument("--budget-file", help="JSON object of page -> budget seconds, overriding the defaults")
+    parser.add_argument("--pages", nargs="*", help="pages to render (default: every budgeted page)")
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGETS)
+    if args.budget_file:
+        with open(args.budget_file) as f:
+            budgets.update(json.load(f))
+    pages = args.pages or list(budgets)
+
+    conn = database.get_db_connection()
+    user_id = seed(conn)
+    conn.close()
+
+    failed = []
+    for page, (median, record) in render_pages(user_id, pages, args.runs).items():
+        budget = budgets.get(page)
+        over = budget is not None and median > budget
+        if over:
+            failed.append(page)
+        print(f"{'FAIL' if over else 'ok':>4}  {page:<18} median {median * 1000:7.1f}ms"
+              f"  budget {budget * 1000 if budget else float('nan'):7.1f}ms  | {profiler.describe(record)}")
+
+    if failed:
+        print(f"Render budget exceeded: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,133 @@
+import threading
+
+import mysql.connector
+
+import database
+
+# Local two-instance stand-in for a primary/replica pair. The replica is a second MySQL
+# instance (or, by default, a second schema on the same server) refreshed by sync(), so
+# tests decide exactly when the replica catches up.
+
+MARKER_TABLE = "ReplicationMarker"
+
+
+class StandInTopology:
+    # Write positions are a sequence number bumped in the primary's marker table;
+    # a replica has caught up once its copy of the marker reaches that number
+    def position(self, primary_conn):
+        cursor = primary_conn.cursor()
+        cursor.execute(f"UPDATE {MARKER_TABLE} SET seq = LAST_INSERT_ID(seq + 1) WHERE id = 1")
+        cursor.execute("SELECT LAST_INSERT_ID()")
+        seq = cursor.fetchone()[0]
+        primary_conn.commit()
+        return ("seq", seq)
+
+    def caught_up(self, replica_conn, position):
+        cursor = replica_conn.cursor()
+        cursor.execute(f"SELECT seq FROM {MARKER_TABLE} WHERE id = 1")
+        row = cursor.fetchone()
+        return row is not None and row[0] >= position[1]
+
+
+class StandInCluster:
+    def __init__(self, primary_config=None, replica_config=None):
+        self.primary_config = primary_config or dict(database.PRIMARY_CONFIG)
+        self.replica_config = replica_config or dict(
+            self.primary_config, database=self.primary_config["database"] + "_replica")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def connect_primary(self):
+        return mysql.connector.connect(**self.primary_config)
+
+    def connect_replica(self):
+        return mysql.connector.connect(**self.replica_config)
+
+    def _tables(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("SHOW FULL TABLES WHERE Table_type = 'BASE TABLE'")
+        return [row[0] for row in cursor.fetchall()]
+
+    # Create the marker table on the primary and mirror every table's DDL on the replica
+    def setup(self):
+        primary = self.connect_primary()
+        cursor = primary.cursor()
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {MARKER_TABLE} (id TINYINT PRIMARY KEY, seq BIGINT NOT NULL)")
+        cursor.execute(f"INSERT IGNORE INTO {MARKER_TABLE} (id, seq) VALUES (1, 0)")
+        primary.commit()
+
+        server_config = {k: v for k, v in self.replica_config.items() if k != "database"}
+        server = mysql.connector.connect(**server_config)
+        server.cursor().execute(f"CREATE DATABASE IF NOT EXISTS `{self.replica_config['database']}`")
+        server.close()
+
+        replica = self.connect_replica()
+        replica_cursor = replica.cursor()
+        replica_cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in self._tables(primary):
+            cursor.execute(f"SHOW CREATE TABLE `{table}`")
+            replica_cursor.execute(f"DROP TABLE IF EXISTS `{table}`")
+            replica_cursor.execute(cursor.fetchone()[1])
+        replica_cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        replica.commit()
+        primary.close()
+        replica.close()
+        self.sync()
+
+    # Copy the primary's current rows to the replica (the marker table last, so a
+    # replica never claims a position before the rows behind it have arrived)
+    def sync(self):
+        primary = self.connect_primary()
+        replica = self.connect_replica()
+        cursor = primary.cursor()
+        replica_cursor = replica.cursor()
+        replica_cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+
+        tables = [t for t in self._tables(primary) if t != MARKER_TABLE] + [MARKER_TABLE]
+        for table in tables:
+            cursor.execute(f"SELECT * FROM `{table}`")
+            rows = cursor.fetchall()
+            replica_cursor.execute(f"DELETE FROM `{table}`")
+            if rows:
+                placeholders = ", ".join(["%s"] * len(rows[0]))
+                replica_cursor.executemany(f"INSERT INTO `{table}` VALUES ({placeholders})", rows)
+
+        replica_cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        replica.commit()
+        primary.close()
+        replica.close()
+
+    # Replicate in the background with a fixed lag
+    def start_replication(self, lag=1.0):
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(lag):
+                self.sync()
+
+        self._thread = threading.Thread(target=run, name="standin-replication", daemon=True)
+        self._thread.start()
+
+    def stop_replication(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def router(self):
+        return database.Router(self.connect_primary, [self.connect_replica], StandInTopology())
+
+
+# Demonstrate routing against the stand-in: python replica_standin.py
+if __name__ == "__main__":
+    cluster = StandInCluster()
+    cluster.setup()
+    router = cluster.router()
+    session = {}
+
+    print("Read before any write ->", router.read_connection("home", session)[0])
+    router.record_write(session)
+    print("Read after own write, replica behind ->", router.read_connection("home", session)[0])
+    cluster.sync()
+    print("Read after replica sync ->", router.read_connection("home", session)[0])
+    router.read_cursor("home", session).execute("SELECT COUNT(*) AS blocks FROM Blocks")
+    print(router.metrics.snapshot())
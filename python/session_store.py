@@ -0,0 +1,310 @@
+import os
+import hmac
+import json
+import time
+import sqlite3
+import hashlib
+import secrets
+import threading
+from functools import lru_cache
+from collections import OrderedDict
+from datetime import datetime
+
+import database
+
+# Which store holds session state: "sqlite" (one host, any number of workers) or "mysql"
+# (shared by every host)
+SESSION_STORE = os.environ.get("SESSION_STORE", "sqlite")
+SESSION_DB = os.environ.get("SESSION_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.db"))
+
+SESSION_TTL = 15 * 60   # Idle seconds before a session times out (sliding)
+TOUCH_INTERVAL = 30     # Unchanged sessions are re-saved (sliding the expiry) at most this often
+PURGE_AFTER = 86400     # Expired sessions are deleted after this many more seconds
+CACHE_TTL = 1.0         # Seconds a read is served from the in-process cache
+CACHE_SIZE = 1024
+
+# The signed session token travels in a cookie (or in a header set by a fronting proxy),
+# never in the URL, so it does not leak through history, logs or shared links
+TOKEN_COOKIE = os.environ.get("SESSION_COOKIE", "dtvs_session")
+TOKEN_HEADER = "X-Session-Token"
+LEGACY_TOKEN_PARAM = "sid"   # Earlier URL parameter; stripped and never honoured
+
+# Session-state keys shared across workers; everything else stays per process. The router's
+# read-your-writes position (database.Router) is shared too, so any worker serving the next
+# run still sends reads to the primary until the replicas have the session's last write.
+SHARED_KEYS = ("user_id", "last_activity", "receiver_username", "send_to_self", "transaction_submitted",
+               "last_write_position", "write_seen_by")
+
+
+@lru_cache(maxsize=1)
+def _secret():
+    secret = os.environ.get("SESSION_SECRET")
+    if secret:
+        return secret.encode()
+    # Without SESSION_SECRET, workers on one host share a generated secret next to the store
+    # The secret is written to a private temp file and hard-linked into place, which fails if
+    # another worker got there first; either way the file is complete before anyone reads it
+    path = os.path.join(os.path.dirname(SESSION_DB), "session_secret")
+    if not os.path.exists(path):
+        temp = f"{path}.{os.getpid()}.{secrets.token_hex(4)}"
+        fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(secrets.token_hex(32).encode())
+        try:
+            os.link(temp, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp)
+    with open(path, "rb") as f:
+        secret = f.read().strip()
+    if not secret:
+        raise RuntimeError(f"{path} is empty; delete it (every session is signed out) or set SESSION_SECRET")
+    return secret
+
+
+def sign(session_id, secret=None):
+    mac = hmac.new(secret or _secret(), session_id.encode(), hashlib.sha256).hexdigest()[:32]
+    return f"{session_id}.{mac}"
+
+
+# Session id from a signed token, or None if the token was not issued with our secret
+def verify(token, secret=None):
+    if not isinstance(token, str):
+        return None
+    session_id, _, mac = token.partition(".")
+    if not session_id or not mac:
+        return None
+    expected = sign(session_id, secret).partition(".")[2]
+    return session_id if hmac.compare_digest(mac, expected) else None
+
+
+class SQLiteSessionStore:
+    # Sessions in a local SQLite file (WAL mode), shared by the worker processes of one host
+    def __init__(self, path=SESSION_DB):
+        self.path = path
+        self.local = threading.local()
+        self._conn().execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self._conn().execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, session_id):
+        row = self._conn().execute("SELECT data, expires_at FROM sessions WHERE session_id = ?",
+                                   (session_id,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def put(self, session_id, data, expires_at):
+        self._conn().execute("""
+            INSERT INTO sessions (session_id, data, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT (session_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at
+        """, (session_id, json.dumps(data), expires_at))
+
+    def delete(self, session_id):
+        self._conn().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def purge(self, before):
+        return self._conn().execute("DELETE FROM sessions WHERE expires_at < ?", (before,)).rowcount
+
+
+class MySQLSessionStore:
+    # Sessions in the application database (Sessions table), shared by every host
+    def __init__(self, conn_factory=database.get_db_connection):
+        self.conn_factory = conn_factory
+        self.local = threading.local()
+
+    def _cursor(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None or not conn.is_connected():
+            conn = self.conn_factory()
+            conn.autocommit = True
+            self.local.conn = conn
+        return conn.cursor()
+
+    def get(self, session_id):
+        cursor = self._cursor()
+        cursor.execute("SELECT data, expires_at FROM Sessions WHERE session_id = %s", (session_id,))
+        row = cursor.fetchone()
+        return (json.loads(row[0]), float(row[1])) if row else None
+
+    def put(self, session_id, data, expires_at):
+        self._cursor().execute("""
+            INSERT INTO Sessions (session_id, data, expires_at) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE data = VALUES(data), expires_at = VALUES(expires_at)
+        """, (session_id, json.dumps(data), expires_at))
+
+    def delete(self, session_id):
+        self._cursor().execute("DELETE FROM Sessions WHERE session_id = %s", (session_id,))
+
+    def purge(self, before):
+        cursor = self._cursor()
+        cursor.execute("DELETE FROM Sessions WHERE expires_at < %s", (before,))
+        return cursor.rowcount
+
+
+class CachedSessionStore:
+    # Read-through cache in front of a store. Entries live for CACHE_TTL seconds, so a change
+    # written by another worker is seen within that window; writes go through immediately.
+    def __init__(self, store, ttl=CACHE_TTL, size=CACHE_SIZE):
+        self.store = store
+        self.ttl = ttl
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.last_purge = 0.0
+
+    def _remember(self, session_id, record):
+        with self.lock:
+            self.entries[session_id] = (record, time.monotonic() + self.ttl)
+            self.entries.move_to_end(session_id)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def get(self, session_id):
+        with self.lock:
+            cached = self.entries.get(session_id)
+        if cached and time.monotonic() < cached[1]:
+            return cached[0]
+        record = self.store.get(session_id)
+        self._remember(session_id, record)
+        return record
+
+    def put(self, session_id, data, expires_at):
+        self.store.put(session_id, data, expires_at)
+        self._remember(session_id, (data, expires_at))
+        # Expired sessions are cleaned up by whichever worker writes after the interval
+        if time.time() - self.last_purge > TOUCH_INTERVAL * 10:
+            self.last_purge = time.time()
+            self.store.purge(time.time() - PURGE_AFTER)
+
+    def delete(self, session_id):
+        self.store.delete(session_id)
+        with self.lock:
+            self.entries.pop(session_id, None)
+
+
+def _encode(key, value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, set):
+        return sorted(value)
+    return value
+
+
+def _decode(key, value):
+    if value is None:
+        return value
+    if key == "last_activity":
+        return datetime.fromisoformat(value)
+    if key == "last_write_position":
+        return tuple(value)
+    if key == "write_seen_by":
+        return set(value)
+    return value
+
+
+# Load this browser session's shared keys into `state` (st.session_state) at the start of
+# a run. A connection keeps the session id it started with (or was rotated to); a new
+# connection takes it from the signed token in the TOKEN_HEADER header or TOKEN_COOKIE
+# cookie of `context` (st.context). A missing or forged token starts a new session; an
+# expired or ended one comes back logged out.
+def restore(state, context, query_params=None, store=None):
+    store = store or get_store()
+    if query_params is not None and LEGACY_TOKEN_PARAM in query_params:
+        del query_params[LEGACY_TOKEN_PARAM]
+
+    session_id = state.get("session_id")
+    if session_id is None:
+        session_id = verify(context.headers.get(TOKEN_HEADER) or context.cookies.get(TOKEN_COOKIE))
+        if session_id is None:
+            session_id = _new_session(state)
+        state["session_id"] = session_id
+
+    record = store.get(session_id)
+    data = dict(record[0]) if record else {}
+    if record and record[1] < time.time() and data.get("user_id"):
+        data["user_id"] = None
+        state["notification"] = "Session timed out. Please log in again."
+    elif record is None and state.get("user_id"):
+        # Logged out, or rotated, from another tab of this browser
+        data["user_id"] = None
+    for key in SHARED_KEYS:
+        if key in data:
+            state[key] = _decode(key, data[key])
+    state["session_saved"] = (data, record[1] if record else 0.0)
+
+
+def _new_session(state):
+    session_id = secrets.token_hex(16)
+    state["session_cookie"] = sign(session_id)
+    return session_id
+
+
+# Give this browser a new session id and delete the old record, so a token that leaked or
+# was planted before a login (or is still held after a logout) is worthless. Call on login
+# and logout; the shared keys are saved under the new id at the end of the run.
+def rotate(state, store=None):
+    store = store or get_store()
+    old_session_id = state.get("session_id")
+    state["session_id"] = _new_session(state)
+    state["session_saved"] = ({}, 0.0)
+    if old_session_id:
+        store.delete(old_session_id)
+
+
+# Script that stores the session cookie in the browser when it changed in this run (empty
+# otherwise), for st.html(..., unsafe_allow_javascript=True): Streamlit cannot set cookies
+# from the server. A proxy that injects TOKEN_HEADER instead can also mark its cookie HttpOnly.
+def cookie_script(state, secure=False):
+    token = state.get("session_cookie")
+    if not token:
+        return ""
+    attributes = "Path=/; SameSite=Strict" + ("; Secure" if secure else "")
+    return f"<script>document.cookie = {json.dumps(f'{TOKEN_COOKIE}={token}; {attributes}')};</script>"
+
+
+# Write the shared keys back at the end of a run (or fragment rerun). With touch=True the
+# expiry slides forward on every save, and an unchanged session is only re-saved every
+# TOUCH_INTERVAL seconds; with touch=False (timed refreshes, which are not activity) only a
+# change is saved, under the current expiry.
+def save(state, store=None, touch=True):
+    store = store or get_store()
+    if "session_id" not in state:
+        return
+    data = {key: _encode(key, state[key]) for key in SHARED_KEYS if key in state}
+    saved, expires_at = state.get("session_saved") or ({}, 0.0)
+    unchanged = {k: v for k, v in data.items() if k != "last_activity"} == \
+                {k: v for k, v in saved.items() if k != "last_activity"}
+    now = time.time()
+    if unchanged and (not touch or expires_at - now > SESSION_TTL - TOUCH_INTERVAL):
+        return
+    if touch:
+        expires_at = now + SESSION_TTL
+    store.put(state["session_id"], data, expires_at)
+    state["session_saved"] = (data, expires_at)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# Process-wide store selected by SESSION_STORE, behind the read-through cache
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = MySQLSessionStore() if SESSION_STORE == "mysql" else SQLiteSessionStore()
+            _store = CachedSessionStore(backend)
+        return _store
@@ -0,0 +1,313 @@
+import os
+import json
+import time
+import hashlib
+from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+# Private keys are held by this node (custodial wallets); only public keys go in the database
+KEYSTORE_DIR = os.environ.get("WALLET_KEYSTORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "keys"))
+
+DEFAULT_BATCH_SIZE = 256
+ER_DUP_ENTRY = 1062
+
+
+# Raised when a wallet's registered public key has no matching private key on this node
+class WalletKeyError(Exception):
+    pass
+
+
+# Canonical byte encoding of the signed transaction fields. Amounts are fixed to the
+# DECIMAL(20,8) scale so every node produces the same bytes for the same transfer.
+def canonical_payload(sender_wallet_id, receiver_wallet_id, amount, fee, memo, nonce):
+    return json.dumps({
+        "sender": int(sender_wallet_id),
+        "receiver": int(receiver_wallet_id),
+        "amount": f"{Decimal(str(amount)):.8f}",
+        "fee": f"{Decimal(str(fee or 0)):.8f}",
+        "memo": memo or "",
+        "nonce": int(nonce),
+    }, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _key_path(wallet_id):
+    return os.path.join(KEYSTORE_DIR, f"wallet_{int(wallet_id)}.pem")
+
+
+def _public_hex(private_key):
+    return private_key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw).hex()
+
+
+# New key pair as (PEM-encoded private key, hex public key); picklable for worker pools
+def new_key_pair():
+    private_key = Ed25519PrivateKey.generate()
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return pem, _public_hex(private_key)
+
+
+def store_private_key(wallet_id, pem):
+    os.makedirs(KEYSTORE_DIR, exist_ok=True)
+    with open(_key_path(wallet_id), "wb") as f:
+        f.write(pem)
+
+
+def remove_private_key(wallet_id):
+    try:
+        os.remove(_key_path(wallet_id))
+    except FileNotFoundError:
+        pass
+
+
+# Function to create a key pair for a wallet and publish its public key
+def generate_wallet_key(cursor, wallet_id):
+    pem, public_hex = new_key_pair()
+    store_private_key(wallet_id, pem)
+    cursor.execute("UPDATE Wallets SET public_key = %s WHERE wallet_id = %s", (public_hex, wallet_id))
+    return public_hex
+
+
+# Wallets created before signatures existed get a key on first use. A wallet that already
+# has a public key is never re-keyed here: if this node's keystore lacks the private key (a
+# second host, a lost file) the transfer fails instead of silently invalidating every
+# earlier signature. Replacing a key is an explicit rotate_wallet_key(). The row is locked
+# so two first transfers cannot each publish a different key.
+def ensure_wallet_key(cursor, wallet_id):
+    cursor.execute("SELECT public_key FROM Wallets WHERE wallet_id = %s FOR UPDATE", (wallet_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise WalletKeyError(f"Wallet #{wallet_id} does not exist")
+    has_file = os.path.exists(_key_path(wallet_id))
+    if not row["public_key"]:
+        if not has_file:
+            return generate_wallet_key(cursor, wallet_id)
+        # A key stored before its public half was published: publish it rather than replace it
+        public_hex = _public_hex(load_private_key(wallet_id))
+        cursor.execute("UPDATE Wallets SET public_key = %s WHERE wallet_id = %s", (public_hex, wallet_id))
+        return public_hex
+    if not has_file:
+        raise WalletKeyError(f"The signing key for wallet #{wallet_id} is not in this node's keystore "
+                             f"({KEYSTORE_DIR}); restore it or rotate the wallet's key")
+    if _public_hex(load_private_key(wallet_id)) != row["public_key"]:
+        raise WalletKeyError(f"The keystore key for wallet #{wallet_id} does not match its registered public key")
+    return row["public_key"]
+
+
+# Replace a wallet's key pair. Signatures made with the old key no longer verify against
+# Wallets.public_key, so this is an operator action (python signatures.py rotate <wallet_id>).
+def rotate_wallet_key(cursor, wallet_id):
+    cursor.execute("SELECT wallet_id FROM Wallets WHERE wallet_id = %s FOR UPDATE", (wallet_id,))
+    if cursor.fetchone() is None:
+        raise WalletKeyError(f"Wallet #{wallet_id} does not exist")
+    return generate_wallet_key(cursor, wallet_id)
+
+
+def load_private_key(wallet_id):
+    with open(_key_path(wallet_id), "rb") as f:
+        return serialization.load_pem_private_key(f.read(), password=None)
+
+
+# Next unused nonce for a sender wallet (served by the (sender_wallet_id, nonce) unique key).
+# The sender's Wallets row is locked first, so concurrent transfers from one wallet take
+# nonces one after another instead of both reading the same MAX(nonce); call it inside the
+# transfer's transaction, which holds the lock until commit.
+def next_nonce(cursor, wallet_id):
+    cursor.execute("SELECT wallet_id FROM Wallets WHERE wallet_id = %s FOR UPDATE", (wallet_id,))
+    cursor.fetchall()
+    cursor.execute("SELECT COALESCE(MAX(nonce), 0) + 1 AS nonce FROM TransactionKeys WHERE sender_wallet_id = %s",
+                   (wallet_id,))
+    return cursor.fetchone()["nonce"]
+
+
+# Build and sign a transaction dict ready for the verification stage
+def sign_transaction(sender_wallet_id, receiver_wallet_id, amount, fee, memo, nonce):
+    payload = canonical_payload(sender_wallet_id, receiver_wallet_id, amount, fee, memo, nonce)
+    signature = load_private_key(sender_wallet_id).sign(payload).hex()
+    return {
+        "sender_wallet_id": sender_wallet_id,
+        "receiver_wallet_id": receiver_wallet_id,
+        "amount": amount,
+        "fee": fee,
+        "memo": memo,
+        "nonce": nonce,
+        "signature": signature,
+        "transaction_hash": hashlib.sha256(payload + bytes.fromhex(signature)).hexdigest(),
+    }
+
+
+def verify_signature(public_key_hex, payload, signature_hex):
+    try:
+        Ed25519PublicKey.from_public_bytes(bytes.fromhex(public_key_hex)).verify(bytes.fromhex(signature_hex), payload)
+        return True
+    except (InvalidSignature, ValueError, TypeError):
+        return False
+
+
+# Runs inside a pool worker: verify one chunk of (public_key, payload, signature) items
+def _verify_chunk(items):
+    return [verify_signature(public_key, payload, signature) for public_key, payload, signature in items]
+
+
+class SignatureVerifier:
+    # Verification stage in front of the mempool: transactions are checked in batches,
+    # chunks of each batch are spread across a process pool, and throughput is tracked.
+    def __init__(self, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        self.verified = 0
+        self.rejected = 0
+        self.elapsed = 0.0
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Verify prepared (public_key, payload, signature) items, returning one bool per item
+    def verify_items(self, items):
+        start = time.perf_counter()
+        chunk = max(1, -(-len(items) // self.workers)) if self.pool else len(items) or 1
+        chunk = min(chunk, self.batch_size)
+        chunks = [items[i:i + chunk] for i in range(0, len(items), chunk)]
+        if self.pool and len(chunks) > 1:
+            results = [ok for part in self.pool.map(_verify_chunk, chunks) for ok in part]
+        else:
+            results = [ok for part in map(_verify_chunk, chunks) for ok in part]
+
+        self.elapsed += time.perf_counter() - start
+        accepted = sum(results)
+        self.verified += accepted
+        self.rejected += len(results) - accepted
+        return results
+
+    # Verify transaction dicts, fetching every sender's public key in one query per batch
+    def verify_transactions(self, cursor, transactions):
+        results = []
+        for i in range(0, len(transactions), self.batch_size):
+            batch = transactions[i:i + self.batch_size]
+            wallet_ids = sorted({tx["sender_wallet_id"] for tx in batch})
+            placeholders = ", ".join(["%s"] * len(wallet_ids))
+            cursor.execute(f"SELECT wallet_id, public_key FROM Wallets WHERE wallet_id IN ({placeholders})",
+                           tuple(wallet_ids))
+            keys = {row["wallet_id"]: row["public_key"] for row in cursor.fetchall()}
+
+            items = []
+            for tx in batch:
+                payload = canonical_payload(tx["sender_wallet_id"], tx["receiver_wallet_id"], tx["amount"],
+                                            tx.get("fee"), tx.get("memo"), tx["nonce"])
+                items.append((keys.get(tx["sender_wallet_id"]) or "", payload, tx.get("signature") or ""))
+            results.extend(self.verify_items(items))
+        return results
+
+    def stats(self):
+        total = self.verified + self.rejected
+        return {
+            "verified": self.verified,
+            "rejected": self.rejected,
+            "seconds": self.elapsed,
+            "signatures_per_sec": total / self.elapsed if self.elapsed else 0.0,
+        }
+
+
+# Verify a batch of signed transactions and insert only the valid ones. With a
+# tx_index.TransactionIndex (or its NULL_INDEX stand-in), hashes already stored (or repeated within the batch) are
+# rejected too. Returns (accepted, rejected) lists of transaction dicts; each rejected
+# dict gets a "reject_reason" of "signature" or "duplicate".
+def submit_verified(conn, verifier, transactions, index=None):
+    cursor = conn.cursor(dictionary=True)
+    results = verifier.verify_transactions(cursor, transactions)
+    stored = index.stored(cursor, [tx["transaction_hash"] for tx in transactions]) if index is not None else set()
+
+    accepted, rejected, seen = [], [], set()
+    for tx, ok in zip(transactions, results):
+        if not ok:
+            tx["reject_reason"] = "signature"
+        elif index is not None and (tx["transaction_hash"] in stored or tx["transaction_hash"] in seen):
+            tx["reject_reason"] = "duplicate"
+        else:
+            seen.add(tx["transaction_hash"])
+            accepted.append(tx)
+            continue
+        rejected.append(tx)
+
+    while accepted:
+        try:
+            cursor.executemany("""
+                INSERT INTO Transactions
+                (transaction_hash, sender_wallet_id, receiver_wallet_id, amount, fee, memo, nonce, signature)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, [(tx["transaction_hash"], tx["sender_wallet_id"], tx["receiver_wallet_id"], tx["amount"],
+                   tx.get("fee") or 0, tx.get("memo"), tx["nonce"], tx["signature"]) for tx in accepted])
+            break
+        except Exception as e:
+            # The index can trail the newest commits; a hash it missed hits the TransactionKeys
+            # primary key (ER_DUP_ENTRY). Only the failed statement is undone, so reject the
+            # hashes that exist and insert the rest.
+            if getattr(e, "errno", None) != ER_DUP_ENTRY or index is None:
+                raise
+            placeholders = ", ".join(["%s"] * len(accepted))
+            cursor.execute(f"SELECT transaction_hash FROM TransactionKeys WHERE transaction_hash IN ({placeholders})",
+                           [tx["transaction_hash"] for tx in accepted])
+            existing = {row["transaction_hash"] for row in cursor.fetchall()}
+            if not existing:
+                raise
+            for tx in accepted:
+                if tx["transaction_hash"] in existing:
+                    tx["reject_reason"] = "duplicate"
+                    rejected.append(tx)
+            accepted = [tx for tx in accepted if tx["transaction_hash"] not in existing]
+    return accepted, rejected
+
+
+# Benchmark the verification stage: python signatures.py [count] [workers]
+# Replace a wallet's key pair:          python signatures.py rotate <wallet_id>
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 2 and sys.argv[1] == "rotate":
+        import database
+
+        conn = database.get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        conn.start_transaction()
+        try:
+            public_hex = rotate_wallet_key(cursor, int(sys.argv[2]))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        print(f"Wallet #{sys.argv[2]} now signs with public key {public_hex}")
+        sys.exit(0)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    key = Ed25519PrivateKey.generate()
+    public_hex = key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw).hex()
+    items = []
+    for n in range(count):
+        payload = canonical_payload(1, 2, "1.5", "0.01", "bench", n)
+        items.append((public_hex, payload, key.sign(payload).hex()))
+
+    with SignatureVerifier(workers=workers, batch_size=max(1, count)) as verifier:
+        verifier.verify_items(items)
+        stats = verifier.stats()
+    print(f"Verified {stats['verified']} signatures ({stats['rejected']} rejected) "
+          f"in {stats['seconds']:.2f}s: {stats['signatures_per_sec']:,.0f} signatures/sec "
+          f"across {verifier.workers} workers")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules under python/ import each other as top-level modules (the app runs from there)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
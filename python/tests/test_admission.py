@@ -0,0 +1,84 @@
+import admission
+
+
+class MempoolCursor:
+    def __init__(self, pending):
+        self.pending = pending
+        self.queries = 0
+
+    def execute(self, sql, params=()):
+        self.queries += 1
+
+    def fetchone(self):
+        return {"pending": self.pending}
+
+
+def test_token_bucket_spends_burst_then_refills_at_rate():
+    bucket = admission.TokenBucket(rate=2, burst=3, now=0.0)
+    assert [bucket.take(0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take(0.0) == 0.5            # one token is due in 1 / rate seconds
+    assert bucket.take(0.5) == 0.0
+    assert bucket.take(10.0) == 0.0
+    assert bucket.tokens == 2                 # refill is capped at the burst
+
+
+def test_token_bucket_give_back_is_capped():
+    bucket = admission.TokenBucket(rate=1, burst=2, now=0.0)
+    bucket.give_back()
+    assert bucket.tokens == 2
+    assert admission.TokenBucket(rate=0, burst=0, now=0.0).take(0.0) == float("inf")
+
+
+def test_user_rate_is_per_user():
+    controller = admission.AdmissionController(user_rate=0.001, user_burst=2, global_rate=100, global_burst=100)
+    decisions = [controller.admit(1) for _ in range(3)]
+    assert [d["accepted"] for d in decisions] == [True, True, False]
+    assert decisions[2]["reason"] == "user_rate" and decisions[2]["retry_after"] >= 1.0
+    assert controller.admit(2)["accepted"]
+
+
+def test_global_shed_returns_the_users_token():
+    controller = admission.AdmissionController(user_rate=0.001, user_burst=1, global_rate=0.001, global_burst=1)
+    assert controller.admit(1)["accepted"]
+    shed = controller.admit(2)
+    assert shed["reason"] == "global_rate"
+    assert controller.user_buckets[2].tokens >= 1
+
+
+def test_in_flight_cap_and_release():
+    controller = admission.AdmissionController(user_rate=100, user_burst=100, global_rate=100, global_burst=100,
+                                               max_in_flight=1, in_flight_wait=0.01)
+    first = controller.admit(1)
+    shed = controller.admit(2)
+    assert first["accepted"] and shed["reason"] == "in_flight"
+
+    controller.release(first)
+    controller.release(first)                # a second release is a no-op
+    assert controller.stats()["in_flight"] == 0
+    assert controller.admit(2)["accepted"]
+
+
+def test_mempool_hard_watermark_sheds_everything():
+    controller = admission.AdmissionController(mempool_soft=10, mempool_hard=20)
+    decision = controller.admit(1, MempoolCursor(pending=25))
+    assert decision["reason"] == "mempool"
+    assert decision["retry_after"] >= 1.0
+
+
+def test_mempool_depth_is_cached_and_counts_local_accepts():
+    controller = admission.AdmissionController(mempool_soft=3, mempool_hard=3)
+    cursor = MempoolCursor(pending=1)
+    assert controller.admit(1, cursor)["accepted"]
+    assert controller.admit(2, cursor)["accepted"]
+    # 1 pending plus 2 accepted here since the last read reaches the watermark
+    assert controller.admit(3, cursor)["reason"] == "mempool"
+    assert cursor.queries == 1
+
+
+def test_stats():
+    controller = admission.AdmissionController()
+    decision = controller.admit(1)
+    controller.release(decision)
+    stats = controller.stats()
+    assert stats["accepted"] == 1 and sum(stats["shed"].values()) == 0
+    assert stats["p50_s"] >= 0 and stats["p99_s"] >= stats["p50_s"]
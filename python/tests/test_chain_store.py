@@ -0,0 +1,199 @@
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import chain_store
+
+EASY = 2 ** 64 - 1      # Work 1 per block
+HARD = 2 ** 62 - 1      # Work 4 per block
+
+
+class FakeChainDB:
+    # Blocks, ChainTips, ChainState, BlockDeltas, Wallets and Transactions in memory, serving
+    # the statements ChainStore issues; counts single-block lookups to check fork walks
+    def __init__(self):
+        self.blocks = {}
+        self.tips = {}
+        self.active_tip = None
+        self.deltas = []
+        self.wallets = {1: 0, 2: 0}
+        self.transactions = []
+        self.block_lookups = 0
+        self.commits = self.rollbacks = 0
+        self.result = []
+        self.lastrowid = None
+
+    def cursor(self, **kwargs):
+        return self
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def callproc(self, name, args):
+        assert name == "update_chain_tip"
+        self.active_tip = args[0]
+
+    def executemany(self, sql, rows):
+        assert "INSERT INTO BlockDeltas" in sql
+        self.deltas += list(rows)
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.result = []
+        if sql.startswith("SELECT tip_block_id AS block_id"):
+            if self.active_tip is not None:
+                block = self.blocks[self.active_tip]
+                self.result = [{"block_id": block["block_id"], "block_hash": block["block_hash"],
+                                "height": block["height"], "cumulative_work": block["cumulative_work"],
+                                "timestamp": None}]
+        elif sql.startswith("SELECT block_id, height, cumulative_work FROM ChainTips"):
+            best = sorted(self.tips.items(), key=lambda tip: (-tip[1][1], tip[0]))[:1]
+            self.result = [{"block_id": b, "height": h, "cumulative_work": w} for b, (h, w) in best]
+        elif sql.startswith("SELECT t.block_id, t.height"):
+            self.result = [{"block_id": b, "height": h, "cumulative_work": w,
+                            "block_hash": self.blocks[b]["block_hash"], "is_active": self.blocks[b]["is_active"]}
+                           for b, (h, w) in sorted(self.tips.items(), key=lambda tip: -tip[1][1])]
+        elif sql.startswith("SELECT block_id, previous_block_id, height"):
+            self.block_lookups += 1
+            block = self.blocks.get(params[0])
+            self.result = [dict(block)] if block else []
+        elif sql.startswith("SELECT block_id, block_hash, previous_block_id, target, work"):
+            self.result = [dict(b) for b in self.blocks.values() if b["is_active"]]
+        elif sql.startswith("INSERT INTO Blocks"):
+            (block_hash, previous_block_id, timestamp, nonce, target, work,
+             _, _, height, cumulative_work) = params
+            self.lastrowid = len(self.blocks) + 1
+            self.blocks[self.lastrowid] = {
+                "block_id": self.lastrowid, "block_hash": block_hash, "previous_block_id": previous_block_id,
+                "target": target, "work": work, "height": height, "cumulative_work": cumulative_work,
+                "is_active": False, "first_tx_timestamp": None, "last_tx_timestamp": None}
+        elif sql.startswith("DELETE FROM ChainTips"):
+            self.tips.pop(params[0], None)
+        elif sql.startswith("INSERT INTO ChainTips"):
+            self.tips[params[0]] = (params[1], params[2])
+        elif sql.startswith("UPDATE Blocks SET is_active"):
+            self.blocks[params[0]]["is_active"] = "TRUE" in sql
+        elif sql.startswith("UPDATE Wallets w JOIN BlockDeltas"):
+            sign, block_id = params
+            for delta_block, wallet_id, delta in self.deltas:
+                if delta_block == block_id:
+                    self.wallets[wallet_id] += sign * delta
+        elif sql.startswith("UPDATE Transactions SET block_id = NULL"):
+            for tx in self.transactions:
+                if tx["block_id"] == params[0] and tx["sender_wallet_id"] is not None:
+                    tx.update(block_id=None, status="pending")
+        else:
+            raise AssertionError(f"Unexpected statement: {sql}")
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+
+def _hash(n):
+    return f"{n:064x}"
+
+
+def _chain(store, parent, length, start, target=EASY, reward_to=None):
+    block_id = parent
+    for i in range(length):
+        block_id = store.add_block(_hash(start + i), block_id, 0, target,
+                                   deltas={reward_to: 10} if reward_to else None)
+    return block_id
+
+
+@pytest.fixture
+def store():
+    return chain_store.ChainStore(FakeChainDB())
+
+
+def test_linear_chain_keeps_the_newest_block_active(store):
+    tip = _chain(store, None, 3, 1)
+    assert store.get_active_tip()["block_id"] == tip
+    assert [t["block_id"] for t in store.get_tips()] == [tip]
+    assert store.get_active_tip()["cumulative_work"] == 3
+    assert store.verify_active_chain()
+
+
+def test_heaviest_tip_wins_over_the_longest(store):
+    genesis = store.add_block(_hash(1), None, 0, EASY)
+    long_tip = _chain(store, genesis, 3, 10)          # cumulative work 4
+    heavy = store.add_block(_hash(20), genesis, 0, HARD)  # cumulative work 5 in one block
+    assert store.get_active_tip()["block_id"] == heavy
+    assert store.get_best_tip()["block_id"] == heavy
+    assert not store.conn.blocks[long_tip]["is_active"]
+    assert store.verify_active_chain()
+
+
+def test_equal_work_does_not_reorg(store):
+    main = _chain(store, None, 2, 1)
+    side = store.add_block(_hash(30), 1, 0, EASY)
+    assert store.get_active_tip()["block_id"] == main
+    assert not store.conn.blocks[side]["is_active"]
+
+
+def test_reorg_undoes_and_reapplies_deltas_and_returns_transactions(store):
+    db = store.conn
+    genesis = store.add_block(_hash(1), None, 0, EASY)
+    old_tip = _chain(store, genesis, 2, 10, reward_to=1)
+    assert db.wallets == {1: 20, 2: 0}
+    db.transactions = [
+        {"block_id": old_tip, "status": "confirmed", "sender_wallet_id": 2},
+        {"block_id": old_tip, "status": "confirmed", "sender_wallet_id": None},   # its reward
+        {"block_id": genesis, "status": "confirmed", "sender_wallet_id": 2},
+    ]
+
+    new_tip = _chain(store, genesis, 3, 20, reward_to=2)
+    assert store.get_active_tip()["block_id"] == new_tip
+    assert db.wallets == {1: 0, 2: 30}
+    assert db.transactions[0] == {"block_id": None, "status": "pending", "sender_wallet_id": 2}
+    assert db.transactions[1]["block_id"] == old_tip
+    assert db.transactions[2]["block_id"] == genesis
+    assert store.verify_active_chain()
+
+
+def test_find_fork_walks_only_the_forked_blocks(store):
+    db = store.conn
+    trunk = _chain(store, None, 60, 1)
+    branch_base = db.blocks[db.blocks[trunk]["previous_block_id"]]["previous_block_id"]
+    side = _chain(store, branch_base, 2, 100)
+
+    db.block_lookups = 0
+    fork_point, reverted, applied = store.find_fork(trunk, side)
+    assert fork_point == branch_base
+    assert reverted == [trunk, trunk - 1]
+    assert applied == [side - 1, side]
+    assert db.block_lookups <= 2 * (len(reverted) + 1)
+
+
+def test_select_best_chain_activates_the_heaviest_tip(store):
+    db = store.conn
+    genesis = store.add_block(_hash(1), None, 0, EASY)
+    main = _chain(store, genesis, 2, 10)
+    side = _chain(store, genesis, 1, 20)
+    # Another process added work to the side branch behind this store's back
+    db.tips[side] = (1, 10)
+    assert store.select_best_chain()["block_id"] == side
+    assert store.get_active_tip()["block_id"] == side
+    assert not db.blocks[main]["is_active"]
+
+
+def test_verify_active_chain_detects_a_broken_link(store):
+    tip = _chain(store, None, 4, 1)
+    assert store.verify_active_chain()
+    store.conn.blocks[tip]["cumulative_work"] += 1
+    assert not store.verify_active_chain()
+
+
+def test_invalid_blocks_are_rejected(store):
+    with pytest.raises(ValueError):
+        store.add_block("f" * 64, None, 0, HARD)         # hash above target
+    with pytest.raises(ValueError):
+        store.add_block(_hash(1), 99, 0, EASY)            # unknown parent
+    assert store.conn.rollbacks == 1
+    assert store.conn.blocks == {}
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import change_feed
+
+
+class FakeTables:
+    # Committed ids of Blocks, Transactions and Alerts, answering the feed's queries
+    def __init__(self, blocks=(), transactions=(), alerts=()):
+        self.ids = {'block': set(blocks), 'transaction': set(transactions), 'alert': set(alerts)}
+        self.result = []
+
+    def cursor(self, **kwargs):
+        return self
+
+    def commit(self, kind, *ids):
+        self.ids[kind].update(ids)
+
+    def _row(self, kind, row_id):
+        return {'kind': kind, 'id': row_id, 'ts': datetime(2026, 1, 1), 'user_a': 1, 'user_b': 2,
+                'text_a': f"{row_id:064x}", 'text_b': "alice", 'text_c': "bob", 'amount': 1, 'number': None}
+
+    def execute(self, sql, params=()):
+        if "MAX(block_id)" in sql:
+            self.result = [{kind: max(ids, default=0) for kind, ids in self.ids.items()}]
+        elif sql.startswith("SELECT"):
+            kind = {'Blocks': 'block', 'Transactions': 'transaction', 'Alerts': 'alert'}[sql.split()[5]]
+            self.result = [{'id': i} for i in self.ids[kind] if i > params[0]]
+        else:
+            # One branch per kind: the high-water mark, the missing ids, then the limit
+            self.result, params = [], list(params)
+            for kind, branch in zip(change_feed.KINDS, sql.split("UNION ALL")):
+                count = branch.count("%s")
+                high_water, missing, limit = params[0], set(params[1:count - 1]), params[count - 1]
+                params = params[count:]
+                found = sorted(i for i in self.ids[kind] if i > high_water or i in missing)[:limit]
+                self.result += [self._row(kind, i) for i in found]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+
+def _ids(events, kind='transaction'):
+    return [e[f'{kind}_id'] for e in events if e['kind'] == kind]
+
+
+def test_first_poll_starts_at_the_end_of_each_table():
+    tables = FakeTables(blocks=[1, 2], transactions=[1, 2, 3])
+    feed = change_feed.ChangeFeed(conn_factory=None)
+    assert feed.poll_once(tables) == []
+    tables.commit('transaction', 4)
+    assert _ids(feed.poll_once(tables)) == [4]
+    assert feed.poll_once(tables) == []
+
+
+def test_id_committed_after_a_larger_one_is_delivered_once():
+    tables = FakeTables(transactions=[1])
+    feed = change_feed.ChangeFeed(conn_factory=None)
+    feed.poll_once(tables)
+    tables.commit('transaction', 3)              # 2 was inserted first but has not committed
+    assert _ids(feed.poll_once(tables)) == [3]
+    assert feed.missing['transaction'] == {2}
+    tables.commit('transaction', 2)
+    assert _ids(feed.poll_once(tables)) == [2]
+    assert feed.missing['transaction'] == set()
+    assert feed.poll_once(tables) == []
+
+
+def test_uncommitted_ids_below_the_starting_mark_are_watched():
+    tables = FakeTables(alerts=[1, 3])
+    feed = change_feed.ChangeFeed(conn_factory=None)
+    feed.poll_once(tables)
+    tables.commit('alert', 2)
+    assert _ids(feed.poll_once(tables), 'alert') == [2]
+
+
+def test_ids_that_never_commit_fall_out_of_the_window(monkeypatch):
+    monkeypatch.setattr(change_feed, "RESCAN_WINDOW", 5)
+    tables = FakeTables(blocks=[1])
+    feed = change_feed.ChangeFeed(conn_factory=None)
+    feed.poll_once(tables)
+    tables.commit('block', 3)                    # 2 was rolled back
+    feed.poll_once(tables)
+    assert feed.missing['block'] == {2}
+    tables.commit('block', 4, 5, 6, 7, 8)
+    assert _ids(feed.poll_once(tables), 'block') == [4, 5, 6, 7, 8]
+    assert feed.missing['block'] == set()
+
+
+def test_listeners_receive_late_events():
+    tables = FakeTables(transactions=[1])
+    feed = change_feed.ChangeFeed(conn_factory=None)
+    received = []
+    feed.add_listener(lambda events: received.extend(_ids(events)))
+    feed.poll_once(tables)
+    tables.commit('transaction', 3)
+    feed.poll_once(tables)
+    tables.commit('transaction', 2)
+    feed.poll_once(tables)
+    assert received == [3, 2]
+
+
+def test_merge_recent_orders_late_rows_by_sort_key():
+    rows = [{'block_id': 5}, {'block_id': 3}]
+    merged = change_feed.merge_recent(rows, [{'block_id': 4}, {'block_id': 5}], 'block_id', 10, sort_key='block_id')
+    assert [r['block_id'] for r in merged] == [5, 4, 3]
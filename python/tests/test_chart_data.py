@@ -0,0 +1,55 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import chart_data
+
+
+def test_lttb_keeps_endpoints_and_returns_n_increasing_indices():
+    x = np.arange(1000)
+    y = np.sin(x / 20.0)
+    picked = chart_data.lttb(x, y, 50)
+    assert len(picked) == 50
+    assert picked[0] == 0 and picked[-1] == 999
+    assert np.all(np.diff(picked) > 0)
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(1000)
+    y[637] = 100.0
+    assert 637 in chart_data.lttb(np.arange(1000), y, 20)
+
+
+def test_lttb_returns_everything_when_already_small():
+    assert chart_data.lttb([0, 1, 2], [5, 6, 7], 10).tolist() == [0, 1, 2]
+    assert chart_data.lttb(range(10), range(10), 2).tolist() == list(range(10))
+
+
+def test_downsample_keeps_original_x_values():
+    start = datetime(2025, 1, 1)
+    points = [(start + timedelta(days=i), i % 7) for i in range(2000)]
+    xs, ys = chart_data.downsample(points, max_points=100)
+    assert len(xs) == len(ys) == 100
+    assert xs[0] == points[0][0] and xs[-1] == points[-1][0]
+    assert all(isinstance(x, datetime) for x in xs)
+    assert chart_data.downsample([]) == ([], [])
+
+
+def test_downsample_accepts_dates_and_null_values():
+    points = [(date(2025, 1, 1) + timedelta(days=i), None if i % 2 else i) for i in range(10)]
+    xs, ys = chart_data.downsample(points, max_points=400)
+    assert len(xs) == 10 and ys[1] == 0.0
+
+
+def test_choose_bucket_keeps_the_series_under_the_limit():
+    end = datetime(2026, 1, 1)
+    assert chart_data.choose_bucket(end - timedelta(days=30), end) == "day"
+    assert chart_data.choose_bucket(end - timedelta(days=3 * 365), end) == "week"
+    assert chart_data.choose_bucket(end - timedelta(days=30 * 365), end) == "month"
+
+
+def test_range_start():
+    end = datetime(2026, 1, 1)
+    assert chart_data.range_start("Last 30 days", end) == end - timedelta(days=30)
+    assert chart_data.range_start("All time", end, first=datetime(2020, 5, 1)) == datetime(2020, 5, 1)
+    assert chart_data.range_start("All time", end) == end - timedelta(days=1)
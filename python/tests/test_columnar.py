@@ -0,0 +1,27 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+import columnar
+
+
+def test_null_datetime_decodes_as_missing():
+    decoded = columnar._decode((0, None, 86400), "datetime")
+    assert decoded[0] == np.datetime64("1970-01-01T00:00:00")
+    assert np.isnat(decoded[1])
+    assert decoded[2] == np.datetime64("1970-01-02T00:00:00")
+    assert pd.isna(columnar.to_frame({"timestamp": decoded})["timestamp"][1])
+
+
+def test_fixed_point_sums_are_exact():
+    amounts = columnar._decode((10000000, 20000000, 1), "fixed")     # 0.1, 0.2, 0.00000001
+    assert columnar.sum_fixed(amounts) == Decimal("0.30000001")
+    assert columnar.sum_fixed(amounts, amounts > 5) == Decimal("0.3")
+
+
+def test_group_sum():
+    keys = columnar._decode(("Sent", "Received", "Sent"), "str")
+    values = columnar._decode((150000000, 25000000, 50000000), "fixed")
+    assert columnar.group_sum(keys, values) == {"Received": Decimal("0.25"), "Sent": Decimal("2")}
+    assert columnar.group_sum(keys[:0], values[:0]) == {}
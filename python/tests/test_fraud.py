@@ -0,0 +1,199 @@
+import threading
+
+import numpy as np
+import pytest
+
+import fraud
+
+
+def _history(scorer, sender=1, count=20, amount=20.0, start=1_000_000.0, gap=86400.0):
+    for i in range(count):
+        scorer.score_one(sender, 100 + i % 3, amount * (1 + 0.05 * (i % 4)), start + i * gap)
+    return start + count * gap
+
+
+def test_outlier_amount_scores_above_typical_amount():
+    scorer = fraud.FraudScorer()
+    now = _history(scorer)
+    typical, _ = scorer.score_one(1, 100, 21.0, now)
+    outlier, components = scorer.score_one(1, 100, 50000.0, now + 86400)
+    assert outlier > typical
+    assert components[fraud.FEATURES.index("amount_zscore")] == 1.0
+
+
+def test_new_wallet_amount_is_not_scored_before_min_history():
+    scorer = fraud.FraudScorer()
+    _, components = scorer.score_one(7, 8, 1e9, 0.0)
+    assert components[fraud.FEATURES.index("amount_zscore")] == 0.0
+
+
+def test_burst_raises_velocity():
+    scorer = fraud.FraudScorer()
+    components = None
+    for i in range(30):
+        _, components = scorer.score_one(3, 4, 10.0, 5000.0 + i)
+    assert components[fraud.FEATURES.index("velocity")] == 1.0
+
+
+def test_batch_matches_one_at_a_time():
+    rng = np.random.default_rng(1)
+    n = 500
+    senders = rng.integers(1, 20, n)
+    receivers = rng.integers(1, 200, n)
+    amounts = rng.lognormal(3, 1, n)
+    timestamps = np.sort(rng.uniform(0, 30 * fraud.SECONDS_PER_DAY, n))
+
+    batched, _ = fraud.FraudScorer().score_batch(senders, receivers, amounts, timestamps)
+    single = fraud.FraudScorer()
+    one_by_one = [single.score_one(s, r, a, t)[0] for s, r, a, t in zip(senders, receivers, amounts, timestamps)]
+    np.testing.assert_allclose(batched, one_by_one)
+
+
+def test_scorer_grows_for_large_wallet_ids():
+    scorer = fraud.FraudScorer(capacity=16)
+    scorer.score_one(10_000, 1, 5.0, 0.0)
+    assert scorer.capacity > 10_000
+    assert scorer.count[10_000] == 1
+
+
+def test_occurrence_rank():
+    ranks = fraud._occurrence_rank(np.array([5, 3, 5, 5, 3, 9]))
+    assert ranks.tolist() == [0, 0, 1, 2, 1, 0]
+
+
+class _EmptyHistory:
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+def test_get_scorer_returns_null_scorer_until_warm(monkeypatch):
+    monkeypatch.setattr(fraud, "_scorer", None)
+    monkeypatch.setattr(fraud, "_warmer", None)
+    release = threading.Event()
+
+    def slow_connection():
+        release.wait(5)
+        return _EmptyHistory()
+
+    fraud.warm_scorer(slow_connection)
+    warmer = fraud._warmer
+    assert fraud.get_scorer() is fraud.NULL_SCORER
+    assert fraud.NULL_SCORER.score_one(1, 2, 1e9)[0] == 0.0
+
+    release.set()
+    warmer.join(5)
+    assert isinstance(fraud.get_scorer(), fraud.FraudScorer)
+
+
+def test_unfolded_score_leaves_state_until_observed():
+    scorer = fraud.FraudScorer()
+    now = _history(scorer)
+    before = scorer.count[1]
+    first, _ = scorer.score_one(1, 100, 21.0, now, fold=False)
+    again, _ = scorer.score_one(1, 100, 21.0, now, fold=False)
+    assert first == again and scorer.count[1] == before
+    scorer.observe(1, 100, 21.0, now)
+    assert scorer.count[1] == before + 1
+
+
+def test_concurrent_updates_are_all_kept():
+    scorer = fraud.FraudScorer(capacity=16)
+
+    def observe_many(wallet):
+        for i in range(300):
+            scorer.observe(wallet % 3, 9, 5.0, float(i))
+
+    threads = [threading.Thread(target=observe_many, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert scorer.count[:3].sum() == 6 * 300
+
+
+class _HoldCursor:
+    # Records statements; `covered` says whether the receiver can still return the amount
+    def __init__(self, covered=True, hold=None):
+        self.covered = covered
+        self.hold = hold
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.statements.append((sql, params))
+        self.rowcount = 1 if sql.startswith("UPDATE Wallets w JOIN") and self.covered else 0
+
+    def executemany(self, sql, rows):
+        self.statements.append((" ".join(sql.split()), list(rows)))
+
+    def fetchone(self):
+        return self.hold
+
+    def sql(self):
+        return [sql for sql, _ in self.statements]
+
+
+def _flag(score):
+    return [(42, score, np.array([1.0, 0.0, 0.0, 0.0]))]
+
+
+def test_hold_takes_the_amount_back_from_the_receiver():
+    cursor = _HoldCursor()
+    fraud.record_flags(cursor, _flag(0.9))
+    sql = cursor.sql()
+    assert sql[0].startswith("UPDATE Wallets w JOIN Transactions t")
+    assert sql[1].startswith("INSERT INTO TransactionHolds") and cursor.statements[1][1][0] == 42
+    assert sql[2] == "UPDATE Transactions SET status = 'held' WHERE transaction_id = %s"
+    assert sql[3].startswith("INSERT INTO Alerts")
+
+
+def test_no_hold_when_the_receiver_already_spent_the_amount():
+    cursor = _HoldCursor(covered=False)
+    fraud.record_flags(cursor, _flag(0.9))
+    assert not any("TransactionHolds" in sql or "'held'" in sql for sql in cursor.sql())
+    assert cursor.sql()[-1].startswith("INSERT INTO Alerts")
+
+
+def test_alert_only_below_hold_threshold():
+    cursor = _HoldCursor()
+    fraud.record_flags(cursor, _flag(0.6))
+    assert len(cursor.sql()) == 1 and cursor.sql()[0].startswith("INSERT INTO Alerts")
+
+
+_HOLD = {"transaction_id": 42, "amount": 10, "fee": 1, "sender_wallet_id": 1, "receiver_wallet_id": 2}
+
+
+def test_release_credits_the_receiver_and_returns_the_transfer_to_the_mempool():
+    cursor = _HoldCursor(hold=dict(_HOLD))
+    fraud.release_hold(cursor, 42)
+    statements = cursor.statements
+    assert ("UPDATE Wallets SET balance = balance + %s WHERE wallet_id = %s", (10, 2)) in statements
+    assert ("UPDATE Transactions SET status = 'pending' WHERE transaction_id = %s", (42,)) in statements
+    assert any(sql.startswith("UPDATE TransactionHolds SET released = TRUE") for sql in cursor.sql())
+
+
+def test_reject_refunds_the_sender_and_removes_the_ledger_legs():
+    cursor = _HoldCursor(hold=dict(_HOLD))
+    fraud.reject_hold(cursor, 42)
+    statements = cursor.statements
+    assert ("UPDATE Wallets SET balance = balance + %s WHERE wallet_id = %s", (11, 1)) in statements
+    assert ("UPDATE Transactions SET status = 'rejected' WHERE transaction_id = %s", (42,)) in statements
+    assert ("DELETE FROM WalletLedger WHERE transaction_id = %s", (42,)) in statements
+    assert any(sql.startswith("UPDATE TransactionHolds SET rejected = TRUE") for sql in cursor.sql())
+
+
+def test_resolving_a_transfer_without_an_open_hold_fails():
+    with pytest.raises(ValueError):
+        fraud.release_hold(_HoldCursor(), 42)
+    with pytest.raises(ValueError):
+        fraud.reject_hold(_HoldCursor(), 42)
@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import miner
+
+
+class FakeMinerConnection:
+    # Records the statements and transaction boundaries of MiningDaemon.mine
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.events = []
+        self.result = []
+
+    def cursor(self, **kwargs):
+        return self
+
+    def start_transaction(self):
+        self.events.append("begin")
+
+    def commit(self):
+        self.events.append("commit")
+
+    def rollback(self):
+        self.events.append("rollback")
+
+    def callproc(self, name, args=()):
+        self.events.append(name)
+        if name == self.fail_on:
+            raise RuntimeError("Invalid sender or receiver wallet")
+
+    def execute(self, sql, params=()):
+        self.result = [{"tip_block_id": 7}]
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+
+def test_mining_reason_checks_each_threshold():
+    assert miner.mining_reason(None) is None
+    assert miner.mining_reason({"pending": 0, "pending_bytes": 0, "oldest_age": None}) is None
+    assert miner.mining_reason({"pending": 10, "pending_bytes": 0, "oldest_age": 0}, max_count=10) == "count"
+    assert miner.mining_reason({"pending": 1, "pending_bytes": 500, "oldest_age": 0},
+                               max_count=10, max_bytes=500) == "bytes"
+    assert miner.mining_reason({"pending": 1, "pending_bytes": 0, "oldest_age": 61},
+                               max_count=10, max_bytes=500, max_age=60) == "age"
+    assert miner.mining_reason({"pending": 1, "pending_bytes": 0, "oldest_age": 5},
+                               max_count=10, max_bytes=500, max_age=60) is None
+
+
+def test_mine_commits_block_and_reward_together():
+    conn = FakeMinerConnection()
+    assert miner.MiningDaemon(1, conn_factory=None).mine(conn) == 7
+    assert conn.events == ["begin", "mine_block", "distribute_mining_reward", "commit"]
+
+
+def test_failed_reward_rolls_back_the_block():
+    conn = FakeMinerConnection(fail_on="distribute_mining_reward")
+    with pytest.raises(RuntimeError):
+        miner.MiningDaemon(1, conn_factory=None).mine(conn)
+    assert conn.events == ["begin", "mine_block", "distribute_mining_reward", "rollback"]
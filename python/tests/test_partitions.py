@@ -0,0 +1,115 @@
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import partitions
+
+
+class FakeCatalog:
+    # Answers the catalog and row-existence queries archive() makes and records every statement
+    def __init__(self, partitions_list, partition_rows=True, archive_rows=False, archive_partitioned=True,
+                 unmined=False):
+        self.partitions = partitions_list
+        self.partition_rows = partition_rows
+        self.archive_rows = archive_rows
+        self.archive_partitioned = archive_partitioned
+        self.unmined = unmined
+        self.statements = []
+        self.result = []
+        self.commits = 0
+
+    def cursor(self, **kwargs):
+        return self
+
+    def commit(self):
+        self.commits += 1
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        if "information_schema.PARTITIONS" in sql and "PARTITION_NAME IS NOT NULL" in sql:
+            self.result = [(1 if self.archive_partitioned else 0,)]
+        elif "information_schema.PARTITIONS" in sql:
+            self.result = self.partitions
+        elif "WHERE block_id IS NULL" in sql:
+            self.result = [(1,)] if self.unmined else []
+        elif sql.startswith("SELECT 1 FROM Transactions PARTITION"):
+            self.result = [(1,)] if self.partition_rows else []
+        elif sql.startswith("SELECT 1 FROM TransactionsArchive_"):
+            self.result = [(1,)] if self.archive_rows else []
+        elif sql.startswith("SELECT transaction_id FROM TransactionsArchive_"):
+            self.result = [(5,), (6,)] if params[0] == 0 else []
+        elif "EXCHANGE PARTITION" in sql:
+            self.partition_rows, self.archive_rows = self.archive_rows, self.partition_rows
+        elif "REMOVE PARTITIONING" in sql:
+            self.archive_partitioned = False
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def ddl(self):
+        return [s for s in self.statements if not s.startswith("SELECT")]
+
+
+MONTHS = [("p_202501", datetime(2025, 2, 1), 10), ("p_202502", datetime(2025, 3, 1), 10),
+          ("p_future", None, 0)]
+TODAY = date(2025, 6, 15)
+
+
+def test_month_arithmetic():
+    assert partitions._add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert partitions._add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partitions.partition_name(date(2025, 3, 1)) == "p_202503"
+
+
+def test_block_filter_adds_the_timestamp_range_when_known():
+    assert partitions.block_filter({"block_id": 3}) == ("t.block_id = %s", [3])
+    sql, params = partitions.block_filter({"block_id": 3, "first_tx_timestamp": 1, "last_tx_timestamp": 2}, alias=None)
+    assert sql == "block_id = %s AND timestamp BETWEEN %s AND %s" and params == [3, 1, 2]
+
+
+def test_archive_exchanges_before_deleting_children_and_drops_last():
+    db = FakeCatalog(MONTHS[1:])
+    assert partitions.archive(db, retain_months=3, today=TODAY) == [("p_202502", "exported to TransactionsArchive_202502")]
+    assert db.ddl() == [
+        "CREATE TABLE IF NOT EXISTS TransactionsArchive_202502 LIKE Transactions",
+        "ALTER TABLE TransactionsArchive_202502 REMOVE PARTITIONING",
+        "ALTER TABLE Transactions EXCHANGE PARTITION p_202502 WITH TABLE TransactionsArchive_202502",
+        "DELETE FROM WalletLedger WHERE transaction_id IN (%s, %s)",
+        "DELETE FROM TransactionLogs WHERE transaction_id IN (%s, %s)",
+        "DELETE FROM TransactionHolds WHERE transaction_id IN (%s, %s)",
+        "ALTER TABLE Transactions DROP PARTITION p_202502",
+    ]
+
+
+def test_archive_resumes_a_month_exchanged_by_an_interrupted_run():
+    db = FakeCatalog(MONTHS[1:], partition_rows=False, archive_rows=True, archive_partitioned=False)
+    assert partitions.archive(db, retain_months=3, today=TODAY)[0][1] == "exported to TransactionsArchive_202502"
+    assert not any("EXCHANGE" in s or "REMOVE PARTITIONING" in s for s in db.ddl())
+    assert db.ddl()[-1] == "ALTER TABLE Transactions DROP PARTITION p_202502"
+
+
+def test_archive_skips_when_both_sides_hold_rows():
+    db = FakeCatalog(MONTHS[1:], partition_rows=True, archive_rows=True, archive_partitioned=False)
+    assert partitions.archive(db, retain_months=3, today=TODAY)[0][1].startswith("skipped")
+    assert not any("DELETE" in s or "DROP" in s or "EXCHANGE" in s for s in db.ddl())
+
+
+def test_archive_without_export_drops_the_archive_table():
+    db = FakeCatalog(MONTHS[1:])
+    assert partitions.archive(db, retain_months=3, export=False, today=TODAY) == [("p_202502", "dropped")]
+    assert db.ddl()[-1] == "DROP TABLE TransactionsArchive_202502"
+
+
+def test_archive_keeps_months_with_unmined_transactions_and_recent_months():
+    db = FakeCatalog(MONTHS, unmined=True)
+    assert partitions.archive(db, retain_months=3, today=TODAY) == [
+        ("p_202501", "skipped: unmined transactions"), ("p_202502", "skipped: unmined transactions")]
+    assert partitions.archive(FakeCatalog(MONTHS), retain_months=12, today=TODAY) == []
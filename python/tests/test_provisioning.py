@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import provisioning
+
+
+def _row(n, **overrides):
+    row = {"name": f"user{n}", "email": f"user{n}@example.com", "password": "long-enough"}
+    row.update(overrides)
+    return row
+
+
+def test_validate_row_checks_column_limits_and_balance():
+    assert provisioning.validate_row(_row(1)) is None
+    assert provisioning.validate_row(_row(1, name="x" * 101)) == "name_too_long"
+    assert provisioning.validate_row(_row(1, email="a" * 250 + "@example.com")) == "email_too_long"
+    assert provisioning.validate_row(_row(1, email="nope")) == "invalid_email"
+    assert provisioning.validate_row(_row(1, password="short")) == "weak_password"
+    for balance in ("abc", "-1", "1e12", "NaN", "inf", "0.123456789"):
+        assert provisioning.validate_row(_row(1, balance=balance)) == "invalid_balance"
+    assert provisioning.validate_row(_row(1, balance="250.5")) is None
+
+
+def test_parse_balance():
+    assert provisioning.parse_balance("") is None
+    assert provisioning.parse_balance(None) is None
+    assert provisioning.parse_balance(" 12.50 ") == Decimal("12.50")
+    assert provisioning.parse_balance(1000000) == Decimal(1000000)
+
+
+class FakeInsert:
+    # Stands in for _insert_chunk: a group containing a "bad" email fails like the database
+    def __init__(self):
+        self.attempts = 0
+        self.created = []
+
+    def __call__(self, conn, cursor, entries, balance, step):
+        self.attempts += 1
+        if any(e["email"].startswith("bad") for e in entries):
+            raise provisioning.mysql.connector.DataError("Data too long for column")
+        for entry in entries:
+            entry["report"]["status"] = "created"
+            self.created.append(entry["email"])
+
+
+def _entries(emails):
+    return [{"email": email, "report": {"status": None, "error": None}} for email in emails]
+
+
+def test_failing_group_is_bisected_to_the_bad_rows(monkeypatch):
+    fake = FakeInsert()
+    monkeypatch.setattr(provisioning, "_insert_chunk", fake)
+    emails = [f"user{n}@example.com" for n in range(16)]
+    emails[5] = "bad5@example.com"
+    emails[12] = "bad12@example.com"
+    group = _entries(emails)
+
+    provisioning._insert_group(None, None, group, 100, 1)
+    statuses = {e["email"]: e["report"]["status"] for e in group}
+    assert statuses["bad5@example.com"] == "failed" and statuses["bad12@example.com"] == "failed"
+    assert sum(status == "created" for status in statuses.values()) == 14
+    assert group[5]["report"]["error"] == "Data too long for column"
+    assert fake.attempts < len(group)
+
+
+def test_clean_group_is_inserted_in_one_attempt(monkeypatch):
+    fake = FakeInsert()
+    monkeypatch.setattr(provisioning, "_insert_chunk", fake)
+    provisioning._insert_group(None, None, _entries([f"u{n}@example.com" for n in range(50)]), 100, 1)
+    assert fake.attempts == 1 and len(fake.created) == 50
+
+
+def test_provision_users_reports_each_row(monkeypatch):
+    class Cursor:
+        def execute(self, sql, params=()):
+            pass
+
+        def fetchone(self):
+            return (1,)
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+    fake = FakeInsert()
+    monkeypatch.setattr(provisioning, "_insert_chunk", fake)
+    reports = provisioning.provision_users(Conn(), [
+        _row(1), _row(2, email="bad2@example.com"), _row(3, balance="oops"), _row(1), _row(4, balance="5"),
+    ], workers=0)
+    assert [r["status"] for r in reports] == ["created", "failed", "invalid_balance", "duplicate", "created"]
+    assert reports[1]["error"] and reports[0]["error"] is None
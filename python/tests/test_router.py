@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import database
+import replica_standin
+
+
+class FakeConnection:
+    def __init__(self, name):
+        self.name = name
+        self.autocommit = False
+
+    def is_connected(self):
+        return True
+
+    def cursor(self, **kwargs):
+        return FakeCursor()
+
+
+class FakeCursor:
+    def execute(self, query, params=()):
+        pass
+
+
+class FakeTopology:
+    # A replica has caught up once `applied` reaches the position of the write
+    def __init__(self):
+        self.written = 0
+        self.applied = 0
+
+    def position(self, primary_conn):
+        self.written += 1
+        return ("seq", self.written)
+
+    def caught_up(self, replica_conn, position):
+        return self.applied >= position[1]
+
+
+def _router(replicas=1):
+    topology = FakeTopology()
+    router = database.Router(lambda: FakeConnection("primary"),
+                             [lambda i=i: FakeConnection(f"replica-{i}") for i in range(replicas)],
+                             topology, read_routes={"home"})
+    return router, topology
+
+
+def test_unrouted_reads_go_to_the_primary():
+    router, _ = _router()
+    assert router.read_connection("profile", {})[0] == "primary"
+
+
+def test_without_replicas_everything_goes_to_the_primary():
+    router = database.Router(lambda: FakeConnection("primary"), [], FakeTopology())
+    session = {}
+    router.record_write(session)
+    assert router.read_connection("home", session)[0] == "primary"
+    assert "last_write_position" not in session
+
+
+def test_read_your_writes_until_the_replica_catches_up():
+    router, topology = _router()
+    session = {}
+    assert router.read_connection("home", session)[0] == "replica-0"
+
+    router.record_write(session)
+    assert router.read_connection("home", session)[0] == "primary"
+
+    topology.applied = topology.written
+    assert router.read_connection("home", session)[0] == "replica-0"
+    assert session["last_write_position"] is None
+
+
+def test_replicas_are_used_round_robin():
+    router, _ = _router(replicas=2)
+    session = {}
+    targets = [router.read_connection("home", session)[0] for _ in range(4)]
+    assert targets == ["replica-0", "replica-1", "replica-0", "replica-1"]
+
+
+def test_connections_are_cached_per_session():
+    router, _ = _router()
+    session = {}
+    first = router.primary(session)
+    assert router.primary(session) is first
+    assert first.autocommit is True
+
+
+def test_read_cursor_records_latency_per_route_and_target():
+    router, _ = _router()
+    session = {}
+    router.read_cursor("home", session).execute("SELECT 1")
+    router.read_cursor("profile", session).execute("SELECT 1")
+    snapshot = router.metrics.snapshot()
+    assert snapshot["home"]["replica-0"]["count"] == 1
+    assert snapshot["profile"]["primary"]["count"] == 1
+    assert snapshot["home"]["replica-0"]["p99_ms"] >= 0
+
+
+# Against a real primary/replica stand-in. ROUTER_STANDIN_DB names a scratch database on
+# the DB_HOST server (its "<name>_replica" twin is created and overwritten).
+@pytest.fixture
+def cluster():
+    name = os.environ.get("ROUTER_STANDIN_DB")
+    if not name:
+        pytest.skip("set ROUTER_STANDIN_DB to a scratch database to run the stand-in tests")
+    cluster = replica_standin.StandInCluster(dict(database.PRIMARY_CONFIG, database=name))
+    try:
+        cluster.setup()
+    except database.mysql.connector.Error as e:
+        pytest.skip(f"MySQL unavailable: {e}")
+    return cluster
+
+
+def test_router_against_standin(cluster):
+    router = cluster.router()
+    session = {}
+    assert router.read_connection("home", session)[0] == "replica-0"
+
+    router.record_write(session)
+    assert router.read_connection("home", session)[0] == "primary"
+
+    cluster.sync()
+    assert router.read_connection("home", session)[0] == "replica-0"
+
+    router.read_cursor("home", session).execute("SELECT COUNT(*) AS blocks FROM Blocks")
+    assert router.metrics.snapshot()["home"]["replica-0"]["count"] == 1
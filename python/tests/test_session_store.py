@@ -0,0 +1,159 @@
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import session_store
+
+SECRET = b"test-secret"
+
+
+class Context:
+    def __init__(self, cookies=None, headers=None):
+        self.cookies = cookies or {}
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_store, "_secret", lambda: SECRET)
+    return session_store.CachedSessionStore(session_store.SQLiteSessionStore(str(tmp_path / "sessions.db")), ttl=0)
+
+
+def test_sign_and_verify():
+    token = session_store.sign("abc123", SECRET)
+    assert session_store.verify(token, SECRET) == "abc123"
+    assert session_store.verify(token, b"other-secret") is None
+    assert session_store.verify("abc123." + "0" * 32, SECRET) is None
+    assert session_store.verify("abc123", SECRET) is None
+    assert session_store.verify(None, SECRET) is None
+
+
+def test_new_browser_gets_a_session_and_a_cookie(store):
+    state = {}
+    session_store.restore(state, Context(), store=store)
+    assert session_store.verify(state["session_cookie"]) == state["session_id"]
+    assert "document.cookie" in session_store.cookie_script(state)
+    assert "Secure" in session_store.cookie_script(state, secure=True)
+
+
+def test_session_is_restored_from_the_cookie_or_header(store):
+    store.put("s1", {"user_id": 7}, time.time() + 60)
+    token = session_store.sign("s1")
+
+    for context in (Context(cookies={session_store.TOKEN_COOKIE: token}),
+                    Context(headers={session_store.TOKEN_HEADER: token})):
+        state = {}
+        session_store.restore(state, context, store=store)
+        assert state["session_id"] == "s1" and state["user_id"] == 7
+        assert "session_cookie" not in state
+
+
+def test_forged_token_and_url_token_are_ignored(store):
+    store.put("s1", {"user_id": 7}, time.time() + 60)
+    state, query_params = {}, {session_store.LEGACY_TOKEN_PARAM: session_store.sign("s1")}
+    session_store.restore(state, Context(cookies={session_store.TOKEN_COOKIE: "s1." + "0" * 32}),
+                          query_params, store=store)
+    assert state["session_id"] != "s1" and "user_id" not in state
+    assert session_store.LEGACY_TOKEN_PARAM not in query_params
+
+
+def test_expired_session_comes_back_logged_out(store):
+    store.put("s1", {"user_id": 7}, time.time() - 1)
+    state = {}
+    session_store.restore(state, Context(cookies={session_store.TOKEN_COOKIE: session_store.sign("s1")}), store=store)
+    assert state["user_id"] is None
+    assert state["notification"]
+
+
+def test_login_rotates_the_session_id(store):
+    state = {}
+    session_store.restore(state, Context(), store=store)
+    session_store.save(state, store=store)
+    planted = state["session_id"]
+
+    # Login: rotate, then the page sets user_id and the run saves
+    session_store.rotate(state, store=store)
+    state["user_id"] = 7
+    session_store.save(state, store=store)
+
+    assert state["session_id"] != planted
+    assert store.get(planted) is None
+    assert store.get(state["session_id"])[0]["user_id"] == 7
+    assert session_store.verify(state["session_cookie"]) == state["session_id"]
+
+    # The pre-login token does not reach the logged-in session
+    other = {}
+    session_store.restore(other, Context(cookies={session_store.TOKEN_COOKIE: session_store.sign(planted)}),
+                          store=store)
+    assert other.get("user_id") is None
+
+
+def test_logout_ends_the_session_in_other_tabs(store):
+    store.put("s1", {"user_id": 7}, time.time() + 60)
+    tab = {}
+    session_store.restore(tab, Context(cookies={session_store.TOKEN_COOKIE: session_store.sign("s1")}), store=store)
+    store.delete("s1")                      # another tab logged out (rotate)
+    session_store.restore(tab, Context(), store=store)
+    assert tab["user_id"] is None
+
+
+def test_unchanged_session_is_not_rewritten_every_run(store):
+    state = {}
+    session_store.restore(state, Context(), store=store)
+    state["user_id"] = 7
+    session_store.save(state, store=store)
+    first_expiry = store.get(state["session_id"])[1]
+    session_store.restore(state, Context(), store=store)
+    session_store.save(state, store=store)
+    assert store.get(state["session_id"])[1] == first_expiry
+
+
+def test_concurrent_workers_agree_on_a_complete_secret(tmp_path, monkeypatch):
+    monkeypatch.delenv("SESSION_SECRET", raising=False)
+    monkeypatch.setattr(session_store, "SESSION_DB", str(tmp_path / "sessions.db"))
+    results, barrier = [], threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        results.append(session_store._secret.__wrapped__())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(results)) == 1 and len(results[0]) == 64
+    assert [p.name for p in tmp_path.iterdir()] == ["session_secret"]
+
+
+def test_read_your_writes_position_follows_the_session_to_another_worker(store):
+    state = {}
+    session_store.restore(state, Context(), store=store)
+    state["last_write_position"] = ("gtid", "uuid:1-42")
+    state["write_seen_by"] = {"replica-1", "replica-0"}
+    session_store.save(state, store=store)
+
+    other_worker = {}
+    cookie = {session_store.TOKEN_COOKIE: state["session_cookie"]}
+    session_store.restore(other_worker, Context(cookies=cookie), store=store)
+    assert other_worker["last_write_position"] == ("gtid", "uuid:1-42")
+    assert other_worker["write_seen_by"] == {"replica-0", "replica-1"}
+
+
+def test_timed_refresh_saves_changes_without_sliding_the_expiry(store):
+    state = {}
+    session_store.restore(state, Context(), store=store)
+    state["user_id"] = 7
+    session_store.save(state, store=store)
+    expires_at = store.get(state["session_id"])[1]
+
+    session_store.save(state, store=store, touch=False)
+    assert store.get(state["session_id"])[1] == expires_at
+
+    state["last_write_position"] = None
+    session_store.save(state, store=store, touch=False)
+    data, saved_expiry = store.get(state["session_id"])
+    assert "last_write_position" in data and saved_expiry == expires_at
@@ -0,0 +1,208 @@
+import hashlib
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import tx_index
+
+
+def _hash(n):
+    return hashlib.sha256(str(n).encode()).hexdigest()
+
+
+class FakeKeys:
+    # TransactionKeys as a list of committed (transaction_id, transaction_hash) rows, served
+    # both as the index's own connection and as a page's dictionary cursor
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.result = []
+        self.queries = 0
+
+    def is_connected(self):
+        return True
+
+    def cursor(self, **kwargs):
+        return self
+
+    def execute(self, sql, params=()):
+        self.queries += 1
+        if "MAX(transaction_id)" in sql:
+            self.result = [(max((i for i, _ in self.rows), default=0),)]
+        elif "transaction_id > %s" in sql:
+            after, limit = params
+            self.result = sorted(r for r in self.rows if r[0] > after)[:limit]
+        elif "LIKE" in sql:
+            head, _, tail = params[0].partition("%")
+            found = sorted(h for _, h in self.rows if h.startswith(head) and h.endswith(tail))
+            self.result = [{"matches": len(found)}] if "COUNT" in sql else \
+                [{"transaction_hash": h} for h in found[:params[1]]]
+        else:
+            wanted = set(params)
+            self.result = [{"transaction_hash": h, "found": 1} for _, h in self.rows if h in wanted]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+
+def _index(tmp_path, rows):
+    keys = FakeKeys(rows)
+    return tx_index.TransactionIndex(str(tmp_path), conn_factory=lambda: keys).open(), keys
+
+
+def test_bloom_has_no_false_negatives_and_a_bounded_false_positive_rate():
+    bloom = tx_index.BloomFilter(5000)
+    added = [_hash(n) for n in range(5000)]
+    for h in added:
+        bloom.add(h)
+    assert all(h in bloom for h in added)
+    false_positives = sum(_hash(n) in bloom for n in range(5000, 25000))
+    assert false_positives / 20000 < 3 * tx_index.BLOOM_ERROR_RATE
+
+
+def test_bloom_add_many_sets_the_same_bits_as_add():
+    one_by_one, vectorized = tx_index.BloomFilter(1000), tx_index.BloomFilter(1000)
+    hashes = [_hash(n) for n in range(300)]
+    for h in hashes:
+        one_by_one.add(h)
+    vectorized.add_many(np.array([h.encode() for h in hashes], dtype="S64"))
+    assert np.array_equal(one_by_one.bits, vectorized.bits)
+    assert one_by_one.count == vectorized.count
+
+
+def test_search_by_full_hash_prefix_and_shortened_form(tmp_path):
+    hashes = [_hash(n) for n in range(200)]
+    index, _ = _index(tmp_path, enumerate(hashes, start=1))
+    target = hashes[17]
+
+    assert index.search(target) == (1, [target])
+    count, matches = index.search(target[:12])
+    assert count == 1 and matches == [target]
+    assert index.search(f"{target[:8]}...{target[-8:]}") == (1, [target])
+    assert index.search("abc") == (0, [])           # shorter than MIN_PREFIX
+    assert index.search("not-hex!") == (0, [])
+
+
+def test_prefix_search_reports_every_match(tmp_path):
+    hashes = [_hash(n) for n in range(5000)]
+    index, _ = _index(tmp_path, enumerate(hashes, start=1))
+    prefix = hashes[0][:4]
+    expected = sorted(h for h in hashes if h.startswith(prefix))
+    count, matches = index.search(prefix, limit=100)
+    assert count == len(expected) and matches == expected
+
+
+def test_late_commit_below_the_high_water_mark_is_picked_up(tmp_path):
+    index, keys = _index(tmp_path, [(1, _hash(1)), (3, _hash(3))])
+    assert index.high_water == 3
+    # Transaction 2 was inserted before 3 but committed after it was read
+    keys.rows.append((2, _hash(2)))
+    assert index.catch_up() == 1
+    assert index.search(_hash(2)) == (1, [_hash(2)])
+    assert index.catch_up() == 0
+    assert len(index) == 3
+
+
+def test_full_hash_missing_from_the_index_is_confirmed_in_the_database(tmp_path):
+    index, keys = _index(tmp_path, [(1, _hash(1))])
+    keys.rows.append((2, _hash(2)))              # committed after the last catch-up
+    assert index.search(_hash(2)) == (0, [])
+    assert index.search(_hash(2), cursor=keys) == (1, [_hash(2)])
+    assert index.search(_hash(99), cursor=keys) == (0, [])
+
+
+def test_stored_only_queries_hashes_the_filter_cannot_rule_out(tmp_path):
+    index, keys = _index(tmp_path, [(1, _hash(1)), (2, _hash(2))])
+    before = keys.queries
+    assert index.stored(keys, [_hash(10), _hash(11)]) == set()
+    assert keys.queries == before
+    assert index.stored(keys, [_hash(1), _hash(10)]) == {_hash(1)}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    rows = [(n, _hash(n)) for n in range(1, 300)]
+    index, _ = _index(tmp_path, rows)
+    index.save()
+
+    restored, keys = _index(tmp_path, rows)
+    assert restored.high_water == 299
+    assert len(restored) == 299
+    assert restored.search(_hash(150)) == (1, [_hash(150)])
+
+
+def test_saved_index_ahead_of_the_database_is_discarded(tmp_path):
+    index, _ = _index(tmp_path, [(n, _hash(n)) for n in range(1, 50)])
+    index.save()
+    fresh = tx_index.TransactionIndex(str(tmp_path), conn_factory=lambda: FakeKeys())
+    assert fresh.load(10) is False
+
+
+def _saved_high_water(tmp_path):
+    with open(tmp_path / "meta.json") as f:
+        return json.load(f)["high_water"]
+
+
+def test_small_catch_ups_are_saved_once_the_save_interval_passes(tmp_path):
+    index, keys = _index(tmp_path, [(1, _hash(1))])
+    index.save()
+    keys.rows.append((2, _hash(2)))
+    assert index.catch_up() == 1
+    assert _saved_high_water(tmp_path) == 1        # below MERGE_THRESHOLD and recently saved
+
+    index.saved_at -= tx_index.SAVE_INTERVAL
+    keys.rows.append((3, _hash(3)))
+    assert index.catch_up() == 1
+    assert _saved_high_water(tmp_path) == 3
+    assert index.unsaved == 0
+
+
+def test_null_index_answers_from_transaction_keys():
+    keys = FakeKeys([(n, _hash(n)) for n in range(1, 500)])
+    target = _hash(42)
+    null = tx_index.NULL_INDEX
+    assert null.search(target, cursor=keys) == (1, [target])
+    assert null.search(f"{target[:8]}...{target[-8:]}", cursor=keys) == (1, [target])
+    expected = sorted(h for _, h in keys.rows if h.startswith(target[:4]))
+    assert null.search(target[:4], limit=100, cursor=keys) == (len(expected), expected)
+    assert null.search(target[:4]) == (0, [])      # no cursor, nothing to ask
+    assert null.stored(keys, [target, _hash(1000), "short"]) == {target}
+
+
+def test_get_index_serves_the_null_index_until_the_warm_load_finishes(tmp_path, monkeypatch):
+    listeners = []
+
+    class FakeFeed:
+        def add_listener(self, listener):
+            listeners.append(listener)
+
+        def start(self):
+            pass
+
+    monkeypatch.setattr(tx_index, "INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(tx_index, "_index", None)
+    monkeypatch.setattr(tx_index, "_warmer", None)
+    monkeypatch.setattr(tx_index.change_feed, "get_feed", lambda: FakeFeed())
+    keys = FakeKeys([(1, _hash(1))])
+    loaded = tx_index.threading.Event()
+    original_open = tx_index.TransactionIndex.open
+
+    def slow_open(self):
+        loaded.wait(5)
+        return original_open(self)
+
+    monkeypatch.setattr(tx_index.TransactionIndex, "open", slow_open)
+    tx_index.warm_index(conn_factory=lambda: keys)
+    warmer = tx_index._warmer
+    assert tx_index.get_index() is tx_index.NULL_INDEX
+
+    loaded.set()
+    warmer.join(5)
+    index = tx_index.get_index()
+    assert isinstance(index, tx_index.TransactionIndex)
+    assert index.search(_hash(1)) == (1, [_hash(1)])
+    assert listeners == [index.on_events]
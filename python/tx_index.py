@@ -0,0 +1,381 @@
+import os
+import json
+import math
+import time
+import string
+import threading
+
+import numpy as np
+
+import database
+import change_feed
+
+# Where the filter and the sorted hashes are persisted between restarts
+INDEX_DIR = os.environ.get("TX_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tx_index"))
+
+BLOOM_ERROR_RATE = 0.001   # False-positive rate at capacity
+MIN_CAPACITY = 100000      # The filter is rebuilt at double capacity once it fills up
+MERGE_THRESHOLD = 4096     # New hashes are merged into the sorted array (and saved) at this size
+# A catch-up also saves once hashes added since the last save are this many seconds old, so
+# trickling per-transaction catch-ups still reach disk and a restart reads only recent rows
+SAVE_INTERVAL = float(os.environ.get("TX_INDEX_SAVE_INTERVAL", "300"))
+WARM_RETRY = 30.0          # Seconds between attempts to open the process-wide index
+CATCH_UP_CHUNK = 50000     # Rows per keyset page when reading new transactions
+# Ids are assigned at insert but become visible at commit, so a transaction can appear below
+# the high-water mark after a later one was read. Each catch-up re-reads this many ids below
+# the mark and adds any hash it has not indexed yet.
+RESCAN_WINDOW = int(os.environ.get("TX_INDEX_RESCAN_WINDOW", "2000"))
+MIN_PREFIX = 4             # Shortest prefix a search accepts
+MAX_MATCHES = 10           # Matches listed for an ambiguous prefix
+
+HASH_LEN = 64
+MASK64 = (1 << 64) - 1
+HEX_DIGITS = set(string.hexdigits.lower())
+
+
+def normalize(tx_hash):
+    return (tx_hash or "").strip().lower()
+
+
+def is_hex(text):
+    return bool(text) and set(text) <= HEX_DIGITS
+
+
+# Split a search into (head, tail): a full hash or prefix has no tail, the "head...tail" form
+# the pages display has both. None when it is not searchable.
+def parse_query(query):
+    head, dots, tail = normalize(query).partition("...")
+    if not dots:
+        tail = ""
+    if not is_hex(head) or (tail and not is_hex(tail)) or len(head) < MIN_PREFIX:
+        return None
+    return head, tail
+
+
+class BloomFilter:
+    # Bit array over transaction hashes. Hashes are SHA-256 hex, so two 64-bit slices of the
+    # hash itself are already independent and drive the double hashing (h1 + i * h2) mod size.
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE, bits=None, count=0):
+        self.capacity = int(capacity)
+        self.error_rate = error_rate
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bits if bits is not None else np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = count
+
+    def _positions(self, tx_hash):
+        h1 = int(tx_hash[:16], 16)
+        h2 = int(tx_hash[16:32], 16) | 1
+        return [((h1 + i * h2) & MASK64) % self.size for i in range(self.hashes)]
+
+    def add(self, tx_hash):
+        for p in self._positions(tx_hash):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    # Vectorized add for rebuilds; hashes is an array of 64-byte ASCII hashes
+    def add_many(self, hashes):
+        if len(hashes) == 0:
+            return
+        h1 = np.array([int(h[:16], 16) for h in hashes], dtype=np.uint64)
+        h2 = np.array([int(h[16:32], 16) | 1 for h in hashes], dtype=np.uint64)
+        size = np.uint64(self.size)
+        for i in range(self.hashes):
+            # uint64 arithmetic wraps exactly like the & MASK64 in _positions
+            positions = (h1 + np.uint64(i) * h2) % size
+            np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype(np.int64),
+                             (np.uint64(1) << (positions & np.uint64(7))).astype(np.uint8))
+        self.count += len(hashes)
+
+    def __contains__(self, tx_hash):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(tx_hash))
+
+
+class TransactionIndex:
+    # In-memory lookup structures over every transaction hash: a Bloom filter that answers
+    # "definitely not present" without touching the database, and a sorted array of hashes
+    # for prefix search. New transactions are read incrementally from RESCAN_WINDOW ids below
+    # a transaction_id high-water mark; both structures are saved to INDEX_DIR so a restart
+    # only reads the transactions added since the last save. A full hash the filter rules out
+    # is still confirmed against TransactionKeys before search() reports it missing.
+    def __init__(self, index_dir=INDEX_DIR, conn_factory=database.get_db_connection):
+        self.index_dir = index_dir
+        self.conn_factory = conn_factory
+        self.conn = None
+        self.hashes = np.empty(0, dtype="S64")
+        self.pending = set()
+        self.bloom = BloomFilter(MIN_CAPACITY)
+        self.high_water = 0
+        self.unsaved = 0                   # Hashes added since the last save (or load)
+        self.saved_at = time.monotonic()
+        # `lock` guards the in-memory structures; `catch_up_lock` the connection and the
+        # high-water mark, so lookups never wait on a catch-up's database round trips
+        self.lock = threading.RLock()
+        self.catch_up_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.hashes) + len(self.pending)
+
+    def add(self, tx_hash):
+        return self.add_new([tx_hash]) == 1
+
+    # Add hashes not indexed yet (rows re-read from the rescan window are usually indexed
+    # already); returns how many were new
+    def add_new(self, tx_hashes):
+        added = 0
+        with self.lock:
+            for tx_hash in map(normalize, tx_hashes):
+                if not self._indexed(tx_hash):
+                    self._add(tx_hash)
+                    added += 1
+            self.unsaved += added
+        return added
+
+    def _add(self, tx_hash):
+        self.pending.add(tx_hash.encode())
+        if self.bloom.count >= self.bloom.capacity:
+            self._grow()
+        else:
+            self.bloom.add(tx_hash)
+        if len(self.pending) >= MERGE_THRESHOLD:
+            self._merge()
+
+    # Exact membership (the filter only answers "certainly not")
+    def _indexed(self, tx_hash):
+        if tx_hash not in self.bloom:
+            return False
+        key = tx_hash.encode()
+        if key in self.pending:
+            return True
+        position = np.searchsorted(self.hashes, key)
+        return position < len(self.hashes) and self.hashes[position] == key
+
+    def _merge(self):
+        if self.pending:
+            self.hashes = np.sort(np.concatenate([self.hashes, np.array(list(self.pending), dtype="S64")]))
+            self.pending = set()
+
+    # Rebuild the filter at double capacity from the hashes already indexed
+    def _grow(self):
+        self._merge()
+        self.bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(self.hashes)), self.bloom.error_rate)
+        self.bloom.add_many(self.hashes)
+
+    # False means the hash is certainly not stored; True still needs a database check
+    def might_contain(self, tx_hash):
+        tx_hash = normalize(tx_hash)
+        if len(tx_hash) != HASH_LEN or not is_hex(tx_hash):
+            return False
+        with self.lock:
+            return tx_hash in self.bloom
+
+    # Hashes from `tx_hashes` already in Transactions (dictionary cursor). The filter rules
+    # out nearly every new hash, so a submission normally needs no lookup query at all. A hash
+    # committed since the last catch-up can be missed; signatures.submit_verified relies on the
+    # TransactionKeys primary key to reject that one at insert.
+    def stored(self, cursor, tx_hashes):
+        candidates = sorted({normalize(h) for h in tx_hashes if self.might_contain(h)})
+        if not candidates:
+            return set()
+        placeholders = ", ".join(["%s"] * len(candidates))
+        cursor.execute(f"SELECT transaction_hash FROM TransactionKeys WHERE transaction_hash IN ({placeholders})",
+                       candidates)
+        return {row['transaction_hash'] for row in cursor.fetchall()}
+
+    # Hashes matching a full hash, a prefix, or the "head...tail" form the pages display.
+    # Returns (number of matches, up to `limit` matching hashes). With a dictionary cursor, a
+    # full hash the index does not have yet is looked up in TransactionKeys.
+    def search(self, query, limit=MAX_MATCHES, cursor=None):
+        parsed = parse_query(query)
+        if parsed is None:
+            return 0, []
+        head, tail = parsed
+        if len(head) == HASH_LEN:
+            if self.might_contain(head):
+                return 1, [head]
+            if cursor is not None:
+                cursor.execute("SELECT 1 AS found FROM TransactionKeys WHERE transaction_hash = %s", (head,))
+                if cursor.fetchall():
+                    return 1, [head]
+            return 0, []
+
+        prefix = head.encode()
+        with self.lock:
+            lo = np.searchsorted(self.hashes, prefix, side="left")
+            hi = np.searchsorted(self.hashes, prefix + b"\xff", side="left")
+            candidates = [h.decode() for h in self.hashes[lo:hi] if not tail or h.endswith(tail.encode())]
+            candidates += [h.decode() for h in self.pending
+                           if h.startswith(prefix) and (not tail or h.endswith(tail.encode()))]
+        return len(candidates), sorted(candidates)[:limit]
+
+    def _cursor(self):
+        if self.conn is None or not self.conn.is_connected():
+            self.conn = self.conn_factory()
+            self.conn.autocommit = True
+        return self.conn.cursor()
+
+    # Read transactions from RESCAN_WINDOW ids below the high-water mark onwards; returns how
+    # many hashes were added. The index lock is only taken to add each page's hashes.
+    def catch_up(self):
+        added = 0
+        with self.catch_up_lock:
+            cursor = self._cursor()
+            last_id = max(0, self.high_water - RESCAN_WINDOW)
+            while True:
+                cursor.execute("""
+                    SELECT transaction_id, transaction_hash
+                    FROM TransactionKeys
+                    WHERE transaction_id > %s
+                    ORDER BY transaction_id
+                    LIMIT %s
+                """, (last_id, CATCH_UP_CHUNK))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                added += self.add_new(tx_hash for _, tx_hash in rows)
+                last_id = rows[-1][0]
+                self.high_water = max(self.high_water, last_id)
+            if self.unsaved >= MERGE_THRESHOLD or (
+                    self.unsaved and time.monotonic() - self.saved_at >= SAVE_INTERVAL):
+                self.save()
+        return added
+
+    # Change-feed listener: new transaction rows trigger an incremental catch-up
+    def on_events(self, events):
+        if any(e['kind'] == 'transaction' for e in events):
+            self.catch_up()
+
+    def _paths(self):
+        return {name: os.path.join(self.index_dir, name) for name in ("hashes.npy", "bloom.npy", "meta.json")}
+
+    def save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        paths = self._paths()
+        # Snapshot under the lock (merging replaces the hashes array; the filter bits change in
+        # place, so they are copied) and write outside it
+        with self.lock:
+            self._merge()
+            hashes, bits = self.hashes, self.bloom.bits.copy()
+            meta = {"high_water": self.high_water, "capacity": self.bloom.capacity,
+                    "error_rate": self.bloom.error_rate, "count": self.bloom.count}
+            self.unsaved, self.saved_at = 0, time.monotonic()
+        # Write side files first and the metadata last, each replaced atomically
+        for name, array in (("hashes.npy", hashes), ("bloom.npy", bits)):
+            with open(paths[name] + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(paths[name] + ".tmp", paths[name])
+        with open(paths["meta.json"] + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(paths["meta.json"] + ".tmp", paths["meta.json"])
+
+    # Restore a saved index; False when there is none or it does not match the database
+    def load(self, max_transaction_id):
+        paths = self._paths()
+        try:
+            with open(paths["meta.json"]) as f:
+                meta = json.load(f)
+            hashes = np.load(paths["hashes.npy"])
+            bits = np.load(paths["bloom.npy"])
+        except (OSError, ValueError):
+            return False
+        # A database recreated since the last save starts over
+        if meta["high_water"] > max_transaction_id or len(hashes) != meta["count"]:
+            return False
+        with self.lock:
+            self.hashes = hashes
+            self.pending = set()
+            self.bloom = BloomFilter(meta["capacity"], meta["error_rate"], bits, meta["count"])
+            self.high_water = meta["high_water"]
+        return True
+
+    def open(self):
+        with self.catch_up_lock:
+            cursor = self._cursor()
+            cursor.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM TransactionKeys")
+            max_id = cursor.fetchone()[0]
+        self.load(max_id)
+        self.catch_up()
+        return self
+
+
+class NullIndex:
+    # Stands in while the process-wide index opens: every lookup goes to TransactionKeys
+    # (hash prefixes are a range scan of its primary key), so no request waits for the load
+    def stored(self, cursor, tx_hashes):
+        candidates = sorted({h for h in map(normalize, tx_hashes) if len(h) == HASH_LEN and is_hex(h)})
+        if not candidates:
+            return set()
+        placeholders = ", ".join(["%s"] * len(candidates))
+        cursor.execute(f"SELECT transaction_hash FROM TransactionKeys WHERE transaction_hash IN ({placeholders})",
+                       candidates)
+        return {row['transaction_hash'] for row in cursor.fetchall()}
+
+    def search(self, query, limit=MAX_MATCHES, cursor=None):
+        parsed = parse_query(query)
+        if parsed is None or cursor is None:
+            return 0, []
+        head, tail = parsed
+        pattern = head if len(head) == HASH_LEN else f"{head}%{tail}"
+        cursor.execute("SELECT COUNT(*) AS matches FROM TransactionKeys WHERE transaction_hash LIKE %s", (pattern,))
+        count = cursor.fetchone()['matches']
+        cursor.execute("""
+            SELECT transaction_hash FROM TransactionKeys
+            WHERE transaction_hash LIKE %s
+            ORDER BY transaction_hash
+            LIMIT %s
+        """, (pattern, limit))
+        return count, [row['transaction_hash'] for row in cursor.fetchall()]
+
+
+NULL_INDEX = NullIndex()
+
+_index = None
+_warmer = None
+_index_lock = threading.Lock()
+
+
+# Load the saved index and catch it up on its own connection, then publish it and keep it
+# current from the change feed
+def _warm(conn_factory):
+    global _index, _warmer
+    while True:
+        try:
+            index = TransactionIndex(conn_factory=conn_factory).open()
+            break
+        except Exception:
+            # Database unavailable; lookups use NULL_INDEX until a later attempt succeeds
+            time.sleep(WARM_RETRY)
+    with _index_lock:
+        _index, _warmer = index, None
+    feed = change_feed.get_feed()
+    feed.add_listener(index.on_events)
+    feed.start()
+
+
+# Start opening the process-wide index in a background thread (once per process); app.py
+# calls this at startup
+def warm_index(conn_factory=database.get_db_connection):
+    global _warmer
+    with _index_lock:
+        if _index is None and _warmer is None:
+            _warmer = threading.Thread(target=_warm, args=(conn_factory,), name="tx-index-warm", daemon=True)
+            _warmer.start()
+
+
+# Process-wide index once it is open; until then NULL_INDEX, so no request (in particular
+# one holding wallet row locks) waits for the index to load
+def get_index():
+    warm_index()
+    with _index_lock:
+        return _index if _index is not None else NULL_INDEX
+
+
+# Build (or refresh) the persisted index: python tx_index.py
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    index = TransactionIndex().open()
+    index.save()
+    print(f"Indexed {len(index)} transaction hashes up to #{index.high_water} "
+          f"in {time.perf_counter() - start:.2f}s ({index.bloom.bits.nbytes / 1e6:.1f} MB filter)")
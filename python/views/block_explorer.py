@@ -0,0 +1,239 @@
+import streamlit as st
+import pandas as pd
+
+import common
+import admission
+import database
+import chain_store
+import change_feed
+import miner
+import partitions
+import query_cache
+import tx_index
+
+
+# Block Explorer page
+def render():
+    cursor = common.read_cursor("block_explorer")
+
+    st.title("Block ")
+    
+    # Visual blockchain representation
+    st.markdown("### Blockchain")
+    
+    # Get last 10 blocks for visualization once (shared across sessions until the next block),
+    # then append new blocks from the change feed
+    if "explorer_blocks" not in st.session_state:
+        st.session_state.explorer_blocks_feed = change_feed.get_feed().subscribe()
+        st.session_state.explorer_blocks = query_cache.cached_query(cursor, """
+            SELECT block_id, LEFT(block_hash, 8) as short_hash, timestamp, nonce
+            FROM Blocks 
+            WHERE is_active = TRUE
+            ORDER BY block_id DESC
+            LIMIT 10
+        """, tags=("blocks",))
+    
+    @common.fragment(run_every=change_feed.POLL_INTERVAL)
+    def recent_blocks_strip():
+        recent_blocks = change_feed.merge_recent(st.session_state.explorer_blocks,
+                                                 st.session_state.explorer_blocks_feed.poll({'block'}),
+                                                 'block_id', 10, sort_key='block_id')
+        st.session_state.explorer_blocks = recent_blocks
+        
+        if recent_blocks:
+            # Display blocks as connected cards
+            cols = st.columns(min(5, len(recent_blocks)))
+            for i, block in enumerate(recent_blocks[:5]):
+                with cols[i]:
+                    st.markdown(f"""
+                    <div class="card" style="text-align: center; cursor: pointer;" onclick="alert('Block #{block['block_id']}')">
+                        <div style="font-size: 1.5rem;">#{block['block_id']}</div>
+                        <div class="hash-text">{block['short_hash']}...</div>
+                        <div class="metric-label">{block['timestamp'].strftime('%m/%d %H:%M')}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+    
+    recent_blocks_strip()
+    
+    # Search and block details rerun on their own when the search widgets change
+    @common.fragment
+    def explorer_search():
+        cursor = common.read_cursor("block_explorer")
+        
+        # Block navigation
+        col1, col2 = st.columns([1, 3])
+    
+        with col1:
+            search_type = st.selectbox("Search By", ["Block Number", "Transaction Hash"])
+        
+            if search_type == "Block Number":
+                # Default to the active tip
+                max_id = chain_store.get_chain_tip(cursor)['tip_block_id'] or 0
+            
+                # An empty chain has no block to pick (and max_value would be below min_value)
+                if not max_id:
+                    st.info("No blocks have been mined yet")
+                    block_to_show = None
+                else:
+                    block_id = st.number_input("Block Number", min_value=1, max_value=max_id, value=max_id)
+                    search = st.button("Search Block")
+                
+                    if search:
+                        block_to_show = block_id
+                    else:
+                        block_to_show = max_id
+            else:
+                tx_hash = st.text_input("Transaction Hash")
+                search = st.button("Search Transaction")
+            
+                block_to_show = None
+                if search and tx_hash:
+                    # Full hashes, prefixes and the shortened "abcd1234...ef567890" form are
+                    # resolved in memory; only a single candidate (or a full hash the index
+                    # has not caught up with) reaches the database, until the index has loaded
+                    match_count, matches = tx_index.get_index().search(tx_hash, cursor=cursor)
+                    result = None
+                    if match_count == 1:
+                        # TransactionKeys gives the full primary key, so only one partition is read
+                        cursor.execute("""
+                            SELECT t.block_id
+                            FROM TransactionKeys k
+                            JOIN Transactions t ON t.transaction_id = k.transaction_id AND t.timestamp = k.timestamp
+                            WHERE k.transaction_hash = %s
+                        """, (matches[0],))
+                        result = cursor.fetchone()
+                    
+                    if match_count > 1:
+                        st.warning(f"{match_count} transactions match '{tx_hash}'. Enter more characters of the hash:")
+                        st.code("\n".join(matches) + ("\n..." if match_count > len(matches) else ""))
+                    elif result:
+                        block_to_show = result['block_id']
+                        if not block_to_show:
+                            st.info("This transaction is not yet included in a block")
+                    elif len(tx_index.normalize(tx_hash).partition("...")[0]) < tx_index.MIN_PREFIX:
+                        st.error(f"Enter at least {tx_index.MIN_PREFIX} characters of the transaction hash")
+                    else:
+                        st.error("Transaction not found")
+        
+        # Block details
+        if block_to_show:
+            st.markdown("---")
+            st.markdown("### Block Details")
+        
+            # Get block info
+            cursor.execute("""
+                SELECT b.block_id, b.block_hash, b.previous_block_id, b.timestamp, b.nonce,
+                       b.target, b.work, b.hash_attempts, b.mining_ms,
+                       b.first_tx_timestamp, b.last_tx_timestamp,
+                       pb.block_hash as prev_hash
+                FROM Blocks b
+                LEFT JOIN Blocks pb ON b.previous_block_id = pb.block_id
+                WHERE b.block_id = %s
+            """, (block_to_show,))
+        
+            block = cursor.fetchone()
+        
+            if block:
+                col1, col2 = st.columns(2)
+            
+                with col1:
+                    st.markdown(f"""
+                    <div class="card">
+                        <h3>Block #{block['block_id']}</h3>
+                        <p><strong>Timestamp:</strong> {block['timestamp']}</p>
+                        <p><strong>Nonce:</strong> {block['nonce']}</p>
+                        <p><strong>Target:</strong> {int(block['target'] or 0):016x} (expected {block['work']} hashes)</p>
+                        <p><strong>Mining:</strong> {block['hash_attempts'] or '-'} hashes in {block['mining_ms'] if block['mining_ms'] is not None else '-'} ms</p>
+                        <p><strong>Previous Block:</strong> #{block['previous_block_id'] or 'Genesis'}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+            
+                with col2:
+                    st.markdown(f"""
+                    <div class="card">
+                        <h3>Block Hash</h3>
+                        <p class="hash-text">{block['block_hash']}</p>
+                        <h3>Previous Hash</h3>
+                        <p class="hash-text">{block['prev_hash'] or '0' * 64}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+            
+                # Get transactions in this block (bounded by their timestamps to prune partitions)
+                in_block, params = partitions.block_filter(block)
+                cursor.execute(f"""
+                    SELECT t.transaction_hash, t.amount, 
+                           s.name as sender, r.name as receiver, 
+                           t.timestamp
+                    FROM Transactions t
+                    JOIN Wallets ws ON t.sender_wallet_id = ws.wallet_id
+                    JOIN Users s ON ws.user_id = s.user_id
+                    JOIN Wallets wr ON t.receiver_wallet_id = wr.wallet_id
+                    JOIN Users r ON wr.user_id = r.user_id
+                    WHERE {in_block}
+                    ORDER BY t.timestamp
+                """, params)
+            
+                block_txs = cursor.fetchall()
+            
+                st.markdown("### Block Transactions")
+            
+                if block_txs:
+                    tx_df = pd.DataFrame(block_txs)
+                    st.dataframe(tx_df, hide_index=True)
+                else:
+                    st.info("No transactions in this block")
+            else:
+                st.error("Block not found")
+    
+    explorer_search()
+    
+    # Optional: Blockchain integrity verification
+    @common.fragment
+    def verify_integrity():
+        with st.expander("Verify Blockchain Integrity"):
+            if st.button("Verify Blockchain"):
+                # Walk the active chain through previous_block_id links (block ids on
+                # competing branches are interleaved, so block_id - 1 is not the parent)
+                valid = chain_store.ChainStore(common.read_connection("block_explorer")).verify_active_chain()
+            
+                if valid:
+                    st.success("Blockchain integrity verified! All blocks are correctly linked.")
+                else:
+                    st.error("Blockchain integrity check failed. Chain may be compromised.")
+    
+    verify_integrity()
+    
+    # Mining daemon metrics, when this process runs the miner
+    daemon = miner.get_daemon()
+    if daemon:
+        with st.expander("Mining Daemon"):
+            stats = daemon.latency.snapshot()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Confirmed Transactions", stats['confirmed'])
+            col2.metric("Submit-to-Confirm p50", f"{stats['p50_s']:.1f}s" if 'p50_s' in stats else "-")
+            col3.metric("Submit-to-Confirm p99", f"{stats['p99_s']:.1f}s" if 'p99_s' in stats else "-")
+            st.caption(f"Blocks mined by trigger: {stats['blocks'] or 'none yet'}")
+    
+    # Transfer admission counters for this worker process
+    with st.expander("Transfer Admission"):
+        stats = admission.get_controller().stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Accepted", stats['accepted'])
+        col2.metric("Shed", sum(stats['shed'].values()))
+        col3.metric("Accepted p99", f"{stats['p99_s'] * 1000:.0f}ms" if 'p99_s' in stats else "-")
+        st.caption(f"Shed by reason: {stats['shed']}, in flight {stats['in_flight']}/{stats['max_in_flight']}, "
+                   f"mempool depth {stats['mempool_depth']}")
+    
+    # Read latency per page route and target (primary or replica) for this worker process
+    with st.expander("Read Routing"):
+        routes = database.get_router().metrics.snapshot()
+        if routes:
+            st.dataframe(pd.DataFrame([
+                {"Route": route, "Target": target, "Queries": m['count'], "p50 (ms)": round(m['p50_ms'], 1),
+                 "p99 (ms)": round(m['p99_ms'], 1), "Max (ms)": round(m['max_ms'], 1)}
+                for route, targets in sorted(routes.items()) for target, m in sorted(targets.items())
+            ]), hide_index=True)
+        else:
+            st.info("No routed reads yet")
+        if not database.replica_configs():
+            st.caption("No replicas configured (DB_REPLICAS); every read goes to the primary")
@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta
+
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+import common
+import chart_data
+import change_feed
+
+
+# Dashboard page
+def render():
+    cursor = common.read_cursor("dashboard_analytics")
+
+    st.title("Your Dashboard")
+    
+    # Get user info
+    cursor.execute("SELECT name FROM Users WHERE user_id = %s", (st.session_state.user_id,))
+    user = cursor.fetchone()
+    
+    # Get user's wallet balance - this is correct, it's just summing up the actual balances
+    cursor.execute("SELECT SUM(balance) as total_balance FROM Wallets WHERE user_id = %s", 
+                   (st.session_state.user_id,))
+    balance = cursor.fetchone()['total_balance'] or 0
+    
+    # Transaction count and totals from the ledger legs of the user's wallets. Every transfer
+    # out of a wallet is counted as sent and every transfer in as received, so a transfer
+    # between the user's own wallets counts once on each side.
+    cursor.execute("""
+        SELECT COUNT(DISTINCT transaction_id) as tx_count,
+               SUM(CASE WHEN direction = 'debit' THEN -amount END) as sent,
+               SUM(CASE WHEN direction = 'credit' THEN amount END) as received
+        FROM WalletLedger
+        WHERE wallet_id IN (SELECT wallet_id FROM Wallets WHERE user_id = %s)
+    """, (st.session_state.user_id,))
+    totals = cursor.fetchone()
+    tx_count = totals['tx_count']
+    sent = totals['sent'] or 0
+    received = totals['received'] or 0
+    
+    # Display key metrics
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown("""
+        <div class="card">
+            <div class="metric-label">Total Balance</div>
+            <div class="metric-value">$%.2f</div>
+        </div>
+        """ % balance, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("""
+        <div class="card">
+            <div class="metric-label">Transactions</div>
+            <div class="metric-value">%d</div>
+        </div>
+        """ % tx_count, unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown("""
+        <div class="card">
+            <div class="metric-label">Total Sent</div>
+            <div class="metric-value">$%.2f</div>
+        </div>
+        """ % sent, unsafe_allow_html=True)
+    
+    with col4:
+        st.markdown("""
+        <div class="card">
+            <div class="metric-label">Total Received</div>
+            <div class="metric-value">$%.2f</div>
+        </div>
+        """ % received, unsafe_allow_html=True)
+    
+    # The flow chart reruns on its own, without recomputing the metrics above
+    @common.fragment
+    def net_flow_chart():
+        cursor = common.read_cursor("dashboard_analytics")
+        
+        range_choice = st.selectbox("Range", list(chart_data.RANGES),
+                                    index=list(chart_data.RANGES).index("All time"), key="dashboard_flow_range")
+        end = datetime.now() + timedelta(days=1)
+        first = None
+        if chart_data.RANGES[range_choice] is None:
+            cursor.execute("""
+                SELECT MIN(timestamp) as first
+                FROM WalletLedger
+                WHERE wallet_id IN (SELECT wallet_id FROM Wallets WHERE user_id = %s)
+            """, (st.session_state.user_id,))
+            first = cursor.fetchone()['first']
+        start = chart_data.range_start(range_choice, end, first)
+        
+        # Net flow per day, week or month (whichever keeps the range to a bounded number of rows).
+        # Transfers between the user's own wallets (and mining rewards) are left out of the flow.
+        bucket, history_data = chart_data.bucketed_series(cursor, "SUM(amount)", """
+            FROM WalletLedger
+            WHERE wallet_id IN (SELECT wallet_id FROM Wallets WHERE user_id = %s)
+              AND counterparty_user_id != %s
+        """, (st.session_state.user_id, st.session_state.user_id), "timestamp", start, end)
+    
+        if history_data:
+            # Thin the series to a bounded number of points before building the figure
+            dates, flows = chart_data.downsample(history_data)
+            history_df = pd.DataFrame({'date': dates, 'net_flow': flows})
+        
+            # Create a transaction flow chart
+            fig = px.line(history_df, x='date', y='net_flow', 
+                           title=f'{chart_data.BUCKET_LABELS[bucket]} Transaction Flow',
+                           labels={'date': 'Date', 'net_flow': 'Net Flow'})
+        
+            # Add a horizontal line at y=0
+            fig.add_shape(type='line', x0=history_df['date'].min(), x1=history_df['date'].max(),
+                          y0=0, y1=0, line=dict(color='gray', width=1, dash='dash'))
+        
+            # Color code positive vs negative flows
+            fig.update_traces(line=dict(color='green'))
+        
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No transaction history available")
+    
+    net_flow_chart()
+    
+    # Recent activity
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("""
+        <div class="card">
+            <h3>Recent Transactions</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Load the table once per session, then keep it current from the change feed
+        recent_key = f"dashboard_recent_txs_{st.session_state.user_id}"
+        if recent_key not in st.session_state:
+            st.session_state[recent_key + "_feed"] = change_feed.get_feed().subscribe(st.session_state.user_id)
+            cursor.execute("""
+                SELECT t.transaction_id, t.transaction_hash, t.amount, 
+                       s.name as sender, r.name as receiver, 
+                       t.timestamp, 
+                       CASE WHEN l.sent THEN 'Sent' ELSE 'Received' END as type
+                FROM (
+                    -- Latest five transfers across the user's wallets, one row per transfer
+                    SELECT transaction_id, MAX(timestamp) as timestamp, MIN(amount) < 0 as sent
+                    FROM WalletLedger
+                    WHERE wallet_id IN (SELECT wallet_id FROM Wallets WHERE user_id = %s)
+                      AND counterparty_wallet_id IS NOT NULL
+                    GROUP BY transaction_id
+                    ORDER BY timestamp DESC LIMIT 5
+                ) l
+                JOIN Transactions t ON t.transaction_id = l.transaction_id AND t.timestamp = l.timestamp
+                JOIN Wallets ws ON t.sender_wallet_id = ws.wallet_id
+                JOIN Users s ON ws.user_id = s.user_id
+                JOIN Wallets wr ON t.receiver_wallet_id = wr.wallet_id
+                JOIN Users r ON wr.user_id = r.user_id
+                ORDER BY t.timestamp DESC
+            """, (st.session_state.user_id,))
+            st.session_state[recent_key] = cursor.fetchall()
+        
+        @common.fragment(run_every=change_feed.POLL_INTERVAL)
+        def recent_transactions_table():
+            user_id = st.session_state.user_id
+            new_txs = [
+                {'transaction_id': e['transaction_id'], 'transaction_hash': e['transaction_hash'],
+                 'amount': e['amount'], 'sender': e['sender'], 'receiver': e['receiver'],
+                 'timestamp': e['timestamp'], 'type': 'Sent' if e['sender_user_id'] == user_id else 'Received'}
+                for e in st.session_state[recent_key + "_feed"].poll({'transaction'})
+                if e['sender'] is not None  # Mining rewards have no sender and are not listed here
+            ]
+            user_txs = change_feed.merge_recent(st.session_state[recent_key], new_txs,
+                                                'transaction_id', 5, sort_key='timestamp')
+            st.session_state[recent_key] = user_txs
+            
+            if user_txs:
+                user_tx_df = pd.DataFrame(user_txs).drop(columns=['transaction_id'])
+                user_tx_df['transaction_hash'] = user_tx_df['transaction_hash'].apply(lambda x: x[:8] + '...' + x[-8:])
+                st.dataframe(user_tx_df, hide_index=True)
+            else:
+                st.info("No transactions yet")
+        
+        recent_transactions_table()
+    
+    with col2:
+        st.markdown("""
+        <div class="card">
+            <h3>Your Wallets</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        cursor.execute("""
+            SELECT wallet_id, balance, created_at 
+            FROM Wallets
+            WHERE user_id = %s
+        """, (st.session_state.user_id,))
+        
+        wallets = cursor.fetchall()
+        
+        if wallets:
+            wallet_df = pd.DataFrame(wallets)
+            st.dataframe(wallet_df, hide_index=True)
+        else:
+            st.info("No wallets found")
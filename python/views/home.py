@@ -0,0 +1,80 @@
+import streamlit as st
+import pandas as pd
+
+import common
+import chain_store
+import query_cache
+
+
+# Home page
+def render():
+    cursor = common.read_cursor("home")
+
+    st.title("Welcome to the Decentralized Transaction Verification System")
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.markdown("""
+        <div class="card">
+            <h2>Secure Blockchain Transactions</h2>
+            <p>Our platform offers a secure and transparent way to manage your digital transactions using blockchain technology.</p>
+            <p>Key features:</p>
+            <ul>
+                <li>Real-time transaction verification</li>
+                <li>Secure wallet management</li>
+                <li>Detailed blockchain explorer</li>
+                <li>Analytics and reporting</li>
+            </ul>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.markdown("""
+        <div class="card">
+            <h3>Recent Transactions</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Display recent transactions (shared by every visitor until the next transaction)
+        recent_txs = query_cache.cached_query(cursor, """
+            SELECT t.transaction_hash, t.amount, 
+                   s.name as sender, r.name as receiver, 
+                   t.timestamp
+            FROM Transactions t
+            JOIN Wallets ws ON t.sender_wallet_id = ws.wallet_id
+            JOIN Users s ON ws.user_id = s.user_id
+            JOIN Wallets wr ON t.receiver_wallet_id = wr.wallet_id
+            JOIN Users r ON wr.user_id = r.user_id
+            ORDER BY t.timestamp DESC LIMIT 5
+        """, tags=("transactions",))
+        
+        if recent_txs:
+            tx_df = pd.DataFrame(recent_txs)
+            tx_df['transaction_hash'] = tx_df['transaction_hash'].apply(lambda x: x[:8] + '...' + x[-8:])
+            st.dataframe(tx_df, hide_index=True)
+        else:
+            st.info("No transactions available")
+    
+    with col2:
+        st.markdown("""
+        <div class="card">
+            <h3>Get Started</h3>
+            <p>Create an account or login to start exploring the blockchain.</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.markdown("""
+        <div class="card">
+            <h3>Block Height</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Display current block height and latest block time from the chain-tip record
+        tip = query_cache.get_cache().get_or_load("chain_tip", lambda: chain_store.get_chain_tip(cursor),
+                                                  tags=("blocks",))
+        height = tip['height'] or 0
+        st.markdown(f"<div class='metric-value'>{height}</div>", unsafe_allow_html=True)
+        
+        if tip['tip_timestamp']:
+            latest_time = tip['tip_timestamp']
+            st.markdown(f"<div class='metric-label'>Latest block: {latest_time}</div>", unsafe_allow_html=True)
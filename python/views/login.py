@@ -0,0 +1,38 @@
+import time
+
+import streamlit as st
+
+import common
+import session_store
+
+
+# Login page
+def render():
+    cursor = common.get_connection().cursor(dictionary=True)
+
+    st.title("Login to Your Account")
+    
+    with st.form("login_form"):
+        email = st.text_input("Email")
+        password = st.text_input("Password", type="password")
+        submit = st.form_submit_button("Login")
+        
+        if submit:
+            if not email or not password:
+                st.error("Please fill in all fields")
+            else:
+                hashed_pw = common.hash_password(password)
+                cursor.execute("SELECT user_id, name FROM Users WHERE email=%s AND password=%s", (email, hashed_pw))
+                user = cursor.fetchone()
+                
+                if user:
+                    # A new session id on login, so a token obtained before it is worthless
+                    session_store.rotate(st.session_state)
+                    st.session_state.user_id = user['user_id']
+                    st.success(f"Welcome back, {user['name']}!")
+                    time.sleep(1)
+                    st.rerun()
+                else:
+                    st.error("Invalid email or password")
+    
+    st.markdown("Don't have an account? Navigate to Register from the sidebar.")
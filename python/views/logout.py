@@ -0,0 +1,15 @@
+import time
+
+import streamlit as st
+
+import session_store
+
+
+# Logout page
+def render():
+    st.session_state.user_id = None
+    # Drop the logged-in session record and continue under a fresh anonymous session id
+    session_store.rotate(st.session_state)
+    st.success("You have been logged out.")
+    time.sleep(1)
+    st.rerun()
@@ -0,0 +1,212 @@
+import streamlit as st
+
+import common
+import admission
+import signatures
+import fraud
+import tx_index
+
+
+# Make Transaction page
+def render():
+    conn = common.get_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    st.title("Send Transaction")
+    
+    # Initialize session states for wallet selection if not exist
+    if "receiver_username" not in st.session_state:
+        st.session_state.receiver_username = ""
+    if "send_to_self" not in st.session_state:
+        st.session_state.send_to_self = False
+    if "transaction_submitted" not in st.session_state:
+        st.session_state.transaction_submitted = False
+    
+    # Get sender's wallets
+    cursor.execute("""
+        SELECT w.wallet_id, w.balance 
+        FROM Wallets w
+        WHERE w.user_id = %s
+    """, (st.session_state.user_id,))
+    
+    sender_wallets = cursor.fetchall()
+    
+    if not sender_wallets:
+        st.error("You don't have any wallets. Please contact support.")
+    else:
+        # Get user's name
+        cursor.execute("SELECT name FROM Users WHERE user_id = %s", (st.session_state.user_id,))
+        user = cursor.fetchone()
+        sender_name = user['name']
+        
+        # Create two sections - first for recipient selection, then for transaction details
+        st.markdown("### Step 1: Select Source and Destination")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown(f"**Sender:** {sender_name}")
+            
+            # Select wallet if multiple
+            if len(sender_wallets) > 1:
+                wallet_options = {f"Wallet #{w['wallet_id']} (Balance: ${w['balance']:.2f})": w['wallet_id'] for w in sender_wallets}
+                selected_wallet_key = st.selectbox("Select Source Wallet", list(wallet_options.keys()))
+                wallet_id = wallet_options[selected_wallet_key]
+                current_balance = next(w['balance'] for w in sender_wallets if w['wallet_id'] == wallet_id)
+            else:
+                wallet_id = sender_wallets[0]['wallet_id']
+                current_balance = sender_wallets[0]['balance']
+                st.markdown(f"**Source Wallet:** Wallet #{wallet_id} (Balance: ${current_balance:.2f})")
+        
+        with col2:
+            # Add option to send to own wallet
+            st.session_state.send_to_self = st.checkbox("Send to my own wallet", value=st.session_state.send_to_self)
+            
+            if st.session_state.send_to_self:
+                # Get user's other wallets (exclude the selected source wallet)
+                other_wallets = [w for w in sender_wallets if w['wallet_id'] != wallet_id]
+                
+                if not other_wallets:
+                    st.error("You don't have any other wallets to send to. Please create another wallet first.")
+                    receiver_wallet_id = None
+                else:
+                    receiver_wallet_options = {f"Wallet #{w['wallet_id']} (Balance: ${w['balance']:.2f})": w['wallet_id'] for w in other_wallets}
+                    selected_receiver_wallet_key = st.selectbox("Select Destination Wallet", list(receiver_wallet_options.keys()))
+                    receiver_wallet_id = receiver_wallet_options[selected_receiver_wallet_key]
+                    receiver_username = sender_name  # Same as sender
+            else:
+                # Receiver details
+                receiver_username = st.text_input("Recipient Username", value=st.session_state.receiver_username)
+                st.session_state.receiver_username = receiver_username
+                
+                receiver_wallet_id = None  # Initialize as None
+                if receiver_username:
+                    # Verify receiver exists
+                    cursor.execute("SELECT user_id FROM Users WHERE name = %s", (receiver_username,))
+                    receiver = cursor.fetchone()
+                    
+                    if receiver:
+                        if receiver['user_id'] == st.session_state.user_id:
+                            st.warning("This is your own username. Consider using the 'Send to my own wallet' option instead.")
+                        
+                        # Get receiver's wallets
+                        cursor.execute("""
+                            SELECT wallet_id, balance 
+                            FROM Wallets 
+                            WHERE user_id = %s
+                        """, (receiver['user_id'],))
+                        
+                        receiver_wallets = cursor.fetchall()
+                        
+                        if receiver_wallets:
+                            # Let user select which wallet to send to
+                            receiver_wallet_options = {f"Wallet #{w['wallet_id']} (Balance: ${w['balance']:.2f})": w['wallet_id'] for w in receiver_wallets}
+                            selected_receiver_wallet_key = st.selectbox("Select Recipient's Wallet", list(receiver_wallet_options.keys()))
+                            receiver_wallet_id = receiver_wallet_options[selected_receiver_wallet_key]
+                        else:
+                            st.error("Recipient does not have any wallets")
+                    else:
+                        st.error("Recipient not found")
+        
+        st.markdown("---")
+        st.markdown("### Step 2: Transaction Details")
+        
+        # Now create the form for the actual transaction
+        with st.form("transaction_form"):
+            # Start with 0 instead of 0.01
+            amount = st.number_input("Amount", min_value=0.00, max_value=float(current_balance), value=0.00, format="%.2f")
+            memo = st.text_input("Memo (Optional)", max_chars=100)
+            
+            # Hidden fields to store the selected wallet IDs
+            st.markdown(f"From Wallet #{wallet_id} to {'your own ' if st.session_state.send_to_self else ''}Wallet #{receiver_wallet_id if receiver_wallet_id else 'unknown'}")
+            
+            # Add a confirmation checkbox
+            confirm_transaction = st.checkbox("I confirm this transaction is correct")
+            
+            submit = st.form_submit_button("Send Transaction")
+            
+            if submit:
+                if not receiver_wallet_id:
+                    st.error("Please select a valid recipient wallet")
+                elif amount <= 0:
+                    st.error("Amount must be greater than 0")
+                elif amount > current_balance:
+                    st.error("Insufficient balance")
+                elif not confirm_transaction:
+                    st.error("Please confirm your transaction before sending")
+                else:
+                    # Shed the transfer before it touches the database when this worker or the mempool is overloaded
+                    controller = admission.get_controller()
+                    decision = controller.admit(st.session_state.user_id, cursor)
+                    if not decision['accepted']:
+                        st.warning(f"The network is busy ({admission.SHED_MESSAGES[decision['reason']]}). "
+                                   f"Please retry in about {decision['retry_after']:.0f} seconds.")
+                    else:
+                        st.session_state.transaction_submitted = True
+                        try:
+                            # Use individual statements with proper transaction management
+                            try:
+                                # Start transaction
+                                conn.autocommit = False
+                                admission.bound_lock_wait(cursor)
+                            
+                                # Warmed in the background at startup; scores 0 until then
+                                scorer = fraud.get_scorer()
+                            
+                                # Sign the transfer with the source wallet's key
+                                signatures.ensure_wallet_key(cursor, wallet_id)
+                                signed_tx = signatures.sign_transaction(
+                                    wallet_id, receiver_wallet_id, amount, 0, memo,
+                                    signatures.next_nonce(cursor, wallet_id)
+                                )
+                            
+                                # Verify the signature, and that the hash is new, before it reaches the Transactions insert
+                                verifier = signatures.SignatureVerifier(workers=1)
+                                accepted, rejected = signatures.submit_verified(conn, verifier, [signed_tx],
+                                                                                index=tx_index.get_index())
+                                if rejected and rejected[0]['reject_reason'] == 'duplicate':
+                                    raise ValueError("A transaction with this hash already exists")
+                                if rejected:
+                                    raise ValueError("Transaction signature could not be verified")
+                            
+                                # Score the transfer for fraud in the same database transaction
+                                cursor.execute("SELECT transaction_id FROM TransactionKeys WHERE transaction_hash = %s",
+                                               (signed_tx['transaction_hash'],))
+                                new_tx_id = cursor.fetchone()['transaction_id']
+                                fraud_score = fraud.score_transaction(cursor, scorer, new_tx_id,
+                                                                      wallet_id, receiver_wallet_id, amount)
+                            
+                                # Commit transaction, then fold the transfer into the shared scorer's history
+                                conn.commit()
+                                common.record_write()
+                                scorer.observe(wallet_id, receiver_wallet_id, amount)
+                            
+                                # In Make Transaction section, modify the confirmation message:
+                                recipient_display = sender_name if st.session_state.send_to_self else receiver_username
+                                if st.session_state.send_to_self:
+                                    st.success(f"Successfully transferred ${amount:.2f} between your wallets (Wallet #{wallet_id} → Wallet #{receiver_wallet_id})")
+                                else:
+                                    st.success(f"Successfully sent ${amount:.2f} to {recipient_display}'s Wallet #{receiver_wallet_id}")
+                            
+                                if fraud_score >= fraud.HOLD_THRESHOLD:
+                                    st.warning("This transfer has been held for review before it can be mined.")
+                                else:
+                                    # Show animation of successful transaction
+                                    st.balloons()
+                            
+                            except Exception as e:
+                                # Rollback on error
+                                conn.rollback()
+                                raise e
+                            finally:
+                                # Reset autocommit
+                                conn.autocommit = True
+                            
+                        except Exception as e:
+                            st.error(f"Transaction failed: {e}")
+                        finally:
+                            controller.release(decision)
+                        
+        # Add a separate transaction confirmation area
+        if st.session_state.transaction_submitted:
+            st.session_state.transaction_submitted = False  # Reset after displaying
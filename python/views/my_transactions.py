@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+import streamlit as st
+import plotly.graph_objects as go
+
+import common
+import columnar
+
+
+# My Transactions page
+def render():
+    st.title("My Transactions")
+    
+    # Filters, table and chart rerun together without rerunning the rest of the app
+    @common.fragment
+    def transaction_history():
+        conn = common.get_connection()
+        
+        # Transaction filters
+        col1, col2, col3 = st.columns(3)
+    
+        with col1:
+            tx_type = st.selectbox("Transaction Type", ["All", "Sent", "Received"])
+    
+        with col2:
+            sort_by = st.selectbox("Sort By", ["Newest First", "Oldest First", "Amount (High to Low)", "Amount (Low to High)"])
+    
+        with col3:
+            date_range = st.date_input("Date Range", value=[datetime.now() - timedelta(days=30), datetime.now()])
+    
+        # Apply filters to query (the columns are fetched into typed arrays, amounts as fixed-point)
+        columns = [
+            ("transaction_id", "t.transaction_id", "int"),
+            ("transaction_hash", "t.transaction_hash", "str"),
+            ("amount", "t.amount", "fixed"),
+            ("sender", "s.name", "str"),
+            ("receiver", "r.name", "str"),
+            ("timestamp", "l.timestamp", "datetime"),
+            ("type", "CASE WHEN l.direction = 'debit' THEN 'Sent' ELSE 'Received' END", "str"),
+        ]
+        # Start from the ledger legs of the user's wallets (one index range scan per wallet); joining
+        # on the timestamp too sends each Transactions lookup to a single partition
+        query = """
+            FROM WalletLedger l
+            JOIN Transactions t ON t.transaction_id = l.transaction_id AND t.timestamp = l.timestamp
+            JOIN Wallets ws ON t.sender_wallet_id = ws.wallet_id
+            JOIN Users s ON ws.user_id = s.user_id
+            JOIN Wallets wr ON t.receiver_wallet_id = wr.wallet_id
+            JOIN Users r ON wr.user_id = r.user_id
+            WHERE l.wallet_id IN (SELECT wallet_id FROM Wallets WHERE user_id = %s)
+        """
+    
+        params = [st.session_state.user_id]
+    
+        # Add transaction type filter
+        if tx_type == "Sent":
+            query += " AND l.direction = 'debit'"
+        elif tx_type == "Received":
+            query += " AND l.direction = 'credit'"
+        else:
+            # A transfer between the user's own wallets has two legs here; list it once, as sent
+            query += " AND (l.direction = 'debit' OR NOT l.counterparty_user_id <=> %s)"
+            params.append(st.session_state.user_id)
+    
+        # Add date range filter
+        if len(date_range) == 2:
+            start_date, end_date = date_range
+            end_date = end_date + timedelta(days=1)  # Include the end date
+            query += " AND l.timestamp BETWEEN %s AND %s"
+            params.extend([start_date, end_date])
+    
+        # Add sorting
+        if sort_by == "Newest First":
+            query += " ORDER BY l.timestamp DESC"
+        elif sort_by == "Oldest First":
+            query += " ORDER BY l.timestamp ASC"
+        elif sort_by == "Amount (High to Low)":
+            query += " ORDER BY t.amount DESC"
+        elif sort_by == "Amount (Low to High)":
+            query += " ORDER BY t.amount ASC"
+    
+        transactions = columnar.fetch_columns(conn, columns, query, params)
+    
+        if columnar.num_rows(transactions):
+            tx_df = columnar.to_frame(transactions, fixed=("amount",))
+        
+            # Display the transactions
+            st.dataframe(tx_df, hide_index=True)
+        
+            # Add export button
+            st.markdown(common.get_download_link(tx_df, "my_transactions.csv", "📥 Download Transactions as CSV"), unsafe_allow_html=True)
+        
+            # Create a pie chart of sent vs received (exact sums over the amount column)
+            totals = columnar.group_sum(transactions['type'], transactions['amount'])
+            sent_amount = totals.get('Sent', 0)
+            received_amount = totals.get('Received', 0)
+        
+            if sent_amount > 0 or received_amount > 0:
+                fig = go.Figure(data=[go.Pie(
+                    labels=['Sent', 'Received'],
+                    values=[sent_amount, received_amount],
+                    hole=.3,
+                    marker_colors=['#FF6B6B', '#4CAF50']
+                )])
+            
+                fig.update_layout(title_text="Transaction Balance")
+                st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No transactions found matching your criteria")
+    
+    transaction_history()
@@ -0,0 +1,85 @@
+import time
+
+import streamlit as st
+import pandas as pd
+
+import common
+import signatures
+
+
+# My Wallets page
+def render():
+    conn = common.get_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    st.title("My Wallets")
+    
+    # Get user's wallets
+    cursor.execute("""
+        SELECT wallet_id, balance, created_at 
+        FROM Wallets
+        WHERE user_id = %s
+    """, (st.session_state.user_id,))
+    
+    wallets = cursor.fetchall()
+    
+    # Display wallets
+    if wallets:
+        for wallet in wallets:
+            with st.container():
+                st.markdown(f"""
+                <div class="card">
+                    <h3>Wallet #{wallet['wallet_id']}</h3>
+                    <div class="metric-value">${wallet['balance']:.2f}</div>
+                    <div class="metric-label">Created: {wallet['created_at']}</div>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                # Get wallet transaction history (a range scan of the wallet's ledger legs)
+                cursor.execute("""
+                    SELECT transaction_id, ABS(amount) as amount, timestamp,
+                           CASE 
+                               WHEN direction = 'debit' THEN 'Outgoing'
+                               ELSE 'Incoming'
+                           END as direction
+                    FROM WalletLedger
+                    WHERE wallet_id = %s
+                    ORDER BY timestamp DESC
+                    LIMIT 5
+                """, (wallet['wallet_id'],))
+                
+                wallet_txs = cursor.fetchall()
+                
+                if wallet_txs:
+                    wallet_tx_df = pd.DataFrame(wallet_txs)
+                    st.dataframe(wallet_tx_df, hide_index=True)
+                else:
+                    st.info("No transactions for this wallet")
+    else:
+        st.error("You don't have any wallets")
+    
+    # Option to create a new wallet
+    st.markdown("---")
+    if st.button("Create New Wallet"):
+        # The wallet row (with its public key) and the private key file are created together:
+        # the row is only committed once the key is stored, and a rollback removes the file
+        wallet_id = None
+        try:
+            pem, public_hex = signatures.new_key_pair()
+            conn.start_transaction()
+            cursor.execute("INSERT INTO Wallets (user_id, balance, public_key) VALUES (%s, %s, %s)",
+                          (st.session_state.user_id, 0.0, public_hex))
+            wallet_id = cursor.lastrowid
+            signatures.store_private_key(wallet_id, pem)
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            if wallet_id is not None:
+                signatures.remove_private_key(wallet_id)
+            st.error(f"Failed to create wallet: {e}")
+        else:
+            common.record_write()
+            st.success("New wallet created successfully!")
+            time.sleep(1)
+            st.rerun()
@@ -0,0 +1,106 @@
+import streamlit as st
+
+import common
+
+
+# Profile Settings page
+def render():
+    conn = common.get_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    st.title("Profile Settings")
+    
+    # Get user info
+    cursor.execute("SELECT name, email FROM Users WHERE user_id = %s", (st.session_state.user_id,))
+    user = cursor.fetchone()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("""
+        <div class="card">
+            <h3>Profile Information</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        with st.form("profile_form"):
+            name = st.text_input("Username", value=user['name'])
+            email = st.text_input("Email", value=user['email'])
+            
+            update_profile = st.form_submit_button("Update Profile")
+            
+            if update_profile:
+                try:
+                    cursor.execute("UPDATE Users SET name = %s, email = %s WHERE user_id = %s", 
+                                  (name, email, st.session_state.user_id))
+                    conn.commit()
+                    common.record_write()
+                    # Refresh the sidebar greeting on the next run
+                    st.session_state.user_name_for = None
+                    st.success("Profile updated successfully!")
+                except Exception as e:
+                    st.error(f"Failed to update profile: {e}")
+    
+    with col2:
+        st.markdown("""
+        <div class="card">
+            <h3>Change Password</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        with st.form("password_form"):
+            current_password = st.text_input("Current Password", type="password")
+            new_password = st.text_input("New Password", type="password")
+            confirm_new_password = st.text_input("Confirm New Password", type="password")
+            
+            update_password = st.form_submit_button("Change Password")
+            
+            if update_password:
+                if not current_password or not new_password or not confirm_new_password:
+                    st.error("Please fill in all password fields")
+                elif new_password != confirm_new_password:
+                    st.error("New passwords do not match")
+                elif len(new_password) < 8:
+                    st.error("Password must be at least 8 characters long")
+                else:
+                    # Verify current password
+                    hashed_current = common.hash_password(current_password)
+                    cursor.execute("SELECT user_id FROM Users WHERE user_id = %s AND password = %s", 
+                                  (st.session_state.user_id, hashed_current))
+                    
+                    if cursor.fetchone():
+                        try:
+                            hashed_new = common.hash_password(new_password)
+                            cursor.execute("UPDATE Users SET password = %s WHERE user_id = %s", 
+                                          (hashed_new, st.session_state.user_id))
+                            conn.commit()
+                            common.record_write()
+                            st.success("Password changed successfully!")
+                        except Exception as e:
+                            st.error(f"Failed to update password: {e}")
+                    else:
+                        st.error("Current password is incorrect")
+    
+    # Account security settings
+    st.markdown("---")
+    st.markdown("""
+    <div class="card">
+        <h3>Security Settings</h3>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("#### Session Timeout")
+        timeout = st.slider("Session Timeout (minutes)", min_value=5, max_value=60, value=15, step=5)
+        
+        if st.button("Update Timeout"):
+            st.success(f"Session timeout updated to {timeout} minutes")
+    
+    with col2:
+        st.markdown("#### Two-Factor Authentication")
+        enable_2fa = st.checkbox("Enable 2FA (Preview Only)")
+        
+        if enable_2fa:
+            st.info("Two-factor authentication feature coming soon")
@@ -0,0 +1,61 @@
+import time
+
+import streamlit as st
+
+import common
+import provisioning
+
+
+# Register page
+def render():
+    conn = common.get_connection()
+
+    st.title("Create a New Account")
+    
+    with st.form("register_form"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            name = st.text_input("Username")
+            email = st.text_input("Email")
+        
+        with col2:
+            password = st.text_input("Password", type="password")
+            confirm_password = st.text_input("Confirm Password", type="password")
+        
+        submit = st.form_submit_button("Register")
+        
+        if submit:
+            # Form validation
+            if not name or not email or not password or not confirm_password:
+                st.error("Please fill in all fields")
+            elif not common.is_valid_email(email):
+                st.error("Please enter a valid email address")
+            elif password != confirm_password:
+                st.error("Passwords do not match")
+            elif len(password) < 8:
+                st.error("Password must be at least 8 characters long")
+            else:
+                try:
+                    # Same path as bulk provisioning: the user and wallet are inserted in one
+                    # transaction and the generated IDs are taken from the inserts
+                    report = provisioning.provision_users(
+                        conn, [{"name": name, "email": email, "password": password}], workers=0
+                    )[0]
+                    
+                    if report['status'] == 'duplicate':
+                        st.error("An account with this email already exists")
+                    elif report['status'] == 'name_too_long':
+                        st.error(f"Name must be at most {provisioning.MAX_NAME_LENGTH} characters")
+                    elif report['status'] == 'email_too_long':
+                        st.error(f"Email must be at most {provisioning.MAX_EMAIL_LENGTH} characters")
+                    elif report['status'] != 'created':
+                        st.error("Registration failed. Please try again.")
+                    else:
+                        common.record_write()
+                        
+                        st.success("Account created successfully! You can now log in.")
+                        time.sleep(1)
+                        st.rerun()
+                except Exception as e:
+                    st.error(f"Registration failed: {e}")
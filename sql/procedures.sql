@@ -66,74 +66,92 @@ DELIMITER ;
 
 DELIMITER $$
 
-CREATE PROCEDURE mine_block(IN force_difficulty VARCHAR(5))
+-- Mine a block on the active tip. It does not open or commit a transaction of its own: the
+-- caller runs it inside the transaction that also pays the block's reward, so a block is
+-- never committed without its reward (START TRANSACTION here would commit the caller's work).
+CREATE PROCEDURE mine_block(IN force_target BIGINT UNSIGNED)
 BEGIN
     DECLARE prev_block_hash VARCHAR(64);
     DECLARE new_block_hash VARCHAR(64);
     DECLARE mined_nonce INT DEFAULT 0;
     DECLARE curtime TIMESTAMP;
-    DECLARE difficulty VARCHAR(5);
-    DECLARE block_count INT;
-    DECLARE avg_mining_time INT;
-    
-    -- Get current block count
-    SELECT COUNT(*) INTO block_count FROM Blocks;
-    
-    -- Calculate appropriate difficulty based on blockchain size
-    -- This provides automatic difficulty adjustment
-    IF force_difficulty IS NOT NULL THEN
-        SET difficulty = force_difficulty;
-    ELSE
-        -- Determine difficulty dynamically
-        IF block_count < 100 THEN
-            SET difficulty = '0000';  -- Easy
-        ELSEIF block_count < 1000 THEN
-            SET difficulty = '00000'; -- Medium
-        ELSE
-            SET difficulty = '000000'; -- Hard
-        END IF;
-    END IF;
+    DECLARE target BIGINT UNSIGNED;
+    DECLARE block_work DECIMAL(65,0);
+    DECLARE mining_started DATETIME(6);
+    DECLARE mining_ms INT;
+    DECLARE prev_block_id INT;
+    DECLARE prev_height INT;
+    DECLARE prev_work DECIMAL(65,0);
+    DECLARE tip_target BIGINT UNSIGNED;
+    DECLARE new_block_id INT;
+    DECLARE first_tx TIMESTAMP;
+    DECLARE last_tx TIMESTAMP;
 
-    -- Get the latest block hash
-    SELECT block_hash INTO prev_block_hash FROM Blocks ORDER BY block_id DESC LIMIT 1;
+    -- Read the chain-tip record (locking it so concurrent miners serialize on the tip)
+    SELECT tip_block_id, tip_hash, COALESCE(height, -1), cumulative_work, current_target
+    INTO prev_block_id, prev_block_hash, prev_height, prev_work, tip_target
+    FROM ChainState
+    WHERE id = 1
+    FOR UPDATE;
 
-    -- If there is no previous block, set a default value
-    IF prev_block_hash IS NULL THEN
-        SET prev_block_hash = '0000000000000000000000000000000000000000000000000000000000000000';
-    END IF;
+    -- The target is retargeted on the chain-tip record as blocks are committed
+    SET target = COALESCE(force_target, tip_target);
 
     SET curtime = NOW();
+    -- SYSDATE (unlike NOW) advances while the procedure runs
+    SET mining_started = SYSDATE(6);
 
-    -- Simulated Proof-of-Work loop (improved for performance)
+    -- Simulated Proof-of-Work loop: the hash, read as a number, must not exceed the target.
+    -- There is no give-up path; retargeting keeps the expected number of attempts bounded.
     REPEAT
         SET new_block_hash = generate_hash(CONCAT(prev_block_hash, mined_nonce, curtime));
+        SET mined_nonce = mined_nonce + 1;
+    UNTIL CAST(CONV(LEFT(new_block_hash, 16), 16, 10) AS UNSIGNED) <= target END REPEAT;
+    SET mined_nonce = mined_nonce - 1;
 
-        -- Check if the block meets the difficulty requirement
-        IF LEFT(new_block_hash, LENGTH(difficulty)) = difficulty THEN
-            LEAVE;
-        ELSE
-            SET mined_nonce = mined_nonce + 1;
-        END IF;
-        
-        -- Safety exit for infinite loop prevention
-        IF mined_nonce > 10000 THEN
-            -- If we exceed 10000 attempts, reduce difficulty temporarily
-            SET difficulty = LEFT(difficulty, LENGTH(difficulty) - 1);
-            SET mined_nonce = 0;
-        END IF;
-    UNTIL FALSE END REPEAT;
+    SET mining_ms = TIMESTAMPDIFF(MICROSECOND, mining_started, SYSDATE(6)) DIV 1000;
+    -- Expected attempts at this target, 2^64 DIV (target + 1), kept exact in DECIMAL arithmetic
+    SET block_work = FLOOR(18446744073709551616 / (target + 1.0));
+    IF block_work * (target + 1.0) > 18446744073709551616 THEN
+        SET block_work = block_work - 1;
+    END IF;
 
-    -- Insert new block
-    INSERT INTO Blocks (block_hash, previous_block_id, timestamp, nonce, difficulty) 
-    VALUES (new_block_hash, (SELECT MAX(block_id) FROM Blocks), curtime, mined_nonce, difficulty);
-    
-    -- Process pending transactions (up to 10 per block)
-    UPDATE Transactions 
-    SET block_id = LAST_INSERT_ID()
-    WHERE block_id IS NULL
-    ORDER BY timestamp
-    LIMIT 10;
+    -- Insert new block on top of the active tip with its measured mining effort
+    INSERT INTO Blocks (block_hash, previous_block_id, timestamp, nonce, target, work,
+                        hash_attempts, mining_ms, height, cumulative_work, is_active)
+    VALUES (new_block_hash, prev_block_id, curtime, mined_nonce, target, block_work,
+            mined_nonce + 1, mining_ms, prev_height + 1, prev_work + block_work, TRUE);
+    SET new_block_id = LAST_INSERT_ID();
+
+    -- The new block replaces its parent as a chain tip and becomes the active tip
+    DELETE FROM ChainTips WHERE block_id = prev_block_id;
+    INSERT INTO ChainTips (block_id, height, cumulative_work)
+    VALUES (new_block_id, prev_height + 1, prev_work + block_work);
+    CALL update_chain_tip(new_block_id);
     
+    -- Process pending transactions (up to 10 per block); held transactions wait for review.
+    -- Their timestamp range bounds the update (pruning Transactions partitions) and is kept
+    -- on the block for per-block queries.
+    SELECT MIN(timestamp), MAX(timestamp) INTO first_tx, last_tx
+    FROM (
+        SELECT timestamp FROM Transactions
+        WHERE block_id IS NULL AND status = 'pending'
+        ORDER BY timestamp
+        LIMIT 10
+    ) pending;
+
+    IF first_tx IS NOT NULL THEN
+        UPDATE Transactions 
+        SET block_id = new_block_id
+        WHERE block_id IS NULL AND status = 'pending'
+          AND timestamp BETWEEN first_tx AND last_tx
+        ORDER BY timestamp
+        LIMIT 10;
+
+        UPDATE Blocks
+        SET first_tx_timestamp = first_tx, last_tx_timestamp = last_tx
+        WHERE block_id = new_block_id;
+    END IF;
 END$$
 
 DELIMITER ;
@@ -214,8 +232,8 @@ DELIMITER $$
 CREATE PROCEDURE distribute_mining_reward(IN miner_user_id INT)
 BEGIN
     DECLARE miner_wallet_id INT;
-    DECLARE block_count INT;
     DECLARE mining_reward DECIMAL(20,8);
+    DECLARE tip_id INT;
     
     -- Get miner's wallet
     SELECT wallet_id INTO miner_wallet_id 
@@ -223,19 +241,23 @@ BEGIN
     WHERE user_id = miner_user_id 
     LIMIT 1;
 
-    -- Calculate current mining reward (starts high and decreases over time)
-    SELECT COUNT(*) INTO block_count FROM Blocks;
-    SET mining_reward = 50 / POWER(2, FLOOR(block_count / 100000));
-    
+    -- Current mining reward (halving schedule) and tip come from the chain-tip record
+    SELECT tip_block_id, current_reward INTO tip_id, mining_reward FROM ChainState WHERE id = 1;
+
     -- Add reward to miner's wallet
     UPDATE Wallets 
     SET balance = balance + mining_reward 
     WHERE wallet_id = miner_wallet_id;
+
+    -- Record the reward as the block's balance effect so a reorg can revert it
+    INSERT INTO BlockDeltas (block_id, wallet_id, delta)
+    VALUES (tip_id, miner_wallet_id, mining_reward)
+    ON DUPLICATE KEY UPDATE delta = delta + VALUES(delta);
     
     -- Record reward as a system transaction
     INSERT INTO Transactions (block_id, amount, sender_wallet_id, receiver_wallet_id, timestamp, transaction_hash, fee, memo)
     VALUES (
-        (SELECT MAX(block_id) FROM Blocks),
+        tip_id,
         mining_reward,
         NULL, -- System transaction (no sender)
         miner_wallet_id,
@@ -244,6 +266,70 @@ BEGIN
         0,
         'Mining Reward'
     );
+
+    -- The reward is one of the block's transactions, so it widens the block's timestamp range
+    UPDATE Blocks
+    SET first_tx_timestamp = LEAST(COALESCE(first_tx_timestamp, NOW()), NOW()),
+        last_tx_timestamp = GREATEST(COALESCE(last_tx_timestamp, NOW()), NOW())
+    WHERE block_id = tip_id;
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+-- Rewrite the chain-tip record from a newly active tip block. Callers run this inside the
+-- transaction that commits the block (or the reorg), so readers never see a partial tip.
+CREATE PROCEDURE update_chain_tip(IN new_tip_id INT)
+BEGIN
+    DECLARE tip_height INT;
+    DECLARE tip_target BIGINT UNSIGNED;
+    DECLARE next_target DECIMAL(65,0);
+    DECLARE target_block_ms INT;
+    DECLARE retarget_interval INT;
+    DECLARE max_adjustment DECIMAL(6,2);
+    DECLARE max_target BIGINT UNSIGNED;
+    DECLARE window_attempts DECIMAL(65,0);
+    DECLARE window_ms DECIMAL(65,0);
+
+    SELECT height, target INTO tip_height, tip_target FROM Blocks WHERE block_id = new_tip_id;
+
+    SELECT c.target_block_ms, c.retarget_interval, c.max_adjustment, c.max_target
+    INTO target_block_ms, retarget_interval, max_adjustment, max_target
+    FROM MiningConfig c
+    WHERE c.id = 1;
+
+    -- The next block keeps the tip's target, except every retarget_interval blocks, when the
+    -- hash rate measured over the last interval sets the target expected to take target_block_ms
+    SET next_target = tip_target;
+    IF (tip_height + 1) % retarget_interval = 0 THEN
+        SELECT SUM(hash_attempts), SUM(mining_ms)
+        INTO window_attempts, window_ms
+        FROM Blocks
+        WHERE is_active = TRUE
+          AND height > tip_height - retarget_interval AND height <= tip_height
+          AND mining_ms IS NOT NULL;
+
+        IF window_attempts > 0 AND window_ms > 0 THEN
+            SET next_target = FLOOR(18446744073709551616
+                / GREATEST(1, window_attempts * target_block_ms / window_ms)) - 1;
+            -- Move at most max_adjustment-fold per retarget and never above the easiest target
+            SET next_target = LEAST(GREATEST(next_target, FLOOR(tip_target / max_adjustment)),
+                                    FLOOR(tip_target * max_adjustment), max_target);
+        END IF;
+    END IF;
+
+    UPDATE ChainState s
+    JOIN Blocks b ON b.block_id = new_tip_id
+    SET s.tip_block_id = b.block_id,
+        s.height = b.height,
+        s.tip_hash = b.block_hash,
+        s.tip_timestamp = b.timestamp,
+        s.cumulative_work = b.cumulative_work,
+        s.current_target = GREATEST(1, next_target),
+        -- Mining reward starts at 50 and halves every 100000 blocks
+        s.current_reward = 50 / POWER(2, FLOOR((b.height + 1) / 100000))
+    WHERE s.id = 1;
 END$$
 
 DELIMITER ;
@@ -12,6 +12,7 @@ CREATE TABLE Wallets (
     wallet_id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
     balance DECIMAL(20,8) DEFAULT 0 NOT NULL,
+    public_key CHAR(64) DEFAULT NULL, -- Hex-encoded Ed25519 public key
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
 );
@@ -23,21 +24,122 @@ CREATE TABLE Blocks (
     previous_block_id INT DEFAULT NULL,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     nonce INT NOT NULL,
-    FOREIGN KEY (previous_block_id) REFERENCES Blocks(block_id) ON DELETE CASCADE
+    target BIGINT UNSIGNED NOT NULL, -- Leading 64 bits of block_hash must not exceed this
+    work DECIMAL(65,0) NOT NULL DEFAULT 1, -- Expected hash attempts at this target: 2^64 DIV (target + 1)
+    hash_attempts BIGINT DEFAULT NULL, -- Hashes actually computed by the miner
+    mining_ms INT DEFAULT NULL, -- Wall time spent mining, in milliseconds
+    size INT DEFAULT 0,
+    height INT NOT NULL DEFAULT 0,
+    cumulative_work DECIMAL(65,0) NOT NULL DEFAULT 0, -- Sum of work from genesis to this block
+    is_active BOOLEAN NOT NULL DEFAULT TRUE, -- On the currently selected (heaviest) chain
+    first_tx_timestamp TIMESTAMP NULL DEFAULT NULL, -- Timestamp range of the block's transactions, so
+    last_tx_timestamp TIMESTAMP NULL DEFAULT NULL,  -- per-block queries can prune Transactions partitions
+    FOREIGN KEY (previous_block_id) REFERENCES Blocks(block_id) ON DELETE CASCADE,
+    INDEX idx_blocks_active (is_active, block_id),
+    INDEX idx_blocks_active_height (is_active, height)
 );
 
--- TRANSACTIONS TABLE
+-- CHAIN TIPS TABLE (blocks with no children, one row per competing branch)
+CREATE TABLE ChainTips (
+    block_id INT PRIMARY KEY,
+    height INT NOT NULL,
+    cumulative_work DECIMAL(65,0) NOT NULL,
+    FOREIGN KEY (block_id) REFERENCES Blocks(block_id) ON DELETE CASCADE,
+    INDEX idx_chaintips_work (cumulative_work)
+);
+
+-- CHAIN STATE TABLE (single-row chain-tip record, rewritten whenever the active tip changes)
+CREATE TABLE ChainState (
+    id TINYINT PRIMARY KEY DEFAULT 1,
+    tip_block_id INT DEFAULT NULL,
+    height INT DEFAULT NULL, -- Height of the active tip (genesis is 0, NULL before any block)
+    tip_hash VARCHAR(64) NOT NULL DEFAULT '0000000000000000000000000000000000000000000000000000000000000000',
+    tip_timestamp TIMESTAMP NULL DEFAULT NULL,
+    cumulative_work DECIMAL(65,0) NOT NULL DEFAULT 0,
+    current_target BIGINT UNSIGNED NOT NULL DEFAULT 281474976710655, -- Target for the next block (starts at 16 leading zero bits)
+    current_reward DECIMAL(20,8) NOT NULL DEFAULT 50, -- Reward for the block at the tip
+    FOREIGN KEY (tip_block_id) REFERENCES Blocks(block_id) ON DELETE SET NULL
+);
+
+INSERT INTO ChainState (id, tip_block_id) VALUES (1, NULL);
+
+-- MINING CONFIG TABLE (single row; difficulty retargeting parameters)
+CREATE TABLE MiningConfig (
+    id TINYINT PRIMARY KEY DEFAULT 1,
+    target_block_ms INT NOT NULL DEFAULT 30000, -- Desired time to mine one block
+    retarget_interval INT NOT NULL DEFAULT 10, -- Retarget after every N blocks
+    max_adjustment DECIMAL(6,2) NOT NULL DEFAULT 4, -- Largest factor the target may move by per retarget
+    initial_target BIGINT UNSIGNED NOT NULL DEFAULT 281474976710655,
+    max_target BIGINT UNSIGNED NOT NULL DEFAULT 1152921504606846975 -- Easiest allowed target (4 leading zero bits)
+);
+
+INSERT INTO MiningConfig (id) VALUES (1);
+
+-- BLOCK DELTAS TABLE (per-wallet balance effect of each block, reverted on reorg)
+CREATE TABLE BlockDeltas (
+    block_id INT NOT NULL,
+    wallet_id INT NOT NULL,
+    delta DECIMAL(20,8) NOT NULL,
+    PRIMARY KEY (block_id, wallet_id),
+    FOREIGN KEY (block_id) REFERENCES Blocks(block_id) ON DELETE CASCADE,
+    FOREIGN KEY (wallet_id) REFERENCES Wallets(wallet_id) ON DELETE CASCADE
+);
+
+-- TRANSACTIONS TABLE, partitioned by month of timestamp (which never changes, unlike block_id).
+-- partitions.py pre-creates monthly partitions by splitting p_future and archives old months
+-- by exchanging or dropping whole partitions. Partitioned InnoDB tables cannot take part in
+-- foreign keys, and every unique key must include timestamp: wallet references are checked
+-- by the validate_transaction trigger, and the global uniqueness of transaction_hash and of
+-- (sender_wallet_id, nonce) is enforced by TransactionKeys, written by a trigger on insert.
 CREATE TABLE Transactions (
-    transaction_id INT AUTO_INCREMENT PRIMARY KEY,
+    transaction_id INT AUTO_INCREMENT,
     block_id INT DEFAULT NULL,
     amount DECIMAL(20,8) CHECK (amount > 0) NOT NULL,
-    sender_wallet_id INT NOT NULL,
+    sender_wallet_id INT DEFAULT NULL, -- NULL for system transactions (mining rewards)
     receiver_wallet_id INT NOT NULL,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    transaction_hash VARCHAR(64) UNIQUE NOT NULL,
-    FOREIGN KEY (block_id) REFERENCES Blocks(block_id) ON DELETE SET NULL,
-    FOREIGN KEY (sender_wallet_id) REFERENCES Wallets(wallet_id) ON DELETE CASCADE,
-    FOREIGN KEY (receiver_wallet_id) REFERENCES Wallets(wallet_id) ON DELETE CASCADE
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    transaction_hash VARCHAR(64) NOT NULL,
+    fee DECIMAL(20,8) DEFAULT 0,
+    memo VARCHAR(255) DEFAULT NULL,
+    status VARCHAR(20) DEFAULT 'pending',
+    nonce BIGINT DEFAULT NULL, -- Per-sender-wallet sequence number covered by the signature
+    signature CHAR(128) DEFAULT NULL, -- Hex-encoded Ed25519 signature over the canonical payload
+    PRIMARY KEY (transaction_id, timestamp), -- Lookups with both columns touch a single partition
+    INDEX idx_transactions_hash (transaction_hash),
+    INDEX idx_transactions_timestamp (timestamp),
+    INDEX idx_transactions_pending (block_id, status, timestamp) -- Mempool scans (block_id IS NULL)
+)
+PARTITION BY RANGE (UNIX_TIMESTAMP(timestamp)) (
+    PARTITION p_initial VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- TRANSACTION KEYS TABLE (unpartitioned: globally unique transaction hashes and sender nonces,
+-- and where a transaction lives; kept when its partition is archived, so hashes stay unique)
+CREATE TABLE TransactionKeys (
+    transaction_hash VARCHAR(64) PRIMARY KEY,
+    transaction_id INT NOT NULL,
+    timestamp TIMESTAMP NOT NULL, -- With transaction_id, the Transactions primary key
+    sender_wallet_id INT DEFAULT NULL,
+    nonce BIGINT DEFAULT NULL,
+    UNIQUE KEY uq_keys_transaction (transaction_id),
+    UNIQUE KEY uq_sender_nonce (sender_wallet_id, nonce)
+);
+
+-- WALLET LEDGER TABLE (one row per wallet leg of a transaction, written by the
+-- after_transaction_insert_ledger trigger; a wallet's history is a range scan of the primary key)
+CREATE TABLE WalletLedger (
+    wallet_id INT NOT NULL,
+    timestamp TIMESTAMP NOT NULL, -- Copied from the transaction
+    transaction_id INT NOT NULL,
+    direction ENUM('debit', 'credit') NOT NULL,
+    amount DECIMAL(20,8) NOT NULL, -- Signed: negative on the sender's leg
+    fee DECIMAL(20,8) NOT NULL DEFAULT 0, -- Paid on the sender's leg, 0 on the receiver's
+    counterparty_wallet_id INT DEFAULT NULL, -- NULL for mining rewards
+    counterparty_user_id INT DEFAULT NULL, -- Owner of the counterparty wallet (wallets never change owner)
+    PRIMARY KEY (wallet_id, timestamp, transaction_id, direction),
+    UNIQUE KEY uq_ledger_leg (transaction_id, direction),
+    FOREIGN KEY (wallet_id) REFERENCES Wallets(wallet_id) ON DELETE CASCADE
 );
 
 CREATE TABLE TransactionLogs (
@@ -46,7 +148,7 @@ CREATE TABLE TransactionLogs (
     action VARCHAR(50) NOT NULL,
     details TEXT,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (transaction_id) REFERENCES Transactions(transaction_id) ON DELETE CASCADE
+    INDEX idx_logs_transaction (transaction_id)
 );
 
 -- Create Alerts Table
@@ -59,3 +161,23 @@ CREATE TABLE Alerts (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
 );
+
+-- TRANSACTION HOLDS TABLE (transfers held back from mining by the fraud scorer; the amount is
+-- taken back from the receiver until the hold is released, or refunded to the sender on reject)
+CREATE TABLE TransactionHolds (
+    transaction_id INT PRIMARY KEY,
+    score DECIMAL(6,4) NOT NULL,
+    reasons VARCHAR(255) DEFAULT NULL,
+    released BOOLEAN DEFAULT FALSE,
+    rejected BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    resolved_at TIMESTAMP NULL DEFAULT NULL
+);
+
+-- SESSIONS TABLE (shared Streamlit session state when SESSION_STORE=mysql)
+CREATE TABLE Sessions (
+    session_id CHAR(32) PRIMARY KEY,
+    data TEXT NOT NULL, -- JSON of the shared session-state keys
+    expires_at DOUBLE NOT NULL, -- Unix time; slides forward on activity
+    INDEX idx_sessions_expires (expires_at)
+);
@@ -34,7 +34,12 @@ BEGIN
     DECLARE sender_exists INT;
     DECLARE receiver_exists INT;
 
-    SELECT COUNT(*) INTO sender_exists FROM Wallets WHERE wallet_id = NEW.sender_wallet_id;
+    -- System transactions (mining rewards) have no sender
+    IF NEW.sender_wallet_id IS NULL THEN
+        SET sender_exists = 1;
+    ELSE
+        SELECT COUNT(*) INTO sender_exists FROM Wallets WHERE wallet_id = NEW.sender_wallet_id;
+    END IF;
     SELECT COUNT(*) INTO receiver_exists FROM Wallets WHERE wallet_id = NEW.receiver_wallet_id;
 
     IF sender_exists = 0 OR receiver_exists = 0 THEN
@@ -133,3 +138,43 @@ BEGIN
 END$$
 
 DELIMITER ;
+
+DELIMITER $$
+
+-- Write both legs of every transaction to WalletLedger, in the same statement (and so the
+-- same database transaction) as the Transactions insert
+CREATE TRIGGER after_transaction_insert_ledger
+AFTER INSERT ON Transactions
+FOR EACH ROW
+BEGIN
+    IF NEW.sender_wallet_id IS NOT NULL THEN
+        INSERT INTO WalletLedger (wallet_id, timestamp, transaction_id, direction, amount, fee,
+                                  counterparty_wallet_id, counterparty_user_id)
+        VALUES (NEW.sender_wallet_id, NEW.timestamp, NEW.transaction_id, 'debit', -NEW.amount,
+                COALESCE(NEW.fee, 0), NEW.receiver_wallet_id,
+                (SELECT user_id FROM Wallets WHERE wallet_id = NEW.receiver_wallet_id));
+    END IF;
+
+    INSERT INTO WalletLedger (wallet_id, timestamp, transaction_id, direction, amount, fee,
+                              counterparty_wallet_id, counterparty_user_id)
+    VALUES (NEW.receiver_wallet_id, NEW.timestamp, NEW.transaction_id, 'credit', NEW.amount,
+            0, NEW.sender_wallet_id,
+            (SELECT user_id FROM Wallets WHERE wallet_id = NEW.sender_wallet_id));
+END$$
+
+DELIMITER ;
+
+DELIMITER $$
+
+-- Claim the transaction's hash and sender nonce in TransactionKeys. A duplicate fails the
+-- Transactions insert, as the unique keys on the (partitioned) table itself used to.
+CREATE TRIGGER after_transaction_insert_keys
+AFTER INSERT ON Transactions
+FOR EACH ROW
+PRECEDES after_transaction_insert_ledger
+BEGIN
+    INSERT INTO TransactionKeys (transaction_hash, transaction_id, timestamp, sender_wallet_id, nonce)
+    VALUES (NEW.transaction_hash, NEW.transaction_id, NEW.timestamp, NEW.sender_wallet_id, NEW.nonce);
+END$$
+
+DELIMITER ;